@@ -29,11 +29,50 @@ B_DB_MAX_CONNECTIONS = int(os.getenv("B_DB_MAX_CONNECTIONS", 10))
 # 业务数据库连接字符串
 B_DB_CONNECTION_STRING = f"dbname={B_DB_NAME} user={B_DB_USER} password={B_DB_PASSWORD} host={B_DB_HOST} port={B_DB_PORT}"
 
+# 连接池配置（两个连接池共用）
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))  # 等待空闲连接的最长时间（秒），超时返回 503
+DB_POOL_MAX_WAITING = int(os.getenv("DB_POOL_MAX_WAITING", 100))  # 排队等待连接的最大请求数，超过时立即返回 503，0 为不限制
+DB_POOL_MAX_IDLE = float(os.getenv("DB_POOL_MAX_IDLE", 600))  # 超过 min_size 的连接空闲多久（秒）后关闭
+DB_POOL_MAX_LIFETIME = float(os.getenv("DB_POOL_MAX_LIFETIME", 3600))  # 连接最长使用时间（秒），到期后替换为新连接
+DB_POOL_CHECK = os.getenv("DB_POOL_CHECK", "true").lower() == "true"  # 借出连接前检查连接是否可用
+DB_POOL_RETRY_AFTER_SECONDS = int(os.getenv("DB_POOL_RETRY_AFTER_SECONDS", 1))  # 503 响应的 Retry-After
+
+# 查询追踪配置
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", 200))  # 执行时间超过该值（毫秒）的语句记录慢查询日志
+DB_REQUEST_QUERY_WARN = int(os.getenv("DB_REQUEST_QUERY_WARN", 50))  # 单个请求执行的语句数超过该值时记录日志
+
 # JWT 配置
 JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
 JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 JWT_ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("JWT_ACCESS_TOKEN_EXPIRE_MINUTES", 30))
 
+# 密码哈希线程池配置
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 4))  # 同时进行 bcrypt 计算的线程数
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 64))  # 排队+执行中的最大任务数，超过时返回 503
+PASSWORD_HASH_RETRY_AFTER_SECONDS = int(os.getenv("PASSWORD_HASH_RETRY_AFTER_SECONDS", 1))  # 503 响应的 Retry-After
+
+# 已认证用户缓存配置
+USER_CACHE_TTL_SECONDS = int(os.getenv("USER_CACHE_TTL_SECONDS", 60))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", 1024))
+
+# PRD 存储配置
+PRD_STORAGE_MODE = os.getenv("PRD_STORAGE_MODE", "full")  # full: 每个版本存全文；delta: 周期性快照 + 差异
+PRD_SNAPSHOT_INTERVAL = int(os.getenv("PRD_SNAPSHOT_INTERVAL", 20))  # delta 模式下每隔多少个版本写一次全文快照
+
+# PRD 批量导入配置
+PRD_IMPORT_CHUNK_SIZE = int(os.getenv("PRD_IMPORT_CHUNK_SIZE", 100))  # 每个事务写入的文档数
+PRD_IMPORT_MAX_BODY_BYTES = int(os.getenv("PRD_IMPORT_MAX_BODY_BYTES", 32 * 1024 * 1024))  # 请求体最大字节数
+PRD_IMPORT_MAX_DOCUMENTS = int(os.getenv("PRD_IMPORT_MAX_DOCUMENTS", 5000))  # 单次请求最多导入的文档数
+
+# UUR 图快照配置
+GRAPH_SNAPSHOT_PROBE_SECONDS = float(os.getenv("GRAPH_SNAPSHOT_PROBE_SECONDS", 5))  # 未收到写入通知时，检查数据库变化的最小间隔
+
+# 响应缓存配置（memory | redis | none），redis 需要安装可选依赖并设置 RESPONSE_CACHE_URL
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")
+RESPONSE_CACHE_URL = os.getenv("RESPONSE_CACHE_URL")
+RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", 300))
+RESPONSE_CACHE_MAX_SIZE = int(os.getenv("RESPONSE_CACHE_MAX_SIZE", 256))
+
 # 腾讯云短信配置
 TENCENT_SECRET_ID = os.getenv("TENCENT_SECRET_ID")
 TENCENT_SECRET_KEY = os.getenv("TENCENT_SECRET_KEY")
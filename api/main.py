@@ -1,6 +1,17 @@
+import time
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.exception_handlers import http_exception_handler
 from fastapi.openapi.utils import get_openapi
+from starlette.exceptions import HTTPException as StarletteHTTPException
 from api.utils.logger import get_logger
+from api.utils.db import open_db_pools, close_db_pools, find_database_busy
+from api.services.dimension_cache import dimension_cache, preload_dimension_cache
+from api.utils.response_cache import ResponseCacheMiddleware, response_cache_stats
+from api.utils.metrics import MetricsMiddleware, registry
+from api.utils.query_trace import QueryTraceMiddleware
+from api.services.auth_service import user_cache
 
 # 导入配置
 from api.config import (
@@ -12,11 +23,19 @@ from api.config import (
 )
 
 # 导入路由模块
-from api.routers import auth, conversations, sessions, users, standard, usecase, uur_graph
+from api.routers import auth, conversations, sessions, users, standard, usecase, uur_graph, metrics
 
 # 导入日志模块
 logger = get_logger(__name__)
 
+# 应用生命周期：启动时打开数据库连接池并预加载维度缓存，关闭时释放
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await open_db_pools()
+    await preload_dimension_cache()
+    yield
+    await close_db_pools()
+
 # 创建FastAPI应用实例，指定Swagger UI路径和Redoc路径
 app = FastAPI(
     title=APP_TITLE,
@@ -24,7 +43,8 @@ app = FastAPI(
     version=APP_VERSION,
     docs_url=APP_DOCS_URL,
     redoc_url=APP_REDOC_URL,
-    openapi_url="/openapi.json"
+    openapi_url="/openapi.json",
+    lifespan=lifespan,
 )
 
 
@@ -36,15 +56,42 @@ app.include_router(users.router)
 app.include_router(standard.router)
 app.include_router(usecase.router)
 app.include_router(uur_graph.router)
+app.include_router(metrics.router)
+
+# 连接池繁忙时返回 503 + Retry-After，即使服务层已将其包装为 500
+@app.exception_handler(StarletteHTTPException)
+async def database_busy_exception_handler(request, exc):
+    return await http_exception_handler(request, find_database_busy(exc) or exc)
+
+# 读多写少的列表接口使用响应缓存，PRD 导入和标准写入时按命名空间失效
+# /uur_graph_query 不经过响应缓存：图快照已按探测间隔刷新并提供 ETag，再缓存会让绕过失效钩子的写入在 TTL 内不可见
+app.add_middleware(
+    ResponseCacheMiddleware,
+    routes={
+        "/ucus/": "usecase",
+        "/get_us_table": "usecase",
+        "/standards": "standards",
+    },
+)
 
 # 添加中间件来记录请求和响应
 @app.middleware("http")
 async def log_requests(request, call_next):
     logger.info(f"Request: {request.method} {request.url}")
+    start = time.perf_counter()
     response = await call_next(request)
-    logger.info(f"Response status code: {response.status_code}")
+    logger.info(f"Response status code: {response.status_code} ({(time.perf_counter() - start) * 1000:.1f} ms)")
     return response
 
+# 汇总每个请求的数据库语句数和耗时，写入 Server-Timing 响应头
+app.add_middleware(QueryTraceMiddleware)
+
+# 按路由记录请求指标（最外层，包含其他中间件和缓存命中的耗时），通过 /metrics 输出
+app.add_middleware(MetricsMiddleware)
+registry.register_cache("user", user_cache.stats)
+registry.register_cache("dimension", dimension_cache.stats)
+registry.register_cache("response", response_cache_stats)
+
 # 自定义 OpenAPI 配置，让 Swagger UI 使用 Bearer Token
 def custom_openapi():
     if app.openapi_schema:
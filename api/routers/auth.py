@@ -32,7 +32,7 @@ async def request_verification_code(phone_number: str, purpose: int):
 @router.post("/register", response_model=UserRegisterResponse)
 async def register_user(user: UserRegisterRequest):
     # 验证手机号验证码
-    stored_code = get_verification_code(user.phone_number, purpose=0)  # 0: 注册用途
+    stored_code = await get_verification_code(user.phone_number, purpose=0)  # 0: 注册用途
     if not stored_code:
         raise HTTPException(
             status_code=400, detail="Verification code expired or not sent"
@@ -71,7 +71,7 @@ async def register_user(user: UserRegisterRequest):
 async def login(form_data: LoginRequestForm):
     # 情况 1：手机号或邮箱加密码登录
     if form_data.username and form_data.password:
-        user = authenticate_user(form_data.username, form_data.password)
+        user = await authenticate_user(form_data.username, form_data.password)
 
         if not user:
             logger.warning("Login failed for user: %s", form_data.username)
@@ -91,7 +91,7 @@ async def login(form_data: LoginRequestForm):
     # 情况 2：手机号加验证码登录
     elif form_data.phone_number and form_data.verification_code:
         # 从数据库获取用户信息，检查手机号是否存在
-        user = get_user_by_phone(form_data.phone_number)
+        user = await get_user_by_phone(form_data.phone_number)
         if not user:
             logger.warning("Login failed for phone: %s", form_data.phone_number)
             raise HTTPException(
@@ -101,7 +101,7 @@ async def login(form_data: LoginRequestForm):
             )
 
         # 获取数据库中存储的验证码
-        stored_code = get_verification_code(
+        stored_code = await get_verification_code(
             form_data.phone_number, purpose=1
         )  # 1: 登录用途
         if not stored_code:
@@ -1,12 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from typing import List, Optional
 from datetime import datetime
 import uuid
 
-from api.schemas.conversation import ConversationCreateRequest, ConversationResponse, ConversationUpdateRequest, PrdResponse
+from api.schemas.conversation import ConversationCreateRequest, ConversationResponse, ConversationPage, ConversationUpdateRequest, PrdResponse
 from api.schemas.user import UserInDB
 from api.services.auth_service import get_current_user
-from api.services.conversation_service import create_conversation_service, get_conversations_service, update_conversation_service, get_prd_service
+from api.services.conversation_service import (
+    create_conversation_service, get_conversations_service, update_conversation_service, get_prd_service,
+    get_conversations_page_service, stream_conversations_service
+)
 from api.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -59,6 +64,54 @@ async def get_conversations(
         logger.error(f"Error querying conversations: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+# 分页查询对话接口：按时间从新到旧返回，next_cursor 用于获取更早的对话
+@router.get("/sessions/{session_id}/page", response_model=ConversationPage)
+async def get_conversations_page(
+    session_id: int,
+    user_id: int,
+    conversation_id: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    include_heavy: bool = True,  # 为 False 时不返回 prd_content 和 preview_code
+    current_user: UserInDB = Depends(get_current_user)
+):
+    logger.info("User %s is paging conversations for session_id: %s", user_id, session_id)
+
+    # 验证请求中的 user_id 是否与当前登录的用户一致
+    if current_user.user_id != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User ID does not match the authenticated user's ID"
+        )
+
+    # 调用服务层分页获取对话
+    return await get_conversations_page_service(session_id, user_id, conversation_id, limit, cursor, include_heavy)
+
+# 流式查询对话接口：按时间顺序逐行返回 NDJSON
+@router.get("/sessions/{session_id}/stream")
+async def stream_conversations(
+    session_id: int,
+    user_id: int,
+    conversation_id: Optional[str] = None,
+    include_heavy: bool = True,  # 为 False 时不返回 prd_content 和 preview_code
+    current_user: UserInDB = Depends(get_current_user)
+):
+    logger.info("User %s is streaming conversations for session_id: %s", user_id, session_id)
+
+    # 验证请求中的 user_id 是否与当前登录的用户一致
+    if current_user.user_id != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User ID does not match the authenticated user's ID"
+        )
+
+    # 开始输出前先校验 session 归属并读取首批数据，session 不存在时返回空流
+    stream = await stream_conversations_service(session_id, user_id, conversation_id, include_heavy)
+    if stream is None:
+        return StreamingResponse(iter(()), media_type="application/x-ndjson")
+
+    return StreamingResponse(stream, media_type="application/x-ndjson", background=BackgroundTask(stream.aclose))
+
 # 更新会话内容接口
 @router.put("/{conversation_id}")
 async def update_conversation(
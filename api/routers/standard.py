@@ -1,34 +1,72 @@
-from fastapi import APIRouter, Query, HTTPException
-from typing import List
-from api.schemas.standard import Standard, StandardResponse
-from api.services.standard_service import is_standard_id_exists, insert_standard_data, get_standards_from_db
+from fastapi import APIRouter, Query, HTTPException, Response
+from typing import List, Literal, Optional
+from api.schemas.standard import Standard, StandardResponse, StandardSearchResponse, Term
+from api.services.standard_service import insert_standard_data, get_standards_from_db, get_standard_terms_from_db, search_standards_service
 
 router = APIRouter()
 
 @router.post("/store-standard/")
 async def store_standard(standard: Standard):
-    # 验证时移除输入 standard_id 的空格
-    sanitized_standard_id = standard.standardID.replace(" ", "")
-
-    # 检查 standard_id 是否已存在
-    if is_standard_id_exists(sanitized_standard_id):
-        # 如果存在，返回 200 状态码和提示信息
-        return {"message": "Standard already exists"}
-
-    # 插入数据（存储时保留原始 standard_id）
+    # 插入数据（存储时保留原始 standard_id），去除空格后相同的 standard_id 已存在时不插入
     try:
-        insert_standard_data(standard)
-        return {"message": "Standard data stored successfully"}
+        inserted = await insert_standard_data(standard)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/standards", response_model=List[StandardResponse])
-async def get_standards(terms: int = Query(..., ge=0, le=1, description="Set 0 for standards only, 1 for standards with terms")):
+    if not inserted:
+        # 如果存在，返回 200 状态码和提示信息
+        return {"message": "Standard already exists"}
+    return {"message": "Standard data stored successfully"}
+
+# 获取标准列表
+# 传入 limit 时按 id 分页，下一页游标通过 X-Next-Cursor 响应头返回；fields 为逗号分隔的字段名，只返回这些字段
+@router.get("/standards", response_model=List[StandardResponse], response_model_exclude_unset=True)
+async def get_standards(
+    response: Response,
+    terms: int = Query(..., ge=0, le=1, description="Set 0 for standards only, 1 for standards with terms"),
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size; omit to return all standards"),
+    cursor: Optional[str] = Query(None, description="Value of X-Next-Cursor from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields, e.g. standardID,documentName,terms"),
+):
     # Check if terms is either 0 or 1, otherwise raise HTTPException
     if terms not in [0, 1]:
         raise HTTPException(
             status_code=422,
             detail="Invalid value for 'terms'. It must be either 0 or 1."
         )
-    standards = get_standards_from_db(terms)
+
+    selected_fields = None
+    if fields:
+        selected_fields = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = set(selected_fields) - set(StandardResponse.model_fields)
+        if unknown:
+            raise HTTPException(status_code=422, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+
+    standards, next_cursor = await get_standards_from_db(terms, selected_fields, limit, cursor)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return standards
+
+# 分页获取某个标准的术语，下一页游标通过 X-Next-Cursor 响应头返回
+@router.get("/standards/{standard_pk}/terms", response_model=List[Term])
+async def get_standard_terms(
+    standard_pk: int,
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+):
+    terms, next_cursor = await get_standard_terms_from_db(standard_pk, limit, cursor)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return terms
+
+# 搜索标准和术语（按中英文名称、定义、文档名称），结果按相关度排序并分页
+@router.get("/standards/search", response_model=StandardSearchResponse)
+async def search_standards(
+    q: str = Query(..., min_length=1, max_length=200, description="Search keywords"),
+    scope: Literal["all", "terms", "standards"] = "all",
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    fuzzy: bool = Query(False, description="Also match term names by trigram similarity"),
+):
+    return await search_standards_service(q, scope, limit, offset, fuzzy)
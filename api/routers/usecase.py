@@ -1,24 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
-from api.schemas.usecase import UseCase, PRDData
-from api.services.usecase_service import get_all_ucus, get_details, get_us_table_service, process_prd_data_service
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from typing import List, Literal, Optional
+from api.config import PRD_IMPORT_MAX_BODY_BYTES
+from api.schemas.usecase import UseCase, PRDData, PRDBulkImportResponse, DetailsBatchRequest, DetailsBatchResponse
+from api.services.usecase_service import get_all_ucus, get_details, get_details_batch, get_us_table_service, process_prd_data_service, process_prd_bulk_service
 
 router = APIRouter()
 
 @router.get("/ucus/", response_model=List[UseCase])
 async def get_all_ucus_endpoint():
-    return get_all_ucus()
+    return await get_all_ucus()
 
 @router.get("/get_details", response_model=dict)
 async def get_details_endpoint(id: str, uuid: str):
     return await get_details(id, uuid)
 
+# 批量获取节点详情，一次请求返回图视图中所有节点的详情
+@router.post("/get_details/batch", response_model=DetailsBatchResponse)
+async def get_details_batch_endpoint(request: DetailsBatchRequest):
+    return await get_details_batch(request.items)
+
+# 获取用户故事列表，支持过滤和排序
+# 传入 limit 时按排序键做 keyset 分页，下一页游标通过 X-Next-Cursor 响应头返回
 @router.get("/get_us_table", response_model=list)
-async def get_us_table_endpoint(conn=Depends(get_us_table_service)):
-    try:
-        return conn
-    except Exception as e:
-        raise HTTPException(status_code=500, detail="Internal Server Error")
+async def get_us_table_endpoint(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size; omit to return all user stories"),
+    cursor: Optional[str] = Query(None, description="Value of X-Next-Cursor from the previous page"),
+    status: Optional[str] = Query(None, description="Exact status name"),
+    user_journey: Optional[str] = Query(None, description="Exact user journey name"),
+    valid_vehicle: Optional[str] = Query(None, description="Vehicle contained in the user story's valid vehicles"),
+    q: Optional[str] = Query(None, max_length=200, description="Substring match on the description"),
+    sort: Literal["us_id", "status", "user_journey", "valid_vehicle"] = "us_id",
+    order: Literal["asc", "desc"] = "asc",
+):
+    userstories, next_cursor = await get_us_table_service(limit, cursor, status, user_journey, valid_vehicle, q, sort, order)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return userstories
 
 @router.post("/achieve_data")
 async def achieve_data_endpoint(data: PRDData):
@@ -26,3 +44,27 @@ async def achieve_data_endpoint(data: PRDData):
         return await process_prd_data_service(data)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+# 批量导入 PRD：请求体为 PRD 文档的 JSON 数组，或 Content-Type 为 application/x-ndjson 时每行一个文档
+# 读取请求体，超过 max_bytes 时返回 413；先检查 Content-Length，再在读取过程中按实际长度检查
+async def _read_body(request: Request, max_bytes: int) -> bytes:
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        raise HTTPException(status_code=413, detail=f"Request body exceeds {max_bytes} bytes")
+    body = bytearray()
+    async for chunk in request.stream():
+        body.extend(chunk)
+        if len(body) > max_bytes:
+            raise HTTPException(status_code=413, detail=f"Request body exceeds {max_bytes} bytes")
+    return bytes(body)
+
+@router.post("/achieve_data/bulk", response_model=PRDBulkImportResponse)
+async def achieve_data_bulk_endpoint(request: Request, atomic: bool = False):
+    try:
+        body = await _read_body(request, PRD_IMPORT_MAX_BODY_BYTES)
+        ndjson = "ndjson" in request.headers.get("content-type", "")
+        return await process_prd_bulk_service(body, ndjson, atomic)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
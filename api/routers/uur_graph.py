@@ -1,21 +1,68 @@
-from fastapi import APIRouter, Query, HTTPException
-from typing import List
-from api.services.uur_graph import fetch_graph_data, fetch_user_story_table
+from fastapi import APIRouter, Query, HTTPException, Request, Response
+from typing import List, Literal, Optional
+from api.schemas.uur_graph import SubgraphRequest
+from api.services.uur_graph import fetch_graph_view, fetch_graph_neighborhood, fetch_subgraph
+from api.services.usecase_service import get_us_table_service
 
 router = APIRouter()
 
 @router.get("/uur_graph_query", response_model=dict)
-async def uur_graph_query(type: List[str] = Query(None, enum=["usecase", "userstory", "requirement"])):
+async def uur_graph_query(request: Request, type: List[str] = Query(None, enum=["usecase", "userstory", "requirement"])):
     try:
-        return fetch_graph_data(type)
+        etag, body = await fetch_graph_view(type)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/get_us_table", response_model=list)
-async def get_us_table():
+    # 客户端缓存的版本仍然有效时返回 304
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+# 判断 If-None-Match 中是否包含当前 ETag（忽略弱校验前缀）
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in [tag[2:] if tag.startswith("W/") else tag for tag in candidates]
+
+# 查询某个节点 depth 跳以内的邻域
+@router.get("/uur_graph_neighborhood", response_model=dict)
+async def uur_graph_neighborhood(
+    uuid: str,
+    depth: int = Query(1, ge=0, le=10),
+    type: List[str] = Query(None, enum=["usecase", "userstory", "requirement"])
+):
+    try:
+        return await fetch_graph_neighborhood(uuid, depth, type)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# 查询从一组根节点出发可达的子图
+@router.post("/uur_graph_subgraph", response_model=dict)
+async def uur_graph_subgraph(request: SubgraphRequest):
     try:
-        return fetch_user_story_table()
+        return await fetch_subgraph(request.roots, request.depth, request.type)
     except HTTPException as e:
         raise e
     except Exception as e:
-        raise HTTPException(status_code=500, detail="Internal Server Error")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+# 与 usecase 路由的 /get_us_table 使用同一个用户故事列表服务
+@router.get("/get_us_table", response_model=list)
+async def get_us_table(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size; omit to return all user stories"),
+    cursor: Optional[str] = Query(None, description="Value of X-Next-Cursor from the previous page"),
+    status: Optional[str] = Query(None, description="Exact status name"),
+    user_journey: Optional[str] = Query(None, description="Exact user journey name"),
+    valid_vehicle: Optional[str] = Query(None, description="Vehicle contained in the user story's valid vehicles"),
+    q: Optional[str] = Query(None, max_length=200, description="Substring match on the description"),
+    sort: Literal["us_id", "status", "user_journey", "valid_vehicle"] = "us_id",
+    order: Literal["asc", "desc"] = "asc",
+):
+    userstories, next_cursor = await get_us_table_service(limit, cursor, status, user_journey, valid_vehicle, q, sort, order)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return userstories
\ No newline at end of file
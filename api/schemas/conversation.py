@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import List, Optional, Dict, Any
 from datetime import datetime
 import uuid
 
@@ -41,6 +41,11 @@ class ConversationResponse(BaseModel):
     latest: Optional[int]  # PRD是否为最新版本
     restore_version: Optional[int]  # 恢复的版本号
 
+# 分页对话响应模型
+class ConversationPage(BaseModel):
+    items: List[ConversationResponse]  # 按时间从新到旧排列
+    next_cursor: Optional[str] = None  # 下一页游标，为空表示没有更多数据
+
 class ConversationUpdateRequest(BaseModel):
     user_id: int  # 用户 ID，用于验证当前登录用户
     session_id: int  # 会话 ID，用于验证该会话是否存在
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 class Note(BaseModel):
     ID: int
@@ -20,8 +20,26 @@ class Standard(BaseModel):
     terms: List[Term]
 
 class StandardResponse(BaseModel):
+    id: Optional[int] = None  # 标准主键，用于 /standards/{id}/terms
     standardID: str
-    documentName: str
+    documentName: Optional[str] = None
     documentNameEnglish: Optional[str] = None
     scope: Optional[str] = None  
     terms: Optional[List[Term]] = None
+
+# 标准 / 术语搜索结果
+class StandardSearchHit(BaseModel):
+    kind: str  # term: 命中术语；standard: 命中标准本身
+    standardID: str
+    documentName: Optional[str] = None
+    documentNameEnglish: Optional[str] = None
+    termID: Optional[int] = None
+    term: Optional[str] = None
+    termEnglish: Optional[str] = None
+    definition: Optional[str] = None
+    rank: float
+    highlights: Dict[str, str] = {}  # 字段 -> 以 <mark></mark> 标记匹配内容的片段（内容已做 HTML 转义）
+
+class StandardSearchResponse(BaseModel):
+    total: int
+    items: List[StandardSearchHit]
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List, Dict
+from pydantic import BaseModel, Field
+from typing import Any, List, Dict, Optional, Tuple
 
 class UserStory(BaseModel):
     id: str
@@ -13,3 +13,50 @@ class UseCase(BaseModel):
 
 class PRDData(BaseModel):
     chapters: List[Dict]
+
+# 从 PRD 文档中提取出的待写入记录
+class PRDRecords(BaseModel):
+    user_journey: str
+    status: str
+    appendix: str
+    usecase: Dict[str, Any]  # usecase 表的列 -> 值
+    regulations: List[Tuple[str, str]]  # (standard_id, document_name)
+    userstory: Dict[str, Any]  # userstory 表的列 -> 值
+    stakeholder_interests: List[Tuple[str, str]]  # (stakeholder, interest)
+    requirements: List[Dict[str, Any]]  # requirement 表的列 -> 值
+
+# 批量导入中单个文档的结果
+class PRDImportResult(BaseModel):
+    index: int  # 文档在请求中的位置（从 0 开始）
+    status: str  # ok / error / rolled_back
+    uc_id: Optional[int] = None
+    us_id: Optional[int] = None
+    error: Optional[str] = None
+
+# 批量导入响应
+class PRDBulkImportResponse(BaseModel):
+    total: int
+    succeeded: int
+    failed: int
+    results: List[PRDImportResult]
+
+# 节点详情批量查询中的单个节点
+class DetailKey(BaseModel):
+    id: str  # UC- / US- / REQ- 开头的编号，前缀决定节点类型
+    uuid: str
+
+# 节点详情批量查询请求
+class DetailsBatchRequest(BaseModel):
+    items: List[DetailKey] = Field(..., max_length=1000)
+
+# 单个节点的详情查询结果
+class DetailResult(BaseModel):
+    id: str
+    uuid: str
+    status: str  # ok / not_found / error
+    detail: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+# 节点详情批量查询响应，顺序与请求一致
+class DetailsBatchResponse(BaseModel):
+    items: List[DetailResult]
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
 
 class Node(BaseModel):
     id: str
@@ -16,3 +16,9 @@ class Edge(BaseModel):
     target: str
     type: str
     label: str
+
+# 子图查询请求
+class SubgraphRequest(BaseModel):
+    roots: List[str] = Field(..., min_length=1)  # 根节点 uuid
+    depth: Optional[int] = Field(None, ge=0)  # 最大跳数，为空时返回全部可达节点
+    type: Optional[List[Literal["usecase", "userstory", "requirement"]]] = None  # 参与遍历的节点类型
@@ -6,9 +6,10 @@ from typing import Optional
 
 from api.schemas.user import UserInDB
 from api.schemas.auth import TokenData, UserRegisterRequest
-from api.utils.security import verify_password, get_password_hash
+from api.utils.security import verify_password_async, get_password_hash_async
 from api.utils.db import get_db_connection
-from api.config import JWT_SECRET_KEY, JWT_ALGORITHM
+from api.utils.cache import TTLCache
+from api.config import JWT_SECRET_KEY, JWT_ALGORITHM, USER_CACHE_TTL_SECONDS, USER_CACHE_MAX_SIZE
 from api.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -17,26 +18,34 @@ logger = get_logger(__name__)
 # 创建OAuth2密码验证流，指定登录端点
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
+# 已认证用户缓存：以 token 的 subject（email）为键，热点用户的鉴权无需再查询数据库
+user_cache = TTLCache(maxsize=USER_CACHE_MAX_SIZE, ttl=USER_CACHE_TTL_SECONDS)
+
+# 用户信息变更后使缓存失效，可按 email 或 user_id 指定
+def invalidate_cached_user(email: Optional[str] = None, user_id: Optional[int] = None):
+    if email is not None:
+        user_cache.pop(email)
+    if user_id is not None:
+        user_cache.pop_where(lambda _, user: user.user_id == user_id)
+
 # 从数据库中获取用户信息
-def get_user_from_db(identifier: str, is_email: bool = True):
-    conn = None
+async def get_user_from_db(identifier: str, is_email: bool = True):
     try:
-        conn = get_db_connection()
-        with conn.cursor() as cur:
+        async with get_db_connection() as conn, conn.cursor() as cur:
             if is_email:
                 # 使用邮箱查询用户
-                cur.execute(
+                await cur.execute(
                     "SELECT user_id, user_name, email, password, phone_number FROM users WHERE email = %s",
                     (identifier,),
                 )
             else:
                 # 使用手机号查询用户
-                cur.execute(
+                await cur.execute(
                     "SELECT user_id, user_name, email, password, phone_number FROM users WHERE phone_number = %s",
                     (identifier,),
                 )
 
-            result = cur.fetchone()
+            result = await cur.fetchone()
 
             if result:
                 # 创建并返回用户对象
@@ -49,37 +58,37 @@ def get_user_from_db(identifier: str, is_email: bool = True):
                 )
 
             return None
+    except HTTPException:
+        # 连接池繁忙（503）等错误原样抛出，不能当作用户不存在（否则鉴权会返回 401，客户端会被登出）
+        raise
     except Exception as e:
         logger.error(f"Error fetching user from database: {e}")
-        return None
-    finally:
-        if conn:
-            conn.close()
+        raise HTTPException(status_code=500, detail="Internal server error") from e
 
 # 根据手机号获取用户
-def get_user_by_phone(phone_number: str):
-    return get_user_from_db(phone_number, is_email=False)
+async def get_user_by_phone(phone_number: str):
+    return await get_user_from_db(phone_number, is_email=False)
 
 # 验证用户并返回用户数据
-def authenticate_user(username: str, password: str):
+async def authenticate_user(username: str, password: str):
     # 判断输入的是邮箱还是手机号
     if "@" in username:
         # 如果包含 @，认为是邮箱
-        user = get_user_from_db(username, is_email=True)
+        user = await get_user_from_db(username, is_email=True)
     else:
         # 否则，认为是手机号
-        user = get_user_from_db(username, is_email=False)
+        user = await get_user_from_db(username, is_email=False)
 
     if not user:
         return False
 
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password_async(password, user.hashed_password):
         return False
 
     return user
 
 # 定义一个函数，用于解码 JWT 并获取当前用户信息
-def get_current_user(token: str = Depends(oauth2_scheme)):
+async def get_current_user(token: str = Depends(oauth2_scheme)):
     # 定义 JWT 验证失败时的异常
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -97,10 +106,15 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
     except JWTError:
         raise credentials_exception
 
-    # 从数据库中获取用户信息
-    user = get_user_from_db(identifier=token_data.email, is_email=True)
+    # 优先从缓存获取用户信息，未命中时查询数据库
+    user = user_cache.get(token_data.email)
     if user is None:
-        raise credentials_exception
+        # 查询期间用户信息被修改并失效缓存时，不写回查询到的旧数据
+        generation = user_cache.generation
+        user = await get_user_from_db(identifier=token_data.email, is_email=True)
+        if user is None:
+            raise credentials_exception
+        user_cache.set(token_data.email, user, generation)
 
     return user  # 返回当前用户信息
 
@@ -116,68 +130,65 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 
 # 用户注册服务
 async def register_user_service(user: UserRegisterRequest):
-    conn = None
-
-    # 连接到数据库
-    conn = get_db_connection()
-
     try:
-        # 检查手机号是否已存在
-        with conn.cursor() as cur:
-            cur.execute(
-                "SELECT user_id FROM users WHERE phone_number = %s",
-                (user.phone_number,),
-            )
-            if cur.fetchone():
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Phone number already registered",
+        # 连接到数据库
+        async with get_db_connection() as conn:
+            # 检查手机号是否已存在
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    "SELECT user_id FROM users WHERE phone_number = %s",
+                    (user.phone_number,),
                 )
-
-        # 检查邮箱是否已存在
-        with conn.cursor() as cur:
-            cur.execute("SELECT user_id FROM users WHERE email = %s", (user.email,))
-            if cur.fetchone():
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Email already registered",
+                if await cur.fetchone():
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="Phone number already registered",
+                    )
+
+            # 检查邮箱是否已存在
+            async with conn.cursor() as cur:
+                await cur.execute("SELECT user_id FROM users WHERE email = %s", (user.email,))
+                if await cur.fetchone():
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="Email already registered",
+                    )
+
+            # 检查用户名是否已存在
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    "SELECT user_id FROM users WHERE user_name = %s", (user.username,)
                 )
-
-        # 检查用户名是否已存在
-        with conn.cursor() as cur:
-            cur.execute(
-                "SELECT user_id FROM users WHERE user_name = %s", (user.username,)
-            )
-            if cur.fetchone():
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Username already registered",
+                if await cur.fetchone():
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="Username already registered",
+                    )
+
+            # 哈希用户密码（在线程池中执行）
+            hashed_password = await get_password_hash_async(user.password)
+
+            # 创建新用户并插入数据库
+            async with conn.cursor() as cur:
+                insert_query = """
+                INSERT INTO users (user_name, email, password, phone_number)
+                VALUES (%s, %s, %s, %s)
+                RETURNING user_id, user_name, email, phone_number
+                """
+                await cur.execute(
+                    insert_query,
+                    (user.username, user.email, hashed_password, user.phone_number),
                 )
+                new_user = await cur.fetchone()
+                await conn.commit()
 
-        # 哈希用户密码
-        hashed_password = get_password_hash(user.password)
-
-        # 创建新用户并插入数据库
-        with conn.cursor() as cur:
-            insert_query = """
-            INSERT INTO users (user_name, email, password, phone_number)
-            VALUES (%s, %s, %s, %s)
-            RETURNING user_id, user_name, email, phone_number
-            """
-            cur.execute(
-                insert_query,
-                (user.username, user.email, hashed_password, user.phone_number),
-            )
-            new_user = cur.fetchone()
-            conn.commit()
-
-        # 返回新用户信息
-        return {
-            "user_id": new_user[0],
-            "username": new_user[1],
-            "email": new_user[2],
-            "phone_number": new_user[3],
-        }
+            # 返回新用户信息
+            return {
+                "user_id": new_user[0],
+                "username": new_user[1],
+                "email": new_user[2],
+                "phone_number": new_user[3],
+            }
 
     except HTTPException as e:
         # 捕获已定义的 HTTPException 并返回具体错误
@@ -186,7 +197,3 @@ async def register_user_service(user: UserRegisterRequest):
     except Exception as e:
         logger.error(f"Error during user registration: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
-
-    finally:
-        if conn:
-            conn.close()
\ No newline at end of file
@@ -1,197 +1,428 @@
 from fastapi import HTTPException, status
-from typing import List, Optional, Dict, Any
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple
+from contextlib import AsyncExitStack
 from datetime import datetime
 import uuid
 import json
 
+from api.config import PRD_STORAGE_MODE, PRD_SNAPSHOT_INTERVAL
 from api.utils.db import get_db_connection
-from api.schemas.conversation import ConversationCreateRequest, ConversationResponse, PrdResponse, ConversationUpdateRequest
+from api.utils.pagination import encode_cursor, decode_cursor
+from api.utils.prd_codec import (
+    ENCODING_PLAIN, ENCODING_ZLIB, ENCODING_DELTA,
+    compress_snapshot, encode_delta, apply_delta, decode_snapshot, decode_prd
+)
+from api.schemas.conversation import ConversationCreateRequest, ConversationResponse, ConversationPage, PrdResponse, ConversationUpdateRequest
 from api.schemas.user import UserInDB
 from api.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# 对话链路查询（基于 conversations.lineage / lineage_versions 物化路径）：
+# 1. 传入 conversation_id 时，在其所有后代中取 lineage_versions 最大的一行作为叶子节点，
+#    等价于沿 version 最大的子对话逐层向下；未传入时，以该 session 下最新创建的对话作为叶子节点
+# 2. 叶子节点的 lineage 即链路上的全部祖先，一次索引读取即可取回
+# 3. 同时联结父级的 conversation_child_version 和每个对话最新的 prd 记录（delta 编码时带上其快照记录）
+_CONVERSATION_LEAF_CTE = """
+    WITH start_node AS (
+        SELECT COALESCE(
+            %(conversation_id)s::uuid,
+            (SELECT conversation_id
+             FROM conversations
+             WHERE session_id = %(session_id)s
+             ORDER BY created_at DESC
+             LIMIT 1)
+        ) AS conversation_id
+    ),
+    leaf AS (
+        SELECT c.lineage
+        FROM conversations c
+        WHERE c.conversation_id = (
+            SELECT COALESCE(
+                (SELECT d.conversation_id
+                 FROM conversations d
+                 WHERE %(conversation_id)s::uuid IS NOT NULL
+                   AND d.lineage @> ARRAY[start_node.conversation_id]
+                 ORDER BY d.lineage_versions DESC
+                 LIMIT 1),
+                start_node.conversation_id)
+            FROM start_node
+        )
+    )
+"""
+
+
+# 构建对话链路查询
+# include_heavy=False 时 prd_content 和 preview_code 以 NULL 返回，减少传输量
+# paginated=True 时按 (created_at, conversation_id) 倒序做 keyset 分页，需要 cursor_created_at / cursor_id / limit 参数
+def build_conversation_chain_query(include_heavy: bool = True, paginated: bool = False) -> str:
+    preview_code = "chain.preview_code" if include_heavy else "NULL"
+    if include_heavy:
+        prd_columns = """latest_prd.prd_content, latest_prd.prd_version, latest_prd.latest, latest_prd.restore_version,
+           latest_prd.prd_encoding, latest_prd.prd_blob, latest_prd.base_encoding, latest_prd.base_content, latest_prd.base_blob"""
+    else:
+        prd_columns = """NULL, latest_prd.prd_version, latest_prd.latest, latest_prd.restore_version,
+           NULL, NULL, NULL, NULL, NULL"""
+    if paginated:
+        keyset = """
+        WHERE %(cursor_created_at)s::timestamp IS NULL
+           OR (chain.created_at, chain.conversation_id) < (%(cursor_created_at)s::timestamp, %(cursor_id)s::uuid)
+        ORDER BY chain.created_at DESC, chain.conversation_id DESC
+        LIMIT %(limit)s
+        """
+    else:
+        keyset = "ORDER BY chain.created_at"
+    return _CONVERSATION_LEAF_CTE + f"""
+    SELECT chain.conversation_id, chain.session_id, chain.created_at, chain.conversation_type, chain.content,
+           chain.version, chain.conversation_parent_id, parent.conversation_child_version, chain.knowledge_graph,
+           chain.dify_func_des, chain.knowledge_id, chain.dify_id, {preview_code},
+           {prd_columns}
+    FROM leaf
+    JOIN conversations chain ON chain.conversation_id = ANY(leaf.lineage)
+    LEFT JOIN conversations parent ON parent.conversation_id = chain.conversation_parent_id
+    LEFT JOIN LATERAL (
+        SELECT p.prd_content, p.prd_version, p.latest, p.restore_version, p.prd_encoding, p.prd_blob,
+               base.prd_encoding AS base_encoding, base.prd_content AS base_content, base.prd_blob AS base_blob
+        FROM prd p
+        LEFT JOIN prd base ON base.prd_id = p.base_prd_id
+        WHERE p.session_id = %(session_id)s AND p.conversation_id = chain.conversation_id
+        ORDER BY p.prd_version DESC
+        LIMIT 1
+    ) latest_prd ON TRUE
+    {keyset}
+    """
+
+
+CONVERSATION_CHAIN_QUERY = build_conversation_chain_query()
+
+
+# 解析父级的 conversation_child_version，兼容字符串和字典两种存储形式
+def _parse_child_version(child_version, parent_id) -> Optional[dict]:
+    if not child_version:
+        return None
+    if isinstance(child_version, dict):
+        return child_version
+    if isinstance(child_version, str):
+        try:
+            return json.loads(child_version)
+        except json.JSONDecodeError:
+            logger.warning("Failed to decode JSON for parent_id %s", parent_id)
+    return None
+
+
+# 将对话链路查询的一行转换为响应模型
+def _row_to_conversation(row) -> ConversationResponse:
+    return ConversationResponse(
+        conversation_id=str(row[0]),  # 转换 UUID 为字符串
+        session_id=row[1],
+        created_at=row[2],
+        conversation_type=row[3],
+        content=row[4],
+        version=row[5],
+        conversation_parent_id=row[6],
+        conversation_para_version=_parse_child_version(row[7], row[6]),  # 父级的 conversation_child_version
+        knowledge_graph=row[8],
+        dify_func_des=row[9],
+        knowledge_id=row[10],
+        dify_id=row[11],
+        preview_code=row[12],
+        prd_content=decode_prd(row[17], row[13], row[18], row[19], row[20], row[21]),  # 还原 PRD 全文
+        prd_version=row[14],  # 添加prd_version
+        latest=row[15],  # 返回最新的标记
+        restore_version=row[16],  # 返回恢复版本号
+    )
+
+
+# 分页游标：编码最后一条记录的 (created_at, conversation_id)
+def encode_conversation_cursor(conversation: ConversationResponse) -> str:
+    return encode_cursor(conversation.created_at.isoformat(), conversation.conversation_id)
+
+
+def decode_conversation_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    created_at, conversation_id = decode_cursor(cursor, 2)
+    try:
+        return datetime.fromisoformat(created_at), uuid.UUID(conversation_id)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+# 校验 session 归属：session 不存在返回 False，不属于该用户时抛出 403
+async def _check_session_owner(cur, session_id: int, user_id: int) -> bool:
+    logger.info("Checking session_id %s for user_id %s", session_id, user_id)
+    await cur.execute("SELECT user_id FROM sessions WHERE session_id = %s", (session_id,))
+    result = await cur.fetchone()
+
+    # 如果查询不到 session_id，返回空
+    if not result:
+        logger.warning("Session ID %s not found", session_id)
+        return False
+    session_user_id = result[0]  # 获取查询到的 user_id
+
+    # 比对 session_id 对应的 user_id 和 请求的 user_id 是否一致
+    if session_user_id != user_id:
+        logger.warning("Session user_id %s does not match request user_id %s", session_user_id, user_id)
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You do not have permission to access this session."
+        )
+    return True
+
+
+# 按 PRD_STORAGE_MODE 计算新 PRD 版本的存储形式，返回 (prd_encoding, prd_content, prd_blob, base_prd_id)
+# delta 模式下以该 session 最近的快照为基准记录差异，快照已被 PRD_SNAPSHOT_INTERVAL - 1 个版本引用、
+# 或差异不比压缩全文小（大幅改写）时改为写入新的快照
+async def _encode_new_prd(cur, session_id: int, prd_content: str):
+    if PRD_STORAGE_MODE != "delta":
+        return ENCODING_PLAIN, prd_content, None, None
+
+    await cur.execute(
+        """
+        SELECT s.prd_id, s.prd_encoding, s.prd_content, s.prd_blob,
+               (SELECT COUNT(*) FROM prd d WHERE d.base_prd_id = s.prd_id)
+        FROM prd s
+        WHERE s.session_id = %s AND s.prd_encoding <> %s
+        ORDER BY s.prd_version DESC
+        LIMIT 1
+        """,
+        (session_id, ENCODING_DELTA),
+    )
+    snapshot = await cur.fetchone()
+    compressed = compress_snapshot(prd_content)
+
+    if snapshot and snapshot[4] < PRD_SNAPSHOT_INTERVAL - 1:
+        base_text = decode_snapshot(snapshot[1], snapshot[2], snapshot[3])
+        if base_text is not None:
+            delta = encode_delta(base_text, prd_content)
+            if len(delta) < len(compressed):
+                return ENCODING_DELTA, None, delta, snapshot[0]
+
+    return ENCODING_ZLIB, None, compressed, None
+
+# 重写某个对话的 PRD 内容
+# 以这些记录为快照的 delta 记录先按旧内容还原，更新后再基于新内容重新计算差异
+async def _rewrite_prd_content(cur, conversation_id: str, prd_content: str):
+    await cur.execute(
+        """
+        SELECT d.prd_id, d.prd_blob, s.prd_encoding, s.prd_content, s.prd_blob
+        FROM prd s
+        JOIN prd d ON d.base_prd_id = s.prd_id
+        WHERE s.conversation_id = %s AND d.conversation_id <> s.conversation_id
+        FOR UPDATE OF d
+        """,
+        (conversation_id,),
+    )
+    dependents = [
+        (prd_id, apply_delta(decode_snapshot(encoding, content, base_blob), blob))
+        for prd_id, blob, encoding, content, base_blob in await cur.fetchall()
+    ]
+
+    # 被更新的记录本身都改写为快照
+    if PRD_STORAGE_MODE == "delta":
+        encoding, content, blob = ENCODING_ZLIB, None, compress_snapshot(prd_content)
+    else:
+        encoding, content, blob = ENCODING_PLAIN, prd_content, None
+    await cur.execute(
+        """
+        UPDATE prd
+        SET prd_encoding = %s, prd_content = %s, prd_blob = %s, base_prd_id = NULL
+        WHERE conversation_id = %s
+        """,
+        (encoding, content, blob, conversation_id),
+    )
+
+    if dependents:
+        await cur.executemany(
+            "UPDATE prd SET prd_blob = %s WHERE prd_id = %s",
+            [(encode_delta(prd_content, text), prd_id) for prd_id, text in dependents],
+        )
+
 
 # 创建对话服务
 async def create_conversation_service(request: ConversationCreateRequest, current_user: UserInDB) -> ConversationResponse:
-    conn = None
     created_at = datetime.now()  # 获取当前时间
     try:
-        # 获取数据库连接
-        conn = get_db_connection()
-        cur = conn.cursor()  # 创建一个游标
-
-        # 处理可选字段的默认值
-        conversation_id = str(request.conversation_id or uuid.uuid4())  # 转换 UUID 为字符串
-        conversation_child_version = None
-        version = 1  # 默认版本号为 1，如果没有父对话
-
-        # 如果有父对话 ID，则更新父级的 conversation_child_version 字段
-        if request.conversation_parent_id:
-            # 查询父级对话的当前 conversation_child_version
-            cur.execute(
-                "SELECT conversation_child_version FROM conversations WHERE conversation_id = %s",
-                (str(request.conversation_parent_id),),  # 转换 UUID 为字符串
+        # 获取数据库连接，整个创建流程在同一个事务中完成，只提交一次
+        async with get_db_connection() as conn, conn.cursor() as cur:
+            # 处理可选字段的默认值
+            conversation_id = str(request.conversation_id or uuid.uuid4())  # 转换 UUID 为字符串
+            conversation_child_version = None
+            version = 1  # 默认版本号为 1，如果没有父对话
+            parent_lineage, parent_lineage_versions = [], []  # 父级的物化路径，根对话为空
+
+            # 更新 sessions 表的 end_time 字段
+            # 同时锁定该 session 行，使同一 session 下的并发创建串行执行，prd_version 不会重复
+            await cur.execute(
+                "UPDATE sessions SET end_time = %s WHERE session_id = %s",
+                (created_at, request.session_id),
             )
-            parent_record = cur.fetchone()
-            logger.info("Fetched parent_record: %s", parent_record)
-
-            if parent_record:
-                existing_child_version = parent_record[0]
-                logger.info(
-                    "Existing child version type: %s, value: %s",
-                    type(existing_child_version),
-                    existing_child_version,
+
+            # 如果有父对话 ID，则更新父级的 conversation_child_version 字段
+            if request.conversation_parent_id:
+                # 查询并锁定父级对话，避免并发重新生成时计算出相同的子版本号
+                await cur.execute(
+                    """
+                    SELECT conversation_child_version, lineage, lineage_versions
+                    FROM conversations
+                    WHERE conversation_id = %s
+                    FOR UPDATE
+                    """,
+                    (str(request.conversation_parent_id),),  # 转换 UUID 为字符串
                 )
+                parent_record = await cur.fetchone()
+                logger.info("Fetched parent_record: %s", parent_record)
+
+                if parent_record:
+                    existing_child_version = parent_record[0]
+                    parent_lineage = parent_record[1] or []
+                    parent_lineage_versions = parent_record[2] or []
+                    logger.info(
+                        "Existing child version type: %s, value: %s",
+                        type(existing_child_version),
+                        existing_child_version,
+                    )
 
-                if existing_child_version:
-                    # 如果已经是字符串形式的 JSON，先进行解析
-                    if isinstance(existing_child_version, str):
-                        child_versions = json.loads(existing_child_version)
+                    if existing_child_version:
+                        # 如果已经是字符串形式的 JSON，先进行解析
+                        if isinstance(existing_child_version, str):
+                            child_versions = json.loads(existing_child_version)
+                        else:
+                            child_versions = existing_child_version
                     else:
-                        child_versions = existing_child_version
-                else:
-                    child_versions = {}
-
-                # 自动生成版本号：找到最高版本号并加一
-                if child_versions:
-                    max_version = max(int(ver) for ver in child_versions.keys())
-                    version = max_version + 1
-                else:
-                    version = 1
-
-                # 更新子版本信息
-                child_versions[str(version)] = conversation_id
-                conversation_child_version = json.dumps(child_versions)  # 将字典转换回 JSON 字符串
-                logger.info("Updated conversation_child_version: %s", conversation_child_version)
-
-                # 更新父级 conversation 的 conversation_child_version
-                cur.execute(
-                    "UPDATE conversations SET conversation_child_version = %s WHERE conversation_id = %s",
-                    (conversation_child_version, str(request.conversation_parent_id)),  # 转换 UUID 为字符串
-                )
-                logger.info("Updated parent conversation's child version in the database")
-
-        # 插入对话内容到 conversations 表
-        insert_query = """ 
-            INSERT INTO conversations (
-                conversation_id,
-                session_id,
-                created_at,
-                conversation_type,
-                content,
-                version,
-                conversation_parent_id,
-                conversation_child_version,
-                knowledge_graph,
-                dify_func_des,
-                knowledge_id,
-                dify_id,
-                preview_code
-            )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            RETURNING conversation_id, session_id, created_at, conversation_type, content, version, conversation_parent_id, conversation_child_version, knowledge_graph, dify_func_des, knowledge_id, dify_id, preview_code;
-        """
+                        child_versions = {}
 
-        # 插入数据
-        cur.execute(
-            insert_query,
-            (
-                conversation_id,  # 处理后的 UUID（字符串形式）
-                request.session_id,  # 会话ID
-                created_at,  # 当前时间
-                request.conversation_type,  # 对话类型
-                request.content,  # 文本内容
-                version,  # 版本
-                str(request.conversation_parent_id) if request.conversation_parent_id else None,  # 转换 UUID 为字符串
-                None,  # 更新后的子版本信息
-                request.knowledge_graph,  # 可选字段 knowledge_graph
-                request.dify_func_des,  # 可选字段 dify_func_des
-                request.knowledge_id,  # 可选字段 knowledge_id
-                request.dify_id,  # 可选字段 dify_id
-                request.preview_code,  # 可选字段 preview_code
-            ),
-        )
+                    # 自动生成版本号：找到最高版本号并加一
+                    if child_versions:
+                        max_version = max(int(ver) for ver in child_versions.keys())
+                        version = max_version + 1
+                    else:
+                        version = 1
 
-        # 提交事务
-        conn.commit()
-        result = cur.fetchone()  # 获取插入的返回结果
+                    # 更新子版本信息
+                    child_versions[str(version)] = conversation_id
+                    conversation_child_version = json.dumps(child_versions)  # 将字典转换回 JSON 字符串
+                    logger.info("Updated conversation_child_version: %s", conversation_child_version)
 
-        # 更新 sessions 表的 end_time 字段
-        cur.execute(
-            "UPDATE sessions SET end_time = %s WHERE session_id = %s",
-            (created_at, request.session_id),
-        )
-        conn.commit()
-
-        # 初始化 prd_version 和 prd_content 为 None
-        prd_version = None
-        prd_content = None
-        latest = None
-        restore_version = None
-
-        # 如果插入成功且提供了 prd_content
-        if request.prd_content:
-            # 查询 session_id 下现有的 prd_version（最大版本号）
-            cur.execute(
-                "SELECT MAX(prd_version) FROM prd WHERE session_id = %s",
-                (request.session_id,),
-            )
-            max_prd_version = cur.fetchone()[0]
-
-            # 如果没有版本记录，设置为 1
-            if max_prd_version is None:
-                new_prd_version = 1
-            else:
-                new_prd_version = max_prd_version + 1
-
-            # 插入到 prd 表
-            insert_prd_query = """ 
-                INSERT INTO prd (
-                    prd_version,
+                    # 更新父级 conversation 的 conversation_child_version
+                    await cur.execute(
+                        "UPDATE conversations SET conversation_child_version = %s WHERE conversation_id = %s",
+                        (conversation_child_version, str(request.conversation_parent_id)),  # 转换 UUID 为字符串
+                    )
+                    logger.info("Updated parent conversation's child version in the database")
+
+            # 插入对话内容到 conversations 表
+            insert_query = """ 
+                INSERT INTO conversations (
                     conversation_id,
                     session_id,
-                    prd_content,
-                    created_by,
-                    latest,
-                    restore_version
+                    created_at,
+                    conversation_type,
+                    content,
+                    version,
+                    conversation_parent_id,
+                    conversation_child_version,
+                    knowledge_graph,
+                    dify_func_des,
+                    knowledge_id,
+                    dify_id,
+                    preview_code,
+                    lineage,
+                    lineage_versions
                 )
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-                RETURNING prd_content, prd_version, latest, restore_version;
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                RETURNING conversation_id, session_id, created_at, conversation_type, content, version, conversation_parent_id, conversation_child_version, knowledge_graph, dify_func_des, knowledge_id, dify_id, preview_code;
             """
 
-            # 如果前端传入 restore_version，使用传入值，否则为 NULL
-            restore_version_value = request.restore_version if request.restore_version is not None else None
-
-            # 插入数据到 prd 表
-            cur.execute(
-                insert_prd_query,
+            # 插入数据
+            await cur.execute(
+                insert_query,
                 (
-                    new_prd_version,  # 计算出的新版本号
-                    conversation_id,  # 关联的conversation_id
-                    request.session_id,  # 关联的session_id
-                    request.prd_content,  # PRD的内容
-                    current_user.username,  # 创建人
-                    1,  # 最新版本设置为 1
-                    restore_version_value,  # restore_version 如果提供，则存储，否则为 null
+                    conversation_id,  # 处理后的 UUID（字符串形式）
+                    request.session_id,  # 会话ID
+                    created_at,  # 当前时间
+                    request.conversation_type,  # 对话类型
+                    request.content,  # 文本内容
+                    version,  # 版本
+                    str(request.conversation_parent_id) if request.conversation_parent_id else None,  # 转换 UUID 为字符串
+                    None,  # 更新后的子版本信息
+                    request.knowledge_graph,  # 可选字段 knowledge_graph
+                    request.dify_func_des,  # 可选字段 dify_func_des
+                    request.knowledge_id,  # 可选字段 knowledge_id
+                    request.dify_id,  # 可选字段 dify_id
+                    request.preview_code,  # 可选字段 preview_code
+                    parent_lineage + [uuid.UUID(conversation_id)],  # 物化路径：父级路径 + 自身
+                    parent_lineage_versions + [version],  # 路径上每个对话的版本号
                 ),
             )
+            result = await cur.fetchone()  # 获取插入的返回结果
+
+            # 初始化 prd_version 和 prd_content 为 None
+            prd_version = None
+            prd_content = None
+            latest = None
+            restore_version = None
+
+            # 如果插入成功且提供了 prd_content
+            if request.prd_content:
+                # 将上一个最新版本的 latest 字段设置为 0
+                await cur.execute(
+                    "UPDATE prd SET latest = 0 WHERE session_id = %s AND latest = 1",
+                    (request.session_id,),
+                )
 
-            # 获取 prd_content 和 prd_version
-            prd_content, prd_version, latest, restore_version = cur.fetchone()
+                # 按存储模式计算全文 / 快照 / 差异
+                prd_encoding, stored_content, prd_blob, base_prd_id = await _encode_new_prd(
+                    cur, request.session_id, request.prd_content
+                )
 
-            # 提交PRD插入事务
-            conn.commit()
+                # 插入到 prd 表，版本号为 session_id 下现有的最大版本号加一（没有记录时为 1）
+                insert_prd_query = """ 
+                    INSERT INTO prd (
+                        prd_version,
+                        conversation_id,
+                        session_id,
+                        prd_content,
+                        created_by,
+                        latest,
+                        restore_version,
+                        prd_encoding,
+                        prd_blob,
+                        base_prd_id
+                    )
+                    VALUES (
+                        (SELECT COALESCE(MAX(prd_version), 0) + 1 FROM prd WHERE session_id = %(session_id)s),
+                        %(conversation_id)s, %(session_id)s, %(prd_content)s, %(created_by)s, %(latest)s, %(restore_version)s,
+                        %(prd_encoding)s, %(prd_blob)s, %(base_prd_id)s
+                    )
+                    RETURNING prd_version, latest, restore_version;
+                """
 
-            # 更新上一版本的 prd 表格，将其 latest 字段设置为 0
-            if max_prd_version is not None:
-                cur.execute(
-                    "UPDATE prd SET latest = 0 WHERE session_id = %s AND prd_version = %s",
-                    (request.session_id, max_prd_version),
+                # 插入数据到 prd 表
+                await cur.execute(
+                    insert_prd_query,
+                    {
+                        "conversation_id": conversation_id,  # 关联的conversation_id
+                        "session_id": request.session_id,  # 关联的session_id
+                        "prd_content": stored_content,  # PRD的内容（plain 编码时）
+                        "created_by": current_user.username,  # 创建人
+                        "latest": 1,  # 最新版本设置为 1
+                        "restore_version": request.restore_version,  # restore_version 如果提供，则存储，否则为 null
+                        "prd_encoding": prd_encoding,  # 存储编码
+                        "prd_blob": prd_blob,  # 压缩快照或差异
+                        "base_prd_id": base_prd_id,  # 差异所依赖的快照
+                    },
                 )
-                conn.commit()
 
-        if result:
+                # 获取 prd_version，返回的 prd_content 即请求中的全文
+                prd_version, latest, restore_version = await cur.fetchone()
+                prd_content = request.prd_content
+
+            if not result:
+                logger.error("Failed to fetch insert result")
+                raise HTTPException(status_code=500, detail="Failed to create conversation")
+
+            # 提交事务：父级子版本、对话、session 结束时间和 PRD 一起生效
+            await conn.commit()
+
             # 构建响应对象
             return ConversationResponse(
                 conversation_id=str(result[0]),  # 转换 UUID 为字符串
@@ -212,16 +443,10 @@ async def create_conversation_service(request: ConversationCreateRequest, curren
                 latest=latest,
                 restore_version=restore_version,
             )
-        else:
-            logger.error("Failed to fetch insert result")
-            raise HTTPException(status_code=500, detail="Failed to create conversation")
 
     except Exception as e:
         logger.error(f"Error creating conversation: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
-    finally:
-        if conn:
-            conn.close()
 
 # 获取对话服务
 async def get_conversations_service(
@@ -230,153 +455,21 @@ async def get_conversations_service(
     conversation_id: Optional[str],
     current_user: UserInDB
 ) -> List[ConversationResponse]:
-    conn = None
-
     try:
         # 获取数据库连接
-        conn = get_db_connection()
-        with conn.cursor() as cur:
-            # 查询 session_id 对应的 user_id
-            logger.info("Checking session_id %s for user_id %s", session_id, user_id)
-            cur.execute("SELECT user_id FROM sessions WHERE session_id = %s", (session_id,))
-            result = cur.fetchone()
-
-            # 如果查询不到 session_id，返回空
-            if not result:
-                logger.warning("Session ID %s not found", session_id)
+        async with get_db_connection() as conn, conn.cursor() as cur:
+            # 校验 session 是否存在且属于该用户
+            if not await _check_session_owner(cur, session_id, user_id):
                 return []
-            session_user_id = result[0]  # 获取查询到的 user_id
 
-            # 比对 session_id 对应的 user_id 和 请求的 user_id 是否一致
-            if session_user_id != user_id:
-                logger.warning("Session user_id %s does not match request user_id %s", session_user_id, user_id)
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="You do not have permission to access this session."
-                )
-    
-            # 如果传递了 conversation_id，通过 conversation_child_version 找到链路的起始点
-            if conversation_id:
-                while True:
-                    cur.execute("""
-                        SELECT conversation_id
-                        FROM conversations
-                        WHERE conversation_parent_id = %s
-                        ORDER BY version DESC
-                        LIMIT 1
-                    """, (conversation_id,))
-                    next_conversation = cur.fetchone()
-                    if next_conversation:
-                        # 如果找到下一个版本，继续查找
-                        conversation_id = next_conversation[0]
-                    else:
-                        # 没有下一个版本，则停止
-                        break
-            else:
-                # 如果没有传递 conversation_id，查询 session_id 下最新的 conversation_id
-                cur.execute("""
-                    SELECT conversation_id
-                    FROM conversations
-                    WHERE session_id = %s
-                    ORDER BY created_at DESC
-                    LIMIT 1
-                """, (session_id,))
-                latest_conversation = cur.fetchone()
-                if latest_conversation:
-                    conversation_id = latest_conversation[0]
-                    logger.info("Latest conversation_id for session_id %s is %s", session_id, conversation_id)
-                else:
-                    return []
-                
-            logger.info("Initial conversation id is %s", conversation_id)
-            # 递归查找链路上的所有对话
-            conversations = []
-            visited_ids = set()
-            stack = [conversation_id]
-
-            while stack:
-                current_id = stack.pop()
-                if current_id in visited_ids:
-                    continue
-                visited_ids.add(current_id)
-                logger.info("Processing conversation_id %s", current_id)
-
-                # 查询当前对话信息
-                cur.execute("""
-                    SELECT conversation_id, session_id, created_at, conversation_type, content, version,
-                           conversation_parent_id, conversation_child_version, knowledge_graph, dify_func_des,
-                           knowledge_id, dify_id, preview_code
-                    FROM conversations
-                    WHERE conversation_id = %s
-                """, (current_id,))
-                conversation_data = cur.fetchone()
-
-                if conversation_data:
-                    # 查询 prd_content 和 prd_version（如果有的话）
-                    prd_content = None
-                    prd_version = None
-                    latest = None
-                    restore_version = None                    
-                    cur.execute(""" 
-                        SELECT prd_content, prd_version, latest, restore_version
-                        FROM prd
-                        WHERE session_id = %s AND conversation_id = %s
-                        ORDER BY prd_version DESC
-                        LIMIT 1
-                    """, (session_id, current_id))
-                    prd_result = cur.fetchone()
-
-                    if prd_result:
-                        prd_content, prd_version, latest, restore_version = prd_result     
-                                       
-                    # 如果存在父级对话，获取父级的conversation_child_version
-                    conversation_para_version = None
-                    if conversation_data[6]:  # conversation_parent_id
-                        parent_id = conversation_data[6]
-                        cur.execute("""
-                            SELECT conversation_child_version
-                            FROM conversations
-                            WHERE conversation_id = %s
-                        """, (parent_id,))
-                        parent_data = cur.fetchone()
-                        if parent_data and parent_data[0]:
-                            # 确保父级的conversation_child_version是字典类型
-                            if isinstance(parent_data[0], str):
-                                try:
-                                    conversation_para_version = json.loads(parent_data[0])
-                                except json.JSONDecodeError:
-                                    logger.warning("Failed to decode JSON for parent_id %s", parent_id)
-                                    conversation_para_version = None
-                            elif isinstance(parent_data[0], dict):
-                                conversation_para_version = parent_data[0]
-
-                    # 使用字典解包来创建 Pydantic 模型
-                    conversation = ConversationResponse(
-                        conversation_id=str(conversation_data[0]),  # 转换 UUID 为字符串
-                        session_id=conversation_data[1],
-                        created_at=conversation_data[2],
-                        conversation_type=conversation_data[3],
-                        content=conversation_data[4],
-                        version=conversation_data[5],
-                        conversation_parent_id=conversation_data[6],
-                        conversation_para_version=conversation_para_version,
-                        knowledge_graph=conversation_data[8],
-                        dify_func_des=conversation_data[9],
-                        prd_content=prd_content,  # 添加prd_content
-                        prd_version=prd_version,  # 添加prd_version
-                        latest=latest,  # 返回最新的标记
-                        restore_version=restore_version,  # 返回恢复版本号                        
-                        knowledge_id=conversation_data[10],
-                        dify_id=conversation_data[11],
-                        preview_code=conversation_data[12]
-                    )
-                    conversations.append(conversation)
+            # 通过物化路径一次性解析整条对话链路，查询次数与对话深度无关
+            await cur.execute(CONVERSATION_CHAIN_QUERY, {
+                "session_id": session_id,
+                "conversation_id": conversation_id,
+            })
+            rows = await cur.fetchall()
 
-                    # 如果存在父级对话，继续向上查找
-                    if conversation_data[6]:
-                        stack.append(str(conversation_data[6]))
-            # 根据 created_at 对 conversations 进行排序
-            conversations.sort(key=lambda x: x.created_at)
+            conversations = [_row_to_conversation(row) for row in rows]
 
         # 返回查询结果
         return conversations
@@ -385,21 +478,99 @@ async def get_conversations_service(
         logger.error(f"Error querying conversations: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
-    finally:
-        if conn:
-            conn.close()
+# 分页获取对话服务：按 (created_at, conversation_id) 从新到旧返回链路上的对话
+async def get_conversations_page_service(
+    session_id: int,
+    user_id: int,
+    conversation_id: Optional[str],
+    limit: int,
+    cursor: Optional[str],
+    include_heavy: bool,
+) -> ConversationPage:
+    cursor_created_at, cursor_id = decode_conversation_cursor(cursor) if cursor else (None, None)
+    try:
+        async with get_db_connection() as conn, conn.cursor() as cur:
+            # 校验 session 是否存在且属于该用户
+            if not await _check_session_owner(cur, session_id, user_id):
+                return ConversationPage(items=[], next_cursor=None)
+
+            # 多取一条用于判断是否还有下一页
+            await cur.execute(build_conversation_chain_query(include_heavy, paginated=True), {
+                "session_id": session_id,
+                "conversation_id": conversation_id,
+                "cursor_created_at": cursor_created_at,
+                "cursor_id": cursor_id,
+                "limit": limit + 1,
+            })
+            rows = await cur.fetchall()
+
+        items = [_row_to_conversation(row) for row in rows[:limit]]
+        next_cursor = encode_conversation_cursor(items[-1]) if len(rows) > limit else None
+        return ConversationPage(items=items, next_cursor=next_cursor)
+
+    except HTTPException as e:
+        raise e
+
+    except Exception as e:
+        logger.error(f"Error querying conversation page: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+# 已打开的对话流：连接和服务端游标已就绪、首批数据已读取，其余数据在迭代时分批读取
+# 迭代结束或调用 aclose 时关闭游标并归还连接（响应未开始发送就中断时由 aclose 兜底）
+class ConversationStream:
+    def __init__(self, stack: AsyncExitStack, cur, rows: list):
+        self._stack = stack
+        self._cur = cur
+        self._rows = rows
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        try:
+            rows = self._rows
+            while rows:
+                for row in rows:
+                    yield _row_to_conversation(row).model_dump_json() + "\n"
+                rows = await self._cur.fetchmany(self._cur.itersize)
+        finally:
+            await self.aclose()
+
+    async def aclose(self):
+        await self._stack.aclose()
+
+
+# 流式获取对话服务：按时间顺序逐条输出 NDJSON，使用服务端游标，内存占用与链路长度无关
+# 租借连接、校验 session 和读取首批数据在返回前完成，连接池繁忙或查询失败时调用方仍可返回错误状态码
+# session 不存在时返回 None
+async def stream_conversations_service(
+    session_id: int,
+    user_id: int,
+    conversation_id: Optional[str],
+    include_heavy: bool,
+) -> Optional[ConversationStream]:
+    stack = AsyncExitStack()
+    try:
+        conn = await stack.enter_async_context(get_db_connection())
+        async with conn.cursor() as cur:
+            if not await _check_session_owner(cur, session_id, user_id):
+                await stack.aclose()
+                return None
+        cur = await stack.enter_async_context(conn.cursor(name="conversation_stream"))
+        await cur.execute(build_conversation_chain_query(include_heavy), {
+            "session_id": session_id,
+            "conversation_id": conversation_id,
+        })
+        rows = await cur.fetchmany(cur.itersize)
+    except BaseException:
+        await stack.aclose()
+        raise
+    return ConversationStream(stack, cur, rows)
 
 # 获取PRD
 async def get_prd_service(user_id: int) -> PrdResponse:
-    conn = None
     try:
-        # 获取数据库连接
-        conn = get_db_connection()
-
-        # 查询该 user_id 最新的 session_id
-        with conn.cursor() as cur:
+        # 获取数据库连接，查询该 user_id 最新的 session_id
+        async with get_db_connection() as conn, conn.cursor() as cur:
             # 获取 end_time 最新的 session_id (按用户筛选)
-            cur.execute(
+            await cur.execute(
                 """
                 SELECT session_id
                 FROM sessions
@@ -409,7 +580,7 @@ async def get_prd_service(user_id: int) -> PrdResponse:
             """,
                 (user_id,),
             )
-            session_id_record = cur.fetchone()
+            session_id_record = await cur.fetchone()
 
             if not session_id_record:
                 raise HTTPException(
@@ -418,26 +589,27 @@ async def get_prd_service(user_id: int) -> PrdResponse:
 
             session_id = session_id_record[0]
             
-            # 查询该 session_id 下 prd_version 最大的 prd_content
-            cur.execute(
+            # 查询该 session_id 下 prd_version 最大的 prd_content（delta 编码时带上其快照记录）
+            await cur.execute(
                 """
-                SELECT prd_content
-                FROM prd
-                WHERE session_id = %s
-                ORDER BY prd_version DESC
+                SELECT p.prd_encoding, p.prd_content, p.prd_blob, base.prd_encoding, base.prd_content, base.prd_blob
+                FROM prd p
+                LEFT JOIN prd base ON base.prd_id = p.base_prd_id
+                WHERE p.session_id = %s
+                ORDER BY p.prd_version DESC
                 LIMIT 1
             """,
                 (session_id,),
             )
-            prd_content_record = cur.fetchone()
+            prd_content_record = await cur.fetchone()
 
             if not prd_content_record:
                 raise HTTPException(
                     status_code=404, detail="No PRD content found for the session"
                 )
 
-            # 返回 prd_content
-            return PrdResponse(prd_content=prd_content_record[0])
+            # 还原并返回 prd_content
+            return PrdResponse(prd_content=decode_prd(*prd_content_record))
 
     except HTTPException as e:
         # 捕获并抛出 HTTP 异常
@@ -447,63 +619,52 @@ async def get_prd_service(user_id: int) -> PrdResponse:
         logger.error(f"Error retrieving PRD: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
-    finally:
-        if conn:
-            conn.close()
-
 # 更新对话内容服务
 async def update_conversation_service(conversation_id: uuid.UUID, request: ConversationUpdateRequest):
-    conn = None
     try:
         # 获取数据库连接
-        conn = get_db_connection()
-        cur = conn.cursor()
+        async with get_db_connection() as conn, conn.cursor() as cur:
+            # 查询是否存在该 conversation_id 和 session_id 对应的对话
+            await cur.execute(
+                "SELECT conversation_id, session_id FROM conversations WHERE conversation_id = %s AND session_id = %s",
+                (str(conversation_id), str(request.session_id))  # 确保 UUID 转换为字符串传递
+            )
+            conversation_record = await cur.fetchone()
 
-        # 查询是否存在该 conversation_id 和 session_id 对应的对话
-        cur.execute(
-            "SELECT conversation_id, session_id FROM conversations WHERE conversation_id = %s AND session_id = %s",
-            (str(conversation_id), str(request.session_id))  # 确保 UUID 转换为字符串传递
-        )
-        conversation_record = cur.fetchone()
+            if not conversation_record:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Conversation not found for the given session_id"
+                )
 
-        if not conversation_record:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Conversation not found for the given session_id"
-            )
+            # 1. 构建更新字段，分别更新每个字段
+            if request.knowledge_graph is not None:
+                await cur.execute("""
+                    UPDATE conversations
+                    SET knowledge_graph = %s
+                    WHERE conversation_id = %s
+                """, (request.knowledge_graph, str(conversation_id)))  # 使用字符串形式的 UUID
 
-        # 1. 构建更新字段，分别更新每个字段
-        if request.knowledge_graph is not None:
-            cur.execute("""
-                UPDATE conversations
-                SET knowledge_graph = %s
-                WHERE conversation_id = %s
-            """, (request.knowledge_graph, str(conversation_id)))  # 使用字符串形式的 UUID
-
-        if request.dify_func_des is not None:
-            cur.execute("""
-                UPDATE conversations
-                SET dify_func_des = %s
-                WHERE conversation_id = %s
-            """, (request.dify_func_des, str(conversation_id)))  # 使用字符串形式的 UUID
-
-        if request.knowledge_id is not None:
-            cur.execute("""
-                UPDATE conversations
-                SET knowledge_id = %s
-                WHERE conversation_id = %s
-            """, (request.knowledge_id, str(conversation_id)))  # 使用字符串形式的 UUID
-
-        # 2. 更新 prd 表的 prd_content（如果有更新）
-        if request.prd_content is not None:
-            cur.execute("""
-                UPDATE prd
-                SET prd_content = %s
-                WHERE conversation_id = %s
-            """, (request.prd_content, str(conversation_id)))  # 使用字符串形式的 UUID
-
-        # 提交事务
-        conn.commit()
+            if request.dify_func_des is not None:
+                await cur.execute("""
+                    UPDATE conversations
+                    SET dify_func_des = %s
+                    WHERE conversation_id = %s
+                """, (request.dify_func_des, str(conversation_id)))  # 使用字符串形式的 UUID
+
+            if request.knowledge_id is not None:
+                await cur.execute("""
+                    UPDATE conversations
+                    SET knowledge_id = %s
+                    WHERE conversation_id = %s
+                """, (request.knowledge_id, str(conversation_id)))  # 使用字符串形式的 UUID
+
+            # 2. 更新 prd 表的 prd_content（如果有更新），同时重新计算依赖它的差异
+            if request.prd_content is not None:
+                await _rewrite_prd_content(cur, str(conversation_id), request.prd_content)  # 使用字符串形式的 UUID
+
+            # 提交事务
+            await conn.commit()
 
     except HTTPException as e:
         # 捕获并抛出 HTTP 异常
@@ -512,7 +673,3 @@ async def update_conversation_service(conversation_id: uuid.UUID, request: Conve
     except Exception as e:
         logger.error(f"Error updating conversation: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
-
-    finally:
-        if conn:
-            conn.close()  # 关闭数据库连接
@@ -0,0 +1,81 @@
+import threading
+from typing import Dict, List, Tuple
+
+from api.utils.db import get_b_db_connection
+from api.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 维度表：表名 -> (id 列, 名称列)
+DIMENSION_TABLES = {
+    "userjourney": ("user_journey_id", "name"),
+    "status": ("status_id", "status_name"),
+    "stakeholder": ("stakeholder_id", "name"),
+    "interest": ("interest_id", "description"),
+    "standards": ("id", "standard_id_normalized"),  # 以去除空格后的 standard_id 为键
+}
+
+
+# 维度表的进程内 名称 -> id 缓存
+# 只缓存已提交的行：启动时整表预加载，导入事务提交后再写入本次解析出的 id，
+# 回滚的事务中插入的 id 不会进入缓存
+class DimensionCache:
+    def __init__(self):
+        self._ids: Dict[str, Dict[str, int]] = {table: {} for table in DIMENSION_TABLES}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # 按名称查找 id，返回 (命中的 名称 -> id, 未命中的名称)
+    def lookup(self, table: str, names: List[str]) -> Tuple[Dict[str, int], List[str]]:
+        with self._lock:
+            cached = self._ids[table]
+            found = {name: cached[name] for name in names if name in cached}
+            missing = [name for name in names if name not in cached]
+            self.hits += len(found)
+            self.misses += len(missing)
+        return found, missing
+
+    # 写入已提交的 名称 -> id
+    def update(self, table: str, mapping: Dict[str, int]):
+        with self._lock:
+            self._ids[table].update(mapping)
+
+    # 写入多个表的 名称 -> id，参数格式同 resolve_prd_dimensions 的返回值
+    def update_all(self, dimension_ids: Dict[str, Dict[str, int]]):
+        for table, mapping in dimension_ids.items():
+            self.update(table, mapping)
+
+    # 清空缓存，之后按需从数据库重新填充
+    def clear(self):
+        with self._lock:
+            for table in DIMENSION_TABLES:
+                self._ids[table].clear()
+
+    # 整表加载所有维度表
+    async def preload(self, cur):
+        for table, (id_column, name_column) in DIMENSION_TABLES.items():
+            await cur.execute(f"SELECT {name_column}, {id_column} FROM {table} WHERE {name_column} IS NOT NULL")
+            self.update(table, dict(await cur.fetchall()))
+
+    # 缓存统计信息
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": sum(len(ids) for ids in self._ids.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+dimension_cache = DimensionCache()
+
+
+# 应用启动时预加载维度缓存，失败时只记录日志，之后按需填充
+async def preload_dimension_cache():
+    try:
+        async with get_b_db_connection() as conn, conn.cursor() as cur:
+            await dimension_cache.preload(cur)
+        logger.info("Dimension cache preloaded: %s", dimension_cache.stats())
+    except Exception as e:
+        logger.warning(f"Error preloading dimension cache: {e}")
@@ -11,11 +11,9 @@ logger = get_logger(__name__)
 
 # 创建会话服务
 async def create_session_service(request: SessionCreateRequest) -> SessionResponse:
-    conn = None
     try:
         # 获取数据库连接
-        conn = get_db_connection()
-        with conn.cursor() as cur:
+        async with get_db_connection() as conn, conn.cursor() as cur:
             # 获取当前时间作为 start_time 和 end_time
             start_time = datetime.now()
             end_time = datetime.now()
@@ -32,13 +30,13 @@ async def create_session_service(request: SessionCreateRequest) -> SessionRespon
                 VALUES (%s, %s, %s, %s)
                 RETURNING session_id, user_id, session_name, start_time, end_time;
             """
-            cur.execute(insert_query, (request.user_id, session_name, start_time, end_time))
+            await cur.execute(insert_query, (request.user_id, session_name, start_time, end_time))
 
             # 提交事务
-            conn.commit()
+            await conn.commit()
 
             # 获取插入的会话数据
-            result = cur.fetchone()
+            result = await cur.fetchone()
             if result:
                 return SessionResponse(
                     session_id=result[0],
@@ -53,17 +51,12 @@ async def create_session_service(request: SessionCreateRequest) -> SessionRespon
     except Exception as e:
         logger.error(f"Error creating session: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
-    finally:
-        if conn:
-            conn.close()
 
 # 获取用户所有会话服务
 async def get_user_sessions_service(user_id: int) -> List[SessionResponse]:
-    conn = None
     try:
         # 获取数据库连接
-        conn = get_db_connection()
-        with conn.cursor() as cur:
+        async with get_db_connection() as conn, conn.cursor() as cur:
             # 查询用户的所有会话
             query = """
                 SELECT session_id, user_id, session_name, start_time, end_time
@@ -71,10 +64,10 @@ async def get_user_sessions_service(user_id: int) -> List[SessionResponse]:
                 WHERE user_id = %s
                 ORDER BY start_time DESC;
             """
-            cur.execute(query, (user_id,))
+            await cur.execute(query, (user_id,))
             
             # 获取查询结果
-            results = cur.fetchall()
+            results = await cur.fetchall()
             
             # 转换为响应模型列表
             sessions = []
@@ -92,23 +85,18 @@ async def get_user_sessions_service(user_id: int) -> List[SessionResponse]:
     except Exception as e:
         logger.error(f"Error fetching sessions for user {user_id}: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
-    finally:
-        if conn:
-            conn.close()
 
 # 更新会话名称服务
 async def update_session_name_service(request: UpdateSessionNameRequest) -> SessionResponse:
-    conn = None
     try:
         # 获取数据库连接
-        conn = get_db_connection()
-        with conn.cursor() as cur:
+        async with get_db_connection() as conn, conn.cursor() as cur:
             # 验证会话是否存在且属于该用户
-            cur.execute(
+            await cur.execute(
                 "SELECT session_id FROM sessions WHERE session_id = %s AND user_id = %s",
                 (request.session_id, request.user_id)
             )
-            if not cur.fetchone():
+            if not await cur.fetchone():
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="Session not found or does not belong to the user"
@@ -121,11 +109,11 @@ async def update_session_name_service(request: UpdateSessionNameRequest) -> Sess
                 WHERE session_id = %s
                 RETURNING session_id, user_id, session_name, start_time, end_time;
             """
-            cur.execute(update_query, (request.name, request.session_id))
-            conn.commit()
+            await cur.execute(update_query, (request.name, request.session_id))
+            await conn.commit()
             
             # 获取更新后的会话数据
-            result = cur.fetchone()
+            result = await cur.fetchone()
             if result:
                 return SessionResponse(
                     session_id=result[0],
@@ -142,23 +130,18 @@ async def update_session_name_service(request: UpdateSessionNameRequest) -> Sess
     except Exception as e:
         logger.error(f"Error updating session name: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
-    finally:
-        if conn:
-            conn.close()
 
 # 删除会话服务
 async def delete_session_service(session_id: int, user_id: int):
-    conn = None
     try:
         # 获取数据库连接
-        conn = get_db_connection()
-        with conn.cursor() as cur:
+        async with get_db_connection() as conn, conn.cursor() as cur:
             # 首先检查 session 是否存在，并且属于当前用户
             session_check_query = """
             SELECT user_id FROM sessions WHERE session_id = %s
             """
-            cur.execute(session_check_query, (session_id,))
-            result = cur.fetchone()
+            await cur.execute(session_check_query, (session_id,))
+            result = await cur.fetchone()
 
             if not result:
                 logger.error(f"Session {session_id} not found.")
@@ -177,22 +160,22 @@ async def delete_session_service(session_id: int, user_id: int):
             delete_prd_query = """
             DELETE FROM prd WHERE session_id = %s
             """
-            cur.execute(delete_prd_query, (session_id,))
+            await cur.execute(delete_prd_query, (session_id,))
 
             # 开始删除操作，删除 conversations 表中对应的记录
             delete_conversations_query = """
             DELETE FROM conversations WHERE session_id = %s
             """
-            cur.execute(delete_conversations_query, (session_id,))
+            await cur.execute(delete_conversations_query, (session_id,))
 
             # 删除 sessions 表中对应的记录
             delete_session_query = """
             DELETE FROM sessions WHERE session_id = %s
             """
-            cur.execute(delete_session_query, (session_id,))
+            await cur.execute(delete_session_query, (session_id,))
 
             # 提交事务
-            conn.commit()
+            await conn.commit()
 
             # 返回删除成功的消息
             logger.info(f"Session {session_id} and its conversations, prd records deleted for user {user_id}")
@@ -205,7 +188,3 @@ async def delete_session_service(session_id: int, user_id: int):
     except Exception as e:
         logger.error(f"Error deleting session {session_id} for user {user_id}: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
-
-    finally:
-        if conn:
-            conn.close()  # 关闭连接
\ No newline at end of file
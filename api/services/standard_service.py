@@ -1,139 +1,323 @@
+import html
 import json
-from api.schemas.standard import Standard
+import re
+from typing import List, Optional
+from api.schemas.standard import Standard, StandardSearchHit, StandardSearchResponse
 from fastapi import HTTPException
 from api.utils.db import get_b_db_connection
+from api.utils.pagination import encode_cursor, decode_cursor
+from api.services.dimension_cache import dimension_cache
+from api.utils.response_cache import invalidate_response_cache
 from psycopg.rows import dict_row
 
-# 检查 standard_id 是否已存在
-def is_standard_id_exists(sanitized_standard_id: str) -> bool:
-    try:
-        conn = get_b_db_connection()
-        cursor = conn.cursor()
+# 标准编号的规范化形式：去除所有空格，与 standards.standard_id_normalized 生成列一致
+def normalize_standard_id(standard_id: str) -> str:
+    return standard_id.replace(" ", "")
 
-        # 查询去除空格后的 standard_id 是否已存在
-        cursor.execute(
-            """
-            SELECT COUNT(*)
-            FROM standards
-            WHERE REPLACE(standard_id, ' ', '') = %s
-            """,
-            (sanitized_standard_id,)
-        )
-        result = cursor.fetchone()[0] > 0
-    except Exception as e:
-        raise e
-    finally:
-        cursor.close()
-        conn.close()
+# 插入标准信息，返回是否插入成功
+# 以 standard_id_normalized 唯一索引判重，去除空格后相同的标准已存在时不插入并返回 False；
+# 并发上传同一标准时只有一个请求会插入成功
+async def insert_standard_data(standard: Standard) -> bool:
+    async with get_b_db_connection() as conn, conn.cursor() as cursor:
+        try:
+            # 插入标准信息（存储时保留原始 standard_id）
+            await cursor.execute(
+                """
+                INSERT INTO standards (standard_id, document_name, document_name_english, scope)
+                VALUES (%s, %s, %s, %s)
+                ON CONFLICT (standard_id_normalized) DO NOTHING
+                RETURNING id
+                """,
+                (standard.standardID, standard.documentName, standard.documentNameEnglish, standard.scope)
+            )
+            inserted = await cursor.fetchone()
+            if inserted is None:
+                await conn.rollback()
+                return False
+            standard_id = inserted[0]
 
-    return result
+            # 插入术语信息
+            term_values = [
+                (
+                    standard_id,
+                    term.termID,
+                    term.term,
+                    term.termEnglish,
+                    term.definition,
+                    json.dumps([{"ID": note.ID, "content": note.content} for note in term.notes])  # 转换为 JSON 格式
+                )
+                for term in standard.terms
+            ]
 
-# 插入标准信息
-def insert_standard_data(standard: Standard):
-    try:
-        conn = get_b_db_connection()
-        cursor = conn.cursor()
-
-        # 插入标准信息
-        cursor.execute(
-            """
-            INSERT INTO standards (standard_id, document_name, document_name_english, scope)
-            VALUES (%s, %s, %s, %s)
-            RETURNING id
-            """,
-            (standard.standardID, standard.documentName, standard.documentNameEnglish, standard.scope)
-        )
-        standard_id = cursor.fetchone()[0]
-
-        # 插入术语信息
-        term_values = [
-            (
-                standard_id,
-                term.termID,
-                term.term,
-                term.termEnglish,
-                term.definition,
-                json.dumps([{"ID": note.ID, "content": note.content} for note in term.notes])  # 转换为 JSON 格式
+            # 批量插入术语信息
+            await cursor.executemany(
+                """
+                INSERT INTO terms (standard_id, term_id, term, term_english, definition, notes)
+                VALUES (%s, %s, %s, %s, %s, %s::jsonb)
+                """,
+                term_values
             )
-            for term in standard.terms
-        ]
 
-        # 批量插入术语信息
-        cursor.executemany(
-            """
-            INSERT INTO terms (standard_id, term_id, term, term_english, definition, notes)
-            VALUES (%s, %s, %s, %s, %s, %s::jsonb)
-            """,
-            term_values
-        )
+            # 提交事务
+            await conn.commit()
 
-        # 提交事务
-        conn.commit()
+            # 新标准写入维度缓存，PRD 导入时解析法规可直接命中
+            dimension_cache.update("standards", {normalize_standard_id(standard.standardID): standard_id})
 
-    except Exception as e:
-        conn.rollback()
-        raise e
-    finally:
-        cursor.close()
-        conn.close()
+            # 缓存的标准列表响应失效
+            await invalidate_response_cache("standards")
+            return True
+
+        except Exception as e:
+            await conn.rollback()
+            raise e
+
+# 标准列表可选择的字段：响应字段 -> 查询列
+STANDARD_FIELDS = {
+    "id": "s.id",
+    "standardID": "s.standard_id",
+    "documentName": "s.document_name",
+    "documentNameEnglish": "s.document_name_english",
+    "scope": "s.scope",
+}
+
+# 每个标准的术语在数据库中聚合为一个 JSON 数组，不再按术语展开成多行
+STANDARD_TERMS_AGG = """
+    COALESCE((
+        SELECT json_agg(json_build_object(
+                   'termID', t.term_id,
+                   'term', t.term,
+                   'termEnglish', t.term_english,
+                   'definition', t.definition,
+                   'notes', COALESCE(t.notes, '[]'::jsonb)
+               ) ORDER BY t.id)
+        FROM terms t
+        WHERE t.standard_id = s.id AND t.term_id IS NOT NULL AND t.term_id <> 0
+    ), '[]'::json)
+"""
 
 # Function to get standards from the database
-def get_standards_from_db(terms: int):
+# fields 为空时返回全部字段；limit 为空时返回全部标准，否则按 id 做 keyset 分页，返回 (标准列表, 下一页游标)
+async def get_standards_from_db(terms: int, fields: Optional[List[str]] = None, limit: Optional[int] = None, cursor: Optional[str] = None):
+    selected = [field for field in STANDARD_FIELDS if not fields or field in fields]
+    if "standardID" not in selected:
+        selected.append("standardID")  # standardID 必须返回
+    after_id = decode_cursor(cursor, 1)[0] if cursor else None
+
     try:
-        conn = get_b_db_connection()
-        cursor = conn.cursor(row_factory=dict_row)  # 设置 row_factory 为 dict_row
-       
-        # Base query to get standards
-        query = """
-            SELECT standard_id, document_name, document_name_english, scope
-            FROM standards
-        """
-
-        # Query for terms if terms == 1
-        if terms == 1:
-            query = """
-                SELECT s.standard_id, s.document_name, s.document_name_english, s.scope, 
-                       t.term_id, t.term, t.term_english, t.definition, t.notes
+        async with get_b_db_connection() as conn, conn.cursor(row_factory=dict_row) as cur:  # 设置 row_factory 为 dict_row
+            # 只查询需要返回的列，需要术语时在数据库中聚合
+            columns = [f"{STANDARD_FIELDS[field]} AS \"{field}\"" for field in selected]
+            include_terms = terms == 1 and (not fields or "terms" in fields)
+            if include_terms:
+                columns.append(f"{STANDARD_TERMS_AGG} AS terms")
+            elif not fields or "terms" in fields:
+                columns.append("'[]'::json AS terms")
+
+            query = f"""
+                SELECT s.id AS _id, {", ".join(columns)}
                 FROM standards s
-                LEFT JOIN terms t ON s.id = t.standard_id
+                WHERE %(after_id)s::int IS NULL OR s.id > %(after_id)s::int
+                ORDER BY s.id
             """
-        
-        cursor.execute(query)
-        rows = cursor.fetchall()
-
-        standards = {}
-
-        for row in rows:
-            standard_id = row['standard_id']  # 现在可以通过键访问
-
-            if standard_id not in standards:
-                standards[standard_id] = {
-                    "standardID": row['standard_id'],
-                    "documentName": row['document_name'],
-                    "documentNameEnglish": row['document_name_english'],
-                    "scope": row['scope'],
-                    "terms": []
-                }
-
-            # 如果需要术语信息，添加到标准中
-            if terms == 1 and row.get('term_id'):
-                terms_data = {
-                    "termID": row['term_id'],
-                    "term": row['term'],
-                    "termEnglish": row['term_english'],
-                    "definition": row['definition'],
-                    "notes": row['notes'] if row['notes'] else []
-                }
-                standards[standard_id]['terms'].append(terms_data)
-
-        # 转换为列表返回
-        return list(standards.values())
+            if limit is not None:
+                query += " LIMIT %(limit)s"  # 多取一条用于判断是否还有下一页
+            await cur.execute(query, {"after_id": after_id, "limit": limit + 1 if limit is not None else None})
+            rows = await cur.fetchall()
 
+    except HTTPException:
+        raise
     except Exception as e:
         # 捕获异常并记录日志
         raise HTTPException(status_code=500, detail=f"Error retrieving standards: {e}")
 
-    finally:
-        # Ensure the connection is closed even if an error occurs
-        if conn:
-            conn.close()
\ No newline at end of file
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["_id"])
+    standards = [{key: value for key, value in row.items() if key != "_id"} for row in rows]
+    return standards, next_cursor
+
+# 分页获取某个标准的术语，按 id 做 keyset 分页，返回 (术语列表, 下一页游标)；标准不存在时返回 404
+async def get_standard_terms_from_db(standard_pk: int, limit: int, cursor: Optional[str] = None):
+    after_id = decode_cursor(cursor, 1)[0] if cursor else None
+    try:
+        async with get_b_db_connection() as conn, conn.cursor(row_factory=dict_row) as cur:
+            await cur.execute("SELECT 1 FROM standards WHERE id = %s", (standard_pk,))
+            if await cur.fetchone() is None:
+                raise HTTPException(status_code=404, detail="Standard not found")
+
+            await cur.execute("""
+                SELECT t.id, t.term_id, t.term, t.term_english, t.definition, t.notes
+                FROM terms t
+                WHERE t.standard_id = %(standard_pk)s
+                  AND t.term_id IS NOT NULL AND t.term_id <> 0
+                  AND (%(after_id)s::int IS NULL OR t.id > %(after_id)s::int)
+                ORDER BY t.id
+                LIMIT %(limit)s
+            """, {"standard_pk": standard_pk, "after_id": after_id, "limit": limit + 1})  # 多取一条用于判断是否还有下一页
+            rows = await cur.fetchall()
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving terms: {e}")
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["id"])
+    terms = [
+        {
+            "termID": row["term_id"],
+            "term": row["term"],
+            "termEnglish": row["term_english"],
+            "definition": row["definition"],
+            "notes": row["notes"] if row["notes"] else []
+        }
+        for row in rows
+    ]
+    return terms, next_cursor
+
+# 术语英文名称和定义的全文检索向量，与迁移中的表达式索引保持一致
+TERMS_TSVECTOR = "to_tsvector('english', coalesce(t.term_english, '') || ' ' || coalesce(t.definition, ''))"
+
+# 转义 LIKE 通配符
+def escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+# 关键词的匹配模式：英文单词去掉常见词尾后匹配同词根的词（与全文检索的词干匹配大致对应），其他原样匹配
+def _keyword_pattern(keyword: str) -> str:
+    if re.fullmatch(r"[A-Za-z]+", keyword):
+        stem = re.sub(r"(ing|ed|es|s|e)$", "", keyword.lower())
+        if len(stem) >= 3:
+            return re.escape(stem) + r"[a-z]*"
+    return re.escape(keyword)
+
+# 以 <mark> 标记文本中所有关键词（不区分大小写），内容先做 HTML 转义
+# snippet_chars 不为空时只返回第一个匹配附近的片段；没有匹配时返回 None
+def _highlight(text: Optional[str], keywords: List[str], snippet_chars: Optional[int] = None) -> Optional[str]:
+    if not text or not keywords:
+        return None
+    pattern = re.compile("|".join(_keyword_pattern(k) for k in sorted(keywords, key=len, reverse=True)), re.IGNORECASE)
+    first = pattern.search(text)
+    if first is None:
+        return None
+    prefix = suffix = ""
+    if snippet_chars is not None and len(text) > snippet_chars:
+        start = max(0, first.start() - snippet_chars // 3)
+        end = min(len(text), start + snippet_chars)
+        prefix = "…" if start > 0 else ""
+        suffix = "…" if end < len(text) else ""
+        text = text[start:end]
+    parts = []
+    last = 0
+    for match in pattern.finditer(text):
+        parts.append(html.escape(text[last:match.start()]))
+        parts.append(f"<mark>{html.escape(match.group())}</mark>")
+        last = match.end()
+    parts.append(html.escape(text[last:]))
+    return prefix + "".join(parts) + suffix
+
+# 搜索标准和术语
+# 1. 术语按中英文名称、定义做子串匹配（ILIKE，由 pg_trgm 三元组索引加速），英文名称和定义同时做全文检索（词干匹配）
+# 2. 标准按编号、中英文文档名称做子串匹配
+# 3. 排序：名称完全相同 > 名称前缀匹配 > 名称包含 > 仅定义/全文命中，同档内按 ts_rank 排序
+# 4. fuzzy=True 时额外按 pg_trgm 相似度匹配术语名称，容忍拼写错误
+async def search_standards_service(q: str, scope: str, limit: int, offset: int, fuzzy: bool) -> StandardSearchResponse:
+    q = q.strip()
+    if not q:
+        raise HTTPException(status_code=400, detail="Search query must not be empty")
+
+    params = {
+        "q": q,
+        "pattern": f"%{escape_like(q)}%",
+        "prefix": f"{escape_like(q)}%",
+        "normalized_pattern": f"%{escape_like(normalize_standard_id(q))}%",
+        "limit": limit,
+        "offset": offset,
+    }
+
+    term_match = f"""
+        t.term ILIKE %(pattern)s OR t.term_english ILIKE %(pattern)s OR t.definition ILIKE %(pattern)s
+        OR {TERMS_TSVECTOR} @@ websearch_to_tsquery('english', %(q)s)
+    """
+    term_rank = f"""
+        CASE
+            WHEN lower(t.term) = lower(%(q)s) OR lower(t.term_english) = lower(%(q)s) THEN 4
+            WHEN t.term ILIKE %(prefix)s OR t.term_english ILIKE %(prefix)s THEN 3
+            WHEN t.term ILIKE %(pattern)s OR t.term_english ILIKE %(pattern)s THEN 2
+            ELSE 0
+        END
+        + ts_rank({TERMS_TSVECTOR}, websearch_to_tsquery('english', %(q)s))
+    """
+    if fuzzy:
+        term_match += " OR t.term %% %(q)s OR t.term_english %% %(q)s"
+        term_rank += " + GREATEST(similarity(t.term, %(q)s), similarity(t.term_english, %(q)s))"
+
+    selects = []
+    if scope in ("all", "terms"):
+        selects.append(f"""
+            SELECT 'term' AS kind, s.standard_id, s.document_name, s.document_name_english,
+                   t.term_id, t.term, t.term_english, t.definition,
+                   ({term_rank})::float AS rank, s.id AS standards_pk, t.id AS term_pk
+            FROM terms t
+            JOIN standards s ON s.id = t.standard_id
+            WHERE {term_match}
+        """)
+    if scope in ("all", "standards"):
+        selects.append("""
+            SELECT 'standard' AS kind, s.standard_id, s.document_name, s.document_name_english,
+                   NULL, NULL, NULL, NULL,
+                   (CASE
+                       WHEN s.standard_id_normalized = replace(%(q)s, ' ', '') THEN 4
+                       WHEN s.document_name ILIKE %(prefix)s OR s.document_name_english ILIKE %(prefix)s THEN 3
+                       ELSE 2
+                   END)::float AS rank, s.id AS standards_pk, NULL AS term_pk
+            FROM standards s
+            WHERE s.standard_id_normalized ILIKE %(normalized_pattern)s
+               OR s.document_name ILIKE %(pattern)s
+               OR s.document_name_english ILIKE %(pattern)s
+        """)
+
+    query = f"""
+        SELECT hits.*, COUNT(*) OVER () AS total
+        FROM ({" UNION ALL ".join(selects)}) hits
+        ORDER BY rank DESC, kind DESC, standards_pk, term_pk
+        LIMIT %(limit)s OFFSET %(offset)s
+    """
+
+    try:
+        async with get_b_db_connection() as conn, conn.cursor(row_factory=dict_row) as cursor:
+            await cursor.execute(query, params)
+            rows = await cursor.fetchall()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error searching standards: {e}")
+
+    keywords = q.split()
+    items = []
+    for row in rows:
+        highlights = {
+            "standardID": _highlight(row["standard_id"], keywords),
+            "documentName": _highlight(row["document_name"], keywords),
+            "documentNameEnglish": _highlight(row["document_name_english"], keywords),
+            "term": _highlight(row["term"], keywords),
+            "termEnglish": _highlight(row["term_english"], keywords),
+            "definition": _highlight(row["definition"], keywords, snippet_chars=160),
+        }
+        items.append(StandardSearchHit(
+            kind=row["kind"],
+            standardID=row["standard_id"],
+            documentName=row["document_name"],
+            documentNameEnglish=row["document_name_english"],
+            termID=row["term_id"],
+            term=row["term"],
+            termEnglish=row["term_english"],
+            definition=row["definition"],
+            rank=row["rank"],
+            highlights={field: value for field, value in highlights.items() if value},
+        ))
+
+    # 超出最后一页时窗口函数没有行可返回，总数无法得知，返回 0
+    total = rows[0]["total"] if rows else 0
+    return StandardSearchResponse(total=total, items=items)
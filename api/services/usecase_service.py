@@ -1,486 +1,709 @@
 from api.schemas.usecase import UseCase, UserStory
 from api.utils.db import get_b_db_connection
 from fastapi import HTTPException
-from api.schemas.usecase import PRDData
+from api.schemas.usecase import PRDData, PRDRecords, PRDImportResult, PRDBulkImportResponse, DetailKey, DetailResult, DetailsBatchResponse
+from api.config import PRD_IMPORT_CHUNK_SIZE, PRD_IMPORT_MAX_DOCUMENTS
+from typing import Dict, List, Optional, Tuple, Union
+from psycopg import Rollback
+from psycopg.rows import dict_row
+from api.services.uur_graph import invalidate_graph_snapshot
+from api.services.dimension_cache import DIMENSION_TABLES, dimension_cache
+from api.services.standard_service import normalize_standard_id, escape_like
+from api.utils.pagination import encode_cursor, decode_cursor
+from api.utils.response_cache import invalidate_response_cache
+import asyncio
+import json
+from dataclasses import dataclass
 import logging
+from uuid import UUID
 
 logger = logging.getLogger(__name__)
 
-def get_all_ucus():
+async def get_all_ucus():
     try:
-        conn = get_b_db_connection()
-        cursor = conn.cursor()
-
-        # 查询所有用例（usecase）和用户故事（userstory）
-        cursor.execute("""
-            SELECT uc.uc_id, uc.name AS usecase_name, uc.description AS usecase_description,
-                   us.us_id, us.description AS userstory_description
-            FROM usecase uc
-            LEFT JOIN userstory us ON us.uc_id = uc.uc_id
-            ORDER BY uc.uc_id, us.us_id
-        """)
-
-        result = cursor.fetchall()
-
-        # 将查询结果按照 UseCase 和 UserStory 的层级结构组织
-        usecases = {}
-        for row in result:
-            uc_id = row[0]
-
-            if uc_id not in usecases:
-                # 格式化 uc_id 为 UC + 六位数字
-                formatted_uc_id = f"UC-{uc_id:06}"
-                usecases[uc_id] = {
-                    "id": formatted_uc_id,  # 使用格式化后的 id
-                    "name": row[1],
-                    "description": row[2],
-                    "userstories": []
-                }
-
-            # 如果有 userstory，添加到对应的 usecase 中
-            if row[3] is not None:  # 如果存在 userstory
-                # 格式化 us_id 为 US + 六位数字
-                formatted_us_id = f"US-{row[3]:06}"
-                usecases[uc_id]["userstories"].append({
-                    "id": formatted_us_id,  # 使用格式化后的 id
-                    "description": row[4]
-                })
-
-        # 将结构转换为对应的 Pydantic 模型格式并返回
-        return [
-            UseCase(
-                id=uc["id"],
-                name=uc["name"],
-                description=uc["description"],
-                userstories=[
-                    UserStory(
-                        id=us["id"],
-                        description=us["description"]
-                    ) for us in uc["userstories"]
-                ]
-            ) for uc in usecases.values()
-        ]
-    
+        async with get_b_db_connection() as conn, conn.cursor() as cursor:
+            # 查询所有用例（usecase）和用户故事（userstory）
+            await cursor.execute("""
+                SELECT uc.uc_id, uc.name AS usecase_name, uc.description AS usecase_description,
+                       us.us_id, us.description AS userstory_description
+                FROM usecase uc
+                LEFT JOIN userstory us ON us.uc_id = uc.uc_id
+                ORDER BY uc.uc_id, us.us_id
+            """)
+
+            result = await cursor.fetchall()
+
+            # 将查询结果按照 UseCase 和 UserStory 的层级结构组织
+            usecases = {}
+            for row in result:
+                uc_id = row[0]
+
+                if uc_id not in usecases:
+                    # 格式化 uc_id 为 UC + 六位数字
+                    formatted_uc_id = f"UC-{uc_id:06}"
+                    usecases[uc_id] = {
+                        "id": formatted_uc_id,  # 使用格式化后的 id
+                        "name": row[1],
+                        "description": row[2],
+                        "userstories": []
+                    }
+
+                # 如果有 userstory，添加到对应的 usecase 中
+                if row[3] is not None:  # 如果存在 userstory
+                    # 格式化 us_id 为 US + 六位数字
+                    formatted_us_id = f"US-{row[3]:06}"
+                    usecases[uc_id]["userstories"].append({
+                        "id": formatted_us_id,  # 使用格式化后的 id
+                        "description": row[4]
+                    })
+
+            # 将结构转换为对应的 Pydantic 模型格式并返回
+            return [
+                UseCase(
+                    id=uc["id"],
+                    name=uc["name"],
+                    description=uc["description"],
+                    userstories=[
+                        UserStory(
+                            id=us["id"],
+                            description=us["description"]
+                        ) for us in uc["userstories"]
+                    ]
+                ) for uc in usecases.values()
+            ]
+
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        cursor.close()
-        conn.close()
-
-async def get_details(id: str, uuid: str):
-    conn = get_b_db_connection()  # 使用 get_b_db_connection
-    cur = conn.cursor()  # 使用默认 cursor
 
+# 节点详情查询：id 前缀 -> 按 uuid 批量查询的语句，每种节点一条语句，名称和关联在数据库中联结取回
+DETAIL_QUERIES = {
+    "UC-": """
+        SELECT
+            uc.uc_id, uc.name, uc.description, uc.system, uc.primary_actor, uc.secondary_actor,
+            uc.precondition, uc.success_end_condition, uc.failed_end_condition,
+            uc.main_success_scenario, uc.extensions AS extension_scenario,
+            uc.io_variations AS "IO_variations",
+            uc.uc_appendix_id, uc.uuid, uc.created_time, uc.created_by, uc.modified_time, uc.modified_by
+        FROM usecase uc
+        WHERE uc.uuid = ANY(%s::uuid[])
+    """,
+    "US-": """
+        SELECT
+            us.us_id, us.description, us.uc_id, us.status_id, s.status_name,
+            us.user_journey_id, uj.name AS user_journey_name,
+            us.acceptance_criteria, us.valid_vehicle, us.uuid, us.uuid_uc,
+            us.created_time, us.created_by, us.modified_time, us.modified_by
+        FROM userstory us
+        LEFT JOIN status s ON us.status_id = s.status_id
+        LEFT JOIN userjourney uj ON us.user_journey_id = uj.user_journey_id
+        WHERE us.uuid = ANY(%s::uuid[])
+    """,
+    "REQ-": """
+        SELECT
+            req.requirement_id, req.name, req.description, req.requirement_type, req.asil AS "ASIL",
+            (SELECT r.uc_id FROM req_uc_relations r WHERE r.requirement_id = req.requirement_id ORDER BY r.uc_id LIMIT 1) AS uc_id,
+            req.standard_id, req.source, req.purpose, req.verification_method, req.uuid,
+            req.created_time, req.created_by, req.modified_time, req.modified_by
+        FROM requirement req
+        WHERE req.uuid = ANY(%s::uuid[])
+    """,
+}
+
+DETAIL_NOT_FOUND = {"UC-": "Usecase not found", "US-": "Userstory not found", "REQ-": "Requirement not found"}
+
+
+# 返回 id 对应的节点类型前缀，无法识别时返回 None
+def _detail_prefix(id: str) -> Optional[str]:
+    return next((prefix for prefix in DETAIL_QUERIES if id.startswith(prefix)), None)
+
+
+# 将查询结果转换为详情格式：编号格式化为 前缀 + 六位数字
+def _format_detail(prefix: str, row: dict) -> dict:
+    if prefix == "UC-":
+        return dict(row, uc_id=f"UC-{str(row['uc_id']).zfill(6)}")
+    if prefix == "US-":
+        return dict(
+            row,
+            us_id=f"US-{str(row['us_id']).zfill(6)}",
+            uc_id=f"UC-{str(row['uc_id']).zfill(6)}" if row["uc_id"] else None,
+        )
+    return dict(
+        row,
+        requirement_id=f"REQ-{str(row['requirement_id']).zfill(6)}",
+        uc_id=f"UC-{str(row['uc_id']).zfill(6)}" if row["uc_id"] else None,
+    )
+
+
+# 批量查询节点详情，keys 为 (id 前缀, 标准格式的 uuid)，每种节点类型一次查询
+# 返回 (id 前缀, uuid) -> 详情，不存在的节点不在结果中
+async def load_details(cur, keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], dict]:
+    uuids_by_prefix: Dict[str, List[str]] = {}
+    for prefix, uuid in keys:
+        uuids_by_prefix.setdefault(prefix, []).append(uuid)
+
+    details = {}
+    for prefix, uuids in uuids_by_prefix.items():
+        await cur.execute(DETAIL_QUERIES[prefix], (list(dict.fromkeys(uuids)),))
+        for row in await cur.fetchall():
+            details[(prefix, str(row["uuid"]))] = _format_detail(prefix, row)
+    return details
+
+
+# 解析 uuid，返回标准格式的字符串，格式错误时返回 None
+def _normalize_uuid(value: str) -> Optional[str]:
     try:
-        # 判断查询的是哪个表，通过id前缀判断
-        if id.startswith("UC-"):
-            # 查询 usecase 表
-            cur.execute("""
-                SELECT 
-                    uc_id, name, description, system, primary_actor, secondary_actor, 
-                    precondition, success_end_condition, failed_end_condition, 
-                    main_success_scenario, extensions AS extension_scenario, 
-                    io_variations AS IO_variations,
-                    uc_appendix_id, uuid, created_time, created_by, modified_time, modified_by 
-                FROM usecase 
-                WHERE uuid = %s
-            """, (uuid,))
-            data = cur.fetchone()
-
-            if data is None:
-                raise HTTPException(status_code=404, detail="Usecase not found")
-
-            # 返回查询到的数据
-            return {
-                "uc_id": f"UC-{str(data[0]).zfill(6)}",
-                "name": data[1],
-                "description": data[2],
-                "system": data[3],
-                "primary_actor": data[4],
-                "secondary_actor": data[5],
-                "precondition": data[6],
-                "success_end_condition": data[7],
-                "failed_end_condition": data[8],
-                "uc_appendix_id": data[9],
-                "uuid": data[10],
-                "created_time": data[11],
-                "created_by": data[12],
-                "modified_time": data[13],
-                "modified_by": data[14]
-            }
-
-        elif id.startswith("US-"):
-            # 查询 userstory 表
-            cur.execute("""
-                SELECT 
-                    us_id, description, uc_id, status_id, user_journey_id, 
-                    acceptance_criteria, valid_vehicle, uuid, uuid_uc, 
-                    created_time, created_by, modified_time, modified_by
-                FROM userstory 
-                WHERE uuid = %s
-            """, (uuid,))
-            data = cur.fetchone()
-
-            if data is None:
-                raise HTTPException(status_code=404, detail="Userstory not found")
-
-            # 查询 status 表，获取 status_name
-            cur.execute("SELECT status_name FROM status WHERE status_id = %s", (data[3],))
-            status = cur.fetchone()
-            status_name = status[0] if status else None
-
-            # 查询 userjourney 表，获取 user_journey_name
-            cur.execute("SELECT name AS user_journey_name FROM userjourney WHERE user_journey_id = %s", (data[4],))
-            user_journey = cur.fetchone()
-            user_journey_name = user_journey[0] if user_journey else None
-
-            # 返回查询到的数据
-            return {
-                "us_id": f"US-{str(data[0]).zfill(6)}", 
-                "description": data[1],
-                "uc_id": f"UC-{str(data[2]).zfill(6)}" if data[2] else None, 
-                "status_id": data[3],
-                "status_name": status_name,
-                "user_journey_id": data[4],
-                "user_journey_name": user_journey_name,
-                "acceptance_criteria": data[5],
-                "valid_vehicle": data[6],
-                "uuid": data[7],
-                "uuid_uc": data[8],
-                "created_time": data[9],
-                "created_by": data[10],
-                "modified_time": data[11],
-                "modified_by": data[12]
-            }
-
-        elif id.startswith("REQ-"):
-            # 查询 requirement 表
-            cur.execute("""
-                SELECT 
-                    requirement_id, name, description, requirement_type, standard_id, source, 
-                    purpose, verification_method, uuid, asil, created_time, created_by, 
-                    modified_time, modified_by 
-                FROM requirement 
-                WHERE uuid = %s
-            """, (uuid,))
-            data = cur.fetchone()
-
-            if data is None:
-                raise HTTPException(status_code=404, detail="Requirement not found")
-
-            # 查询 req_uc_relations 表，获取 uc_id
-            cur.execute("SELECT uc_id FROM req_uc_relations WHERE requirement_id = %s", (data[0],))
-            uc_relation = cur.fetchone()
-            uc_id = uc_relation[0] if uc_relation else None
-
-            # 返回查询到的数据
-            return {
-                "requirement_id": f"REQ-{str(data[0]).zfill(6)}",
-                "name": data[1],
-                "description": data[2],
-                "requirement_type": data[3],
-                "ASIL": data[4],
-                "uc_id": f"UC-{str(uc_id).zfill(6)}" if uc_id else None,
-                "standard_id": data[5],
-                "source": data[6],
-                "purpose": data[7],
-                "verification_method": data[8],
-                "uuid": data[9],
-                "created_time": data[10],
-                "created_by": data[11],
-                "modified_time": data[12],
-                "modified_by": data[13]
-            }
+        return str(UUID(value))
+    except (ValueError, AttributeError):
+        return None
 
-        else:
-            raise HTTPException(status_code=400, detail="Invalid ID format")
 
-    except HTTPException as e:
-        # 捕获 HTTP 异常并返回对应的错误信息
-        raise e
+# 查询单个节点的详情，节点类型由 id 前缀（UC- / US- / REQ-）决定，按 uuid 查找
+async def get_details(id: str, uuid: str):
+    prefix = _detail_prefix(id)
+    if prefix is None:
+        raise HTTPException(status_code=400, detail="Invalid ID format")
+    key = (prefix, _normalize_uuid(uuid))
+    if key[1] is None:
+        raise HTTPException(status_code=400, detail="Invalid UUID format")
+
+    try:
+        async with get_b_db_connection() as conn, conn.cursor(row_factory=dict_row) as cur:
+            details = await load_details(cur, [key])
     except Exception as e:
         # 捕获所有其他类型的异常，返回 500 错误
+        logger.error(f"Error fetching details: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
-    finally:
-        cur.close()
-        conn.close()
+    if key not in details:
+        raise HTTPException(status_code=404, detail=DETAIL_NOT_FOUND[prefix])
+    return details[key]
 
-async def get_us_table_service():
-    conn = get_b_db_connection()
-    cur = conn.cursor()
 
-    try:
-        cur.execute("""
-            SELECT 
-                us.us_id, 
-                us.description, 
-                s.status_name, 
-                uj.name AS user_journey_name, 
-                us.valid_vehicle, 
-                us.uuid
-            FROM userstory us
-            LEFT JOIN status s ON us.status_id = s.status_id
-            LEFT JOIN userjourney uj ON us.user_journey_id = uj.user_journey_id
-        """)
-        userstories = cur.fetchall()
-
-        result = [
-            {
-                "us_id": f"US-{str(us[0]).zfill(6)}",
-                "description": us[1],
-                "status_name": us[2],
-                "user_journey_name": us[3],
-                "valid_vehicle": us[4],
-                "uuid": us[5]
-            }
-            for us in userstories
-        ]
-
-        return result
+# 批量查询节点详情，一次请求返回图中多个节点的详情，结果顺序与请求一致
+# 单个节点的 id 或 uuid 格式错误、节点不存在时只影响该节点的结果
+async def get_details_batch(items: List[DetailKey]) -> DetailsBatchResponse:
+    keys = [(_detail_prefix(item.id), _normalize_uuid(item.uuid)) for item in items]
+    valid_keys = [key for key in keys if key[0] is not None and key[1] is not None]
 
+    try:
+        async with get_b_db_connection() as conn, conn.cursor(row_factory=dict_row) as cur:
+            details = await load_details(cur, valid_keys)
     except Exception as e:
-        raise e
-
-    finally:
-        cur.close()
-        conn.close()
-# 校验并获取或创建 user_journey_id
-def get_or_create_user_journey(cur, name: str):
-    query = "SELECT user_journey_id FROM userjourney WHERE name = %s"
-    cur.execute(query, (name,))
-    result = cur.fetchone()
-    if (result):
-        return result[0]
-    else:
-        query = "INSERT INTO userjourney (name) VALUES (%s) RETURNING user_journey_id"
-        cur.execute(query, (name,))
-        return cur.fetchone()[0]
-
-# 校验并获取或创建 status_id
-def get_or_create_status(cur, status_name: str):
-    query = "SELECT status_id FROM status WHERE status_name = %s"
-    cur.execute(query, (status_name,))
-    result = cur.fetchone()
-    if (result):
-        return result[0]
-    else:
-        query = "INSERT INTO status (status_name) VALUES (%s) RETURNING status_id"
-        cur.execute(query, (status_name,))
-        return cur.fetchone()[0]
-
-# 校验并获取或创建 stakeholder_id
-def get_or_create_stakeholder(cur, name: str):
-    query = "SELECT stakeholder_id FROM stakeholder WHERE name = %s"
-    cur.execute(query, (name,))
-    result = cur.fetchone()
-    if (result):
-        return result[0]
-    else:
-        query = "INSERT INTO stakeholder (name) VALUES (%s) RETURNING stakeholder_id"
-        cur.execute(query, (name,))
-        return cur.fetchone()[0]
-
-# 校验并获取或创建 interest_id
-def get_or_create_interest(cur, description: str):
-    query = "SELECT interest_id FROM interest WHERE description = %s"
-    cur.execute(query, (description,))
-    result = cur.fetchone()
-    if (result):
-        return result[0]
-    else:
-        query = "INSERT INTO interest (description) VALUES (%s) RETURNING interest_id"
-        cur.execute(query, (description,))
-        return cur.fetchone()[0]
-
-def get_or_create_standard(cur, standard_id: str, document_name: str):
-    # 检查是否已存在
-    query = "SELECT id FROM standards WHERE standard_id = %s"
-    cur.execute(query, (standard_id,))
-    result = cur.fetchone()
-    
-    if result:
-        return result[0]
-    else:
-        # 插入新记录
-        query = "INSERT INTO standards (standard_id, document_name) VALUES (%s, %s) RETURNING id"
-        cur.execute(query, (standard_id, document_name))
-        return cur.fetchone()[0]
+        logger.error(f"Error fetching details batch: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
 
-async def process_prd_data_service(data: PRDData):
-    conn = get_b_db_connection()
-    cur = conn.cursor()
+    results = []
+    for item, (prefix, uuid) in zip(items, keys):
+        if prefix is None:
+            results.append(DetailResult(id=item.id, uuid=item.uuid, status="error", error="Invalid ID format"))
+        elif uuid is None:
+            results.append(DetailResult(id=item.id, uuid=item.uuid, status="error", error="Invalid UUID format"))
+        elif (prefix, uuid) not in details:
+            results.append(DetailResult(id=item.id, uuid=item.uuid, status="not_found", error=DETAIL_NOT_FOUND[prefix]))
+        else:
+            results.append(DetailResult(id=item.id, uuid=item.uuid, status="ok", detail=details[(prefix, uuid)]))
+    return DetailsBatchResponse(items=results)
+
+# 用户故事列表的排序字段 -> 排序表达式，可为空的列按空字符串排序，保证 keyset 分页的排序键非空
+USER_STORY_SORT_KEYS = {
+    "us_id": "us.us_id",
+    "status": "COALESCE(s.status_name, '')",
+    "user_journey": "COALESCE(uj.name, '')",
+    "valid_vehicle": "COALESCE(us.valid_vehicle, '')",
+}
+
+# 获取用户故事列表，返回 (用户故事列表, 下一页游标)
+# 过滤和排序都在数据库中完成：状态、用户旅程按名称精确匹配，q 对描述做子串匹配；
+# 传入 limit 时按 (排序键, us_id) 做 keyset 分页，不传时返回全部
+async def get_us_table_service(
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    user_journey: Optional[str] = None,
+    valid_vehicle: Optional[str] = None,
+    q: Optional[str] = None,
+    sort: str = "us_id",
+    order: str = "asc",
+) -> Tuple[List[dict], Optional[str]]:
+    sort_expr = USER_STORY_SORT_KEYS[sort]
+    descending = order == "desc"
+    after_key = after_id = None
+    if cursor:
+        cursor_sort, cursor_order, after_key, after_id = decode_cursor(cursor, 4)
+        if (cursor_sort, cursor_order) != (sort, order):
+            raise HTTPException(status_code=400, detail="Cursor does not match the requested sort")
+
+    # 维度按名称过滤时先解析出 id，使 (status_id, us_id) 等索引可用
+    conditions = []
+    if status is not None:
+        conditions.append("us.status_id IN (SELECT status_id FROM status WHERE status_name = %(status)s)")
+    if user_journey is not None:
+        conditions.append("us.user_journey_id IN (SELECT user_journey_id FROM userjourney WHERE name = %(user_journey)s)")
+    if valid_vehicle is not None:
+        # valid_vehicle 存放以换行分隔的车型列表，按成员匹配（GIN 表达式索引见迁移 007）
+        conditions.append("string_to_array(us.valid_vehicle, E'\\n') @> ARRAY[%(valid_vehicle)s]::text[]")
+    if q:
+        conditions.append("us.description ILIKE %(pattern)s")
+    if after_id is not None:
+        op = "<" if descending else ">"
+        if sort == "us_id":
+            conditions.append(f"us.us_id {op} %(after_id)s")
+        else:
+            conditions.append(f"({sort_expr}, us.us_id) {op} (%(after_key)s, %(after_id)s)")
+
+    direction = "DESC" if descending else "ASC"
+    order_by = f"us.us_id {direction}" if sort == "us_id" else f"{sort_expr} {direction}, us.us_id {direction}"
+    query = f"""
+        SELECT
+            us.us_id,
+            us.description,
+            s.status_name,
+            uj.name AS user_journey_name,
+            us.valid_vehicle,
+            us.uuid,
+            {sort_expr} AS sort_key
+        FROM userstory us
+        LEFT JOIN status s ON us.status_id = s.status_id
+        LEFT JOIN userjourney uj ON us.user_journey_id = uj.user_journey_id
+        {"WHERE " + " AND ".join(conditions) if conditions else ""}
+        ORDER BY {order_by}
+    """
+    if limit is not None:
+        query += " LIMIT %(limit)s"  # 多取一条用于判断是否还有下一页
+    params = {
+        "status": status,
+        "user_journey": user_journey,
+        "valid_vehicle": valid_vehicle,
+        "pattern": f"%{escape_like(q)}%" if q else None,
+        "after_key": after_key,
+        "after_id": after_id,
+        "limit": limit + 1 if limit is not None else None,
+    }
 
     try:
-        # Step 1: Get or create user_journey_id
-        user_journey_name = data.chapters[0]["sections"][0]["subsections"][0]["verticalHeaderTable"][0]["userJourney"]
-        user_journey_id = get_or_create_user_journey(cur, user_journey_name)
-        logger.debug(f"Step 1 - User Journey ID: {user_journey_id}")
-
-        # Step 2: Get or create status_id
-        status_name = None
-        for item in data.chapters[0]["sections"][0]["subsections"][0]["verticalHeaderTable"]:
-            if isinstance(item, dict) and "status" in item:
-                status_name = item["status"]
-                break
-        
-        if not status_name:
-            raise HTTPException(status_code=400, detail="'status' field is missing in verticalHeaderTable")
-        
-        status_id = get_or_create_status(cur, status_name)
-        logger.debug(f"Step 2 - Status ID: {status_id}")
-
-        # Step 3: Insert Appendix data into uc_appendix
-        appendix_data = data.chapters[3]["sections"][0]["subsections"][0]["horizontalHeaderTable"]
-        
-        # Convert to a string (e.g., JSON format) for table_txt
-        appendix_table_txt = str(appendix_data)  # You could also use JSON.stringify() or other formatting methods
-        
-        # Insert into uc_appendix
-        query = """
-        INSERT INTO uc_appendix (table_txt)
-        VALUES (%s) RETURNING id
-        """
-        cur.execute(query, (appendix_table_txt,))
-        uc_appendix_id = cur.fetchone()[0]
-        logger.debug(f"Step 3 - uc_appendix ID: {uc_appendix_id}")
-
-        # Step 4: Process UseCase related data
-        use_case_description = data.chapters[1]["sections"][1]["subsections"][0]["description"]
-        use_case_overview = data.chapters[1]["sections"][1]["subsections"][0]["verticalHeaderTable"][0]["overview"]
-        primary_actor = data.chapters[1]["sections"][1]["subsections"][0]["verticalHeaderTable"][3]["primaryActor"]
-        secondary_actors = "\n".join(data.chapters[1]["sections"][1]["subsections"][0]["verticalHeaderTable"][4]["secondaryActors"])
-        preconditions = "\n".join(data.chapters[1]["sections"][1]["subsections"][0]["verticalHeaderTable"][5]["preconditions"])
-        success_end_conditions = "\n".join(data.chapters[1]["sections"][1]["subsections"][0]["verticalHeaderTable"][6]["successEndConditions"])
-        fail_protection_conditions = "\n".join(data.chapters[1]["sections"][1]["subsections"][0]["verticalHeaderTable"][7]["failProtectionConditions"])
-        main_success_scenario = data.chapters[1]["sections"][2]["subsections"][0]["horizontalHeaderTable"]
-        main_success_scenario_str = str(main_success_scenario)  # Store as string, you can format it better if needed
-        extensions_data = data.chapters[1]["sections"][3]["subsections"]
-        extensions_str = str(extensions_data)  # Store as string, format as needed
-        io_variations_data = data.chapters[1]["sections"][4]["subsections"]
-        io_variations_str = str(io_variations_data)  # Store as string, format as needed
-
-        # Insert into usecase table
-        query = """
-        INSERT INTO usecase (name, description, system, primary_actor, secondary_actor, precondition, success_end_condition, failed_end_condition, uc_appendix_id, main_success_scenario, extensions, io_variations)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s) RETURNING uc_id, uuid
-        """
-        cur.execute(query, (
-            use_case_description, use_case_overview, "All_Vehicle", primary_actor, 
-            secondary_actors, preconditions, success_end_conditions, fail_protection_conditions, uc_appendix_id, main_success_scenario_str, extensions_str, io_variations_str
-        ))
-        use_case = cur.fetchone()
-        use_case_id = use_case[0]
-        use_case_uuid = use_case[1]
-        logger.debug(f"Step 4 - Use Case ID: {use_case_id}; Use Case UUID: {use_case_uuid}")
-
-        # Step 5: 提取 regulations 字段
-        regulations = data.chapters[1]["sections"][1]["subsections"][0]["verticalHeaderTable"][2]["regulations"]
-        # 解析 regulations
-        for regulation in regulations:
-            standard_id, document_name = regulation.split(" - ", 1)
-            
-            # 调用函数获取或创建 standard_id
-            id = get_or_create_standard(cur, standard_id, document_name)
-
-            # Insert into std_uc_relations
-            query = """
+        async with get_b_db_connection() as conn, conn.cursor() as cur:
+            await cur.execute(query, params)
+            userstories = await cur.fetchall()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching user story table: {e}")
+
+    result = [
+        {
+            "us_id": f"US-{str(us[0]).zfill(6)}",
+            "description": us[1],
+            "status_name": us[2],
+            "user_journey_name": us[3],
+            "valid_vehicle": us[4],
+            "uuid": us[5]
+        }
+        for us in userstories[:limit]
+    ]
+    next_cursor = None
+    if limit is not None and len(userstories) > limit:
+        last = userstories[limit - 1]
+        next_cursor = encode_cursor(sort, order, last[6], last[0])
+    return result, next_cursor
+
+# 批量获取或创建维度记录（userjourney / status / stakeholder / interest），返回 名称 -> id
+# 先查维度缓存，未命中的名称用一条语句完成：已存在的行由 SELECT 取回，新行由 INSERT ... ON CONFLICT DO NOTHING RETURNING 取回
+# 并发导入时其他事务刚提交的行对本语句的快照不可见，缺失的名称会再查询一次
+async def upsert_dimension(cur, table: str, names: List[str]) -> Dict[str, int]:
+    id_column, name_column = DIMENSION_TABLES[table]
+    ids, pending = dimension_cache.lookup(table, list(dict.fromkeys(names)))
+    for _ in range(3):
+        if not pending:
+            break
+        await cur.execute(f"""
+            WITH input AS (
+                SELECT DISTINCT unnest(%s::text[]) AS name
+            ),
+            inserted AS (
+                INSERT INTO {table} ({name_column})
+                SELECT name FROM input
+                ON CONFLICT ({name_column}) DO NOTHING
+                RETURNING {id_column}, {name_column}
+            )
+            SELECT {id_column}, {name_column} FROM inserted
+            UNION ALL
+            SELECT t.{id_column}, t.{name_column} FROM {table} t JOIN input ON t.{name_column} = input.name
+        """, (pending,))
+        ids.update({name: id for id, name in await cur.fetchall()})
+        pending = [name for name in pending if name not in ids]
+    if pending:
+        raise RuntimeError(f"Failed to resolve {table} ids for: {pending}")
+    return ids
+
+# 批量获取或创建标准，返回 去除空格后的 standard_id -> standards.id
+# 已存在的标准保留原有的 standard_id 和 document_name，同一批中重复的标准以第一次出现的为准
+async def upsert_standards(cur, regulations: List[Tuple[str, str]]) -> Dict[str, int]:
+    regulations = [(normalize_standard_id(standard_id), standard_id, document_name) for standard_id, document_name in regulations]
+    ids, _ = dimension_cache.lookup("standards", list(dict.fromkeys(r[0] for r in regulations)))
+    pending = [r for r in regulations if r[0] not in ids]
+    for _ in range(3):
+        if not pending:
+            break
+        await cur.execute("""
+            WITH input AS (
+                SELECT DISTINCT ON (normalized) normalized, standard_id, document_name
+                FROM unnest(%s::text[], %s::text[], %s::text[]) WITH ORDINALITY AS t(normalized, standard_id, document_name, ord)
+                ORDER BY normalized, ord
+            ),
+            inserted AS (
+                INSERT INTO standards (standard_id, document_name)
+                SELECT standard_id, document_name FROM input
+                ON CONFLICT (standard_id_normalized) DO NOTHING
+                RETURNING id, standard_id_normalized
+            )
+            SELECT id, standard_id_normalized FROM inserted
+            UNION ALL
+            SELECT s.id, s.standard_id_normalized FROM standards s JOIN input ON s.standard_id_normalized = input.normalized
+        """, ([r[0] for r in pending], [r[1] for r in pending], [r[2] for r in pending]))
+        ids.update({normalized: id for id, normalized in await cur.fetchall()})
+        pending = [r for r in pending if r[0] not in ids]
+    if pending:
+        raise RuntimeError(f"Failed to resolve standards ids for: {[r[1] for r in pending]}")
+    return ids
+
+# 从 PRD 文档中提取需要写入的记录（纯函数，不访问数据库）
+def extract_prd_records(data: PRDData) -> PRDRecords:
+    header_table = data.chapters[0]["sections"][0]["subsections"][0]["verticalHeaderTable"]
+
+    # 用户旅程
+    user_journey_name = header_table[0]["userJourney"]
+
+    # 状态
+    status_name = None
+    for item in header_table:
+        if isinstance(item, dict) and "status" in item:
+            status_name = item["status"]
+            break
+
+    if not status_name:
+        raise HTTPException(status_code=400, detail="'status' field is missing in verticalHeaderTable")
+
+    # 附录，转换为字符串存入 table_txt
+    appendix_data = data.chapters[3]["sections"][0]["subsections"][0]["horizontalHeaderTable"]
+
+    # 用例
+    use_case_section = data.chapters[1]["sections"]
+    use_case_table = use_case_section[1]["subsections"][0]["verticalHeaderTable"]
+    usecase = {
+        "name": use_case_section[1]["subsections"][0]["description"],
+        "description": use_case_table[0]["overview"],
+        "system": "All_Vehicle",
+        "primary_actor": use_case_table[3]["primaryActor"],
+        "secondary_actor": "\n".join(use_case_table[4]["secondaryActors"]),
+        "precondition": "\n".join(use_case_table[5]["preconditions"]),
+        "success_end_condition": "\n".join(use_case_table[6]["successEndConditions"]),
+        "failed_end_condition": "\n".join(use_case_table[7]["failProtectionConditions"]),
+        "main_success_scenario": str(use_case_section[2]["subsections"][0]["horizontalHeaderTable"]),
+        "extensions": str(use_case_section[3]["subsections"]),
+        "io_variations": str(use_case_section[4]["subsections"]),
+    }
+
+    # 法规：格式为 "standard_id - document_name"
+    regulations = []
+    for regulation in use_case_table[2]["regulations"]:
+        standard_id, document_name = regulation.split(" - ", 1)
+        regulations.append((standard_id, document_name))
+
+    # 用户故事
+    valid_vehicles = []
+    for item in header_table:
+        if isinstance(item, dict) and "validVehicles" in item:
+            valid_vehicles = item["validVehicles"]
+            break
+
+    if not valid_vehicles:
+        raise HTTPException(status_code=400, detail="'validVehicles' field is missing or empty")
+
+    acceptance_criteria = []
+    for item in header_table:
+        if isinstance(item, dict) and "acceptanceCriteria" in item:
+            acceptance_criteria = item["acceptanceCriteria"]
+            break
+
+    if acceptance_criteria:
+        # acceptanceCriteria 中既可能是字符串也可能是字典
+        acceptance_criteria = "\n".join([ac if isinstance(ac, str) else ac.get("description", "") for ac in acceptance_criteria])
+
+    userstory = {
+        "description": data.chapters[0]["sections"][0]["subsections"][0]["description"],
+        "valid_vehicle": "\n".join(valid_vehicles),
+        "acceptance_criteria": acceptance_criteria,
+    }
+
+    # 干系人与关注点：格式为 "stakeholder : interest"
+    stakeholder_interests = []
+    for stakeholder_info in header_table[1].get("stakeholders&Interests", []):
+        if isinstance(stakeholder_info, str):
+            stakeholder_name, interest_desc = stakeholder_info.split(" : ")
+            stakeholder_interests.append((stakeholder_name, interest_desc))
+
+    # 功能设计需求
+    requirements = [
+        {
+            "name": req["requirementName"],
+            "description": req["description"],
+            "requirement_type": req["requirementType"],
+            "asil": req["ASIL"],
+            "source": req["source"],
+        }
+        for req in data.chapters[2]["sections"][0]["subsections"][0]["horizontalHeaderTable"]
+    ]
+
+    return PRDRecords(
+        user_journey=user_journey_name,
+        status=status_name,
+        appendix=str(appendix_data),
+        usecase=usecase,
+        regulations=regulations,
+        userstory=userstory,
+        stakeholder_interests=stakeholder_interests,
+        requirements=requirements,
+    )
+
+# 批量获取或创建一组 PRD 用到的全部维度记录，同名记录在整批中只查询一次
+# 返回 维度表 -> (名称 -> id)，事务提交后调用方需将结果写入维度缓存
+async def resolve_prd_dimensions(cur, records_list: List[PRDRecords]) -> Dict[str, Dict[str, int]]:
+    return {
+        "userjourney": await upsert_dimension(cur, "userjourney", [r.user_journey for r in records_list]),
+        "status": await upsert_dimension(cur, "status", [r.status for r in records_list]),
+        "stakeholder": await upsert_dimension(cur, "stakeholder", [s for r in records_list for s, _ in r.stakeholder_interests]),
+        "interest": await upsert_dimension(cur, "interest", [i for r in records_list for _, i in r.stakeholder_interests]),
+        "standards": await upsert_standards(cur, [reg for r in records_list for reg in r.regulations]),
+    }
+
+# 写入一份 PRD 的用例、用户故事、需求及关系，维度 id 由 resolve_prd_dimensions 提供
+# 语句数固定，与需求、干系人、法规的数量无关；返回 (uc_id, us_id)
+async def write_prd_records(cur, records: PRDRecords, dimension_ids: Dict[str, Dict[str, int]]) -> Tuple[int, int]:
+    user_journey_id = dimension_ids["userjourney"][records.user_journey]
+    status_id = dimension_ids["status"][records.status]
+    stakeholder_ids = dimension_ids["stakeholder"]
+    interest_ids = dimension_ids["interest"]
+    standard_ids = dimension_ids["standards"]
+    logger.debug(f"Step 1 - User Journey ID: {user_journey_id}; Status ID: {status_id}")
+
+    # Step 2: 附录、用例、用户故事在一条语句中写入
+    await cur.execute("""
+        WITH appendix AS (
+            INSERT INTO uc_appendix (table_txt)
+            VALUES (%(appendix)s)
+            RETURNING id
+        ),
+        uc AS (
+            INSERT INTO usecase (name, description, system, primary_actor, secondary_actor, precondition, success_end_condition, failed_end_condition, uc_appendix_id, main_success_scenario, extensions, io_variations)
+            SELECT %(name)s, %(description)s, %(system)s, %(primary_actor)s, %(secondary_actor)s, %(precondition)s, %(success_end_condition)s, %(failed_end_condition)s, appendix.id, %(main_success_scenario)s, %(extensions)s, %(io_variations)s
+            FROM appendix
+            RETURNING uc_id, uuid
+        ),
+        us AS (
+            INSERT INTO userstory (uc_id, uuid_uc, description, valid_vehicle, acceptance_criteria, status_id, user_journey_id)
+            SELECT uc.uc_id, uc.uuid, %(us_description)s, %(valid_vehicle)s, %(acceptance_criteria)s, %(status_id)s, %(user_journey_id)s
+            FROM uc
+            RETURNING us_id
+        )
+        SELECT uc.uc_id, uc.uuid, us.us_id FROM uc, us
+    """, {
+        "appendix": records.appendix,
+        **records.usecase,
+        "us_description": records.userstory["description"],
+        "valid_vehicle": records.userstory["valid_vehicle"],
+        "acceptance_criteria": records.userstory["acceptance_criteria"],
+        "status_id": status_id,
+        "user_journey_id": user_journey_id,
+    })
+    use_case_id, use_case_uuid, user_story_id = await cur.fetchone()
+    logger.debug(f"Step 2 - Use Case ID: {use_case_id}; Use Case UUID: {use_case_uuid}; User Story ID: {user_story_id}")
+
+    # Step 3: 用例与标准的关系
+    if records.regulations:
+        await cur.execute("""
             INSERT INTO std_uc_relations (standards_id, uc_id)
-            VALUES (%s, %s)                
-            """
-            cur.execute(query, (id, use_case_id))
-        logger.debug(f"Step 5 - std_uc_relations updated")
-
-        # Step 6: Store UserStory data
-        user_story_description = data.chapters[0]["sections"][0]["subsections"][0]["description"]
-        
-        # Ensure 'validVehicles' exists and handle the list properly
-        valid_vehicles = []
-        for item in data.chapters[0]["sections"][0]["subsections"][0]["verticalHeaderTable"]:
-            if isinstance(item, dict) and "validVehicles" in item:
-                valid_vehicles = item["validVehicles"]
-                break
-        
-        if not valid_vehicles:
-            raise HTTPException(status_code=400, detail="'validVehicles' field is missing or empty")
-
-        valid_vehicles = "\n".join(valid_vehicles)  # Join valid vehicles if present
-
-        # Process acceptance criteria
-        acceptance_criteria = []
-        for item in data.chapters[0]["sections"][0]["subsections"][0]["verticalHeaderTable"]:
-            if isinstance(item, dict) and "acceptanceCriteria" in item:
-                acceptance_criteria = item["acceptanceCriteria"]
-                break
-        
-        if acceptance_criteria:
-            # Modify this line to handle both strings and dictionaries in acceptanceCriteria
-            acceptance_criteria = "\n".join([ac if isinstance(ac, str) else ac.get("description", "") for ac in acceptance_criteria])
-
-        # Insert into userstory
-        query = """
-        INSERT INTO userstory (uc_id, uuid_uc, description, valid_vehicle, acceptance_criteria, status_id, user_journey_id)
-        VALUES (%s, %s, %s, %s, %s, %s, %s) RETURNING us_id
-        """
-        cur.execute(query, (use_case_id, use_case_uuid, user_story_description, valid_vehicles, acceptance_criteria, status_id, user_journey_id))
-        user_story_id = cur.fetchone()[0]
-        logger.debug(f"Step 6 - User Story ID: {user_story_id}")
-
-        # Step 7: Process Stakeholders and Interests
-        stakeholders_and_interests = data.chapters[0]["sections"][0]["subsections"][0]["verticalHeaderTable"][1].get("stakeholders&Interests", [])
-
-        for stakeholder_info in stakeholders_and_interests:
-            if isinstance(stakeholder_info, str):  # Ensure it's a string
-                stakeholder_name, interest_desc = stakeholder_info.split(" : ")
-                # Get or create stakeholder and interest
-                stakeholder_id = get_or_create_stakeholder(cur, stakeholder_name)
-                interest_id = get_or_create_interest(cur, interest_desc)
-                
-                # Insert into sta_int_us_relations
-                query = """
-                INSERT INTO sta_int_us_relations (stakeholder_id, interest_id, us_id)
-                VALUES (%s, %s, %s)
-                """
-                cur.execute(query, (stakeholder_id, interest_id, user_story_id))
-        logger.debug(f"Step 7 - Stakeholders and Interests saved")  # Add debugging output
-
-        # Step 8: Process Function Design Requirements
-        function_design_requirements = data.chapters[2]["sections"][0]["subsections"][0]["horizontalHeaderTable"]
-
-        for req in function_design_requirements:
-            requirement_name = req["requirementName"]
-            description = req["description"]
-            requirement_type = req["requirementType"]
-            asil = req["ASIL"]
-            source = req["source"]
-
-            # Insert into requirement table
-            query = """
-            INSERT INTO requirement (name, description, requirement_type, asil, source)
-            VALUES (%s, %s, %s, %s, %s) RETURNING requirement_id
-            """
-            cur.execute(query, (requirement_name, description, requirement_type, asil, source))
-            requirement_id = cur.fetchone()[0]
-
-            query = """
+            SELECT unnest(%s::int[]), %s
+        """, ([standard_ids[normalize_standard_id(standard_id)] for standard_id, _ in records.regulations], use_case_id))
+    logger.debug(f"Step 3 - std_uc_relations updated")
+
+    # Step 4: 干系人、关注点与用户故事的关系
+    if records.stakeholder_interests:
+        await cur.execute("""
+            INSERT INTO sta_int_us_relations (stakeholder_id, interest_id, us_id)
+            SELECT stakeholder_id, interest_id, %s
+            FROM unnest(%s::int[], %s::int[]) AS t(stakeholder_id, interest_id)
+        """, (
+            user_story_id,
+            [stakeholder_ids[s] for s, _ in records.stakeholder_interests],
+            [interest_ids[i] for _, i in records.stakeholder_interests],
+        ))
+    logger.debug(f"Step 4 - Stakeholders and Interests saved")
+
+    # Step 5: 需求及其与用例的关系在一条语句中写入
+    if records.requirements:
+        await cur.execute("""
+            WITH req AS (
+                INSERT INTO requirement (name, description, requirement_type, asil, source)
+                SELECT * FROM unnest(%s::text[], %s::text[], %s::text[], %s::text[], %s::text[])
+                RETURNING requirement_id
+            )
             INSERT INTO req_uc_relations (requirement_id, uc_id)
-            VALUES (%s, %s)
-            """
-            cur.execute(query, (requirement_id, use_case_id))  # use_case_id from Step 4
-        logger.debug(f"Step 8 - req_uc_relations updated")
-
-        # Step 9: Commit all changes to the database
-        conn.commit()  # Commit after all operations
-        logger.debug("Step 9 - Data committed to the database.")
-
-        return {"message": "Data successfully stored!"}
+            SELECT requirement_id, %s FROM req
+        """, (
+            *([req[column] for req in records.requirements] for column in ("name", "description", "requirement_type", "asil", "source")),
+            use_case_id,  # use_case_id from Step 2
+        ))
+    logger.debug(f"Step 5 - req_uc_relations updated")
 
-    except Exception as e:
-        conn.rollback()  # Rollback on error
-        logger.error(f"Error: {str(e)}")  # Print the error message
-        raise HTTPException(status_code=500, detail=str(e))
+    return use_case_id, user_story_id
 
-    finally:
-        cur.close()  # Close the cursor
-        conn.close()  # Close the connection
-        logger.debug("Database connection closed.")
+# 写入一份 PRD
+async def process_prd_data_service(data: PRDData):
+    async with get_b_db_connection() as conn, conn.cursor() as cur:
+        try:
+            records = extract_prd_records(data)
+
+            # Step 1: 批量获取或创建维度记录
+            dimension_ids = await resolve_prd_dimensions(cur, [records])
+            await write_prd_records(cur, records, dimension_ids)
+
+            # Step 6: Commit all changes to the database
+            await conn.commit()  # Commit after all operations
+            logger.debug("Step 6 - Data committed to the database.")
+
+            # 提交后新建的维度记录才能进入缓存
+            dimension_cache.update_all(dimension_ids)
+
+            # 通知 UUR 图快照在下一次读取时刷新，缓存的列表响应失效（导入可能新建法规）
+            invalidate_graph_snapshot()
+            await invalidate_response_cache("usecase", "standards")
+
+            return {"message": "Data successfully stored!"}
+
+        except Exception as e:
+            await conn.rollback()  # Rollback on error
+            dimension_cache.clear()  # 缓存中的 id 可能已失效（例如维度记录被外部删除），清空后按需重新填充
+            logger.error(f"Error: {str(e)}")  # Print the error message
+            raise HTTPException(status_code=500, detail=str(e))
+
+# 批量导入中无法解析或校验失败的文档
+@dataclass
+class PRDParseError:
+    error: str
+
+# 单次批量导入的文档数上限，超过时返回 413
+def _check_document_count(count: int):
+    if count > PRD_IMPORT_MAX_DOCUMENTS:
+        raise HTTPException(status_code=413, detail=f"Too many PRD documents: {count} > {PRD_IMPORT_MAX_DOCUMENTS}")
+
+# 解析并校验批量导入的文档，返回每个文档的 PRDRecords 或 PRDParseError
+# 在线程池中执行，避免大批量的 JSON 解析和提取阻塞事件循环
+def _parse_bulk_documents(body: bytes, ndjson: bool) -> List[Union[PRDRecords, PRDParseError]]:
+    if ndjson:
+        lines = [line for line in body.splitlines() if line.strip()]
+        _check_document_count(len(lines))
+        documents = []
+        for line in lines:
+            try:
+                documents.append(json.loads(line))
+            except ValueError as e:
+                documents.append(PRDParseError(f"Invalid JSON: {e}"))
+    else:
+        try:
+            documents = json.loads(body)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}")
+        if not isinstance(documents, list):
+            raise HTTPException(status_code=400, detail="Request body must be a JSON array of PRD documents")
+        _check_document_count(len(documents))
+
+    results: List[Union[PRDRecords, PRDParseError]] = []
+    for document in documents:
+        if isinstance(document, PRDParseError):
+            results.append(document)
+            continue
+        if not isinstance(document, dict):
+            results.append(PRDParseError("PRD document must be a JSON object"))
+            continue
+        try:
+            results.append(extract_prd_records(PRDData.model_validate(document)))
+        except HTTPException as e:
+            results.append(PRDParseError(str(e.detail)))
+        except Exception as e:
+            results.append(PRDParseError(f"{type(e).__name__}: {e}"))
+    return results
+
+# 在当前事务中写入一批文档：先统一解析维度记录，每个文档使用独立的 savepoint，单个文档失败只回滚该文档
+# 维度解析失败时抛出异常，由调用方回滚整批；返回本批解析出的维度 id
+async def _import_chunk(conn, cur, chunk: List[Tuple[int, PRDRecords]], results: List[Optional[PRDImportResult]]):
+    dimension_ids = await resolve_prd_dimensions(cur, [records for _, records in chunk])
+    for index, records in chunk:
+        try:
+            async with conn.transaction():
+                uc_id, us_id = await write_prd_records(cur, records, dimension_ids)
+            results[index] = PRDImportResult(index=index, status="ok", uc_id=uc_id, us_id=us_id)
+        except Exception as e:
+            logger.warning(f"Error importing PRD document {index}: {e}")
+            results[index] = PRDImportResult(index=index, status="error", error=str(e))
+    return dimension_ids
+
+# 批量导入 PRD
+# 1. 在线程池中解析和校验全部文档，无效的文档直接记为失败；文档数超过 PRD_IMPORT_MAX_DOCUMENTS 时返回 413
+#    解析是纯 Python 的 CPU 计算，受 GIL 限制多线程不能并行，只在一个线程中串行解析，避免阻塞事件循环
+# 2. 按 PRD_IMPORT_CHUNK_SIZE 分批写入，每批一个事务
+# 3. atomic=True 时整批在一个事务中写入，任一文档失败则全部回滚
+async def process_prd_bulk_service(body: bytes, ndjson: bool, atomic: bool = False) -> PRDBulkImportResponse:
+    parsed = await asyncio.to_thread(_parse_bulk_documents, body, ndjson)
+    results: List[Optional[PRDImportResult]] = [
+        PRDImportResult(index=index, status="error", error=item.error) if isinstance(item, PRDParseError) else None
+        for index, item in enumerate(parsed)
+    ]
+    pending = [(index, item) for index, item in enumerate(parsed) if isinstance(item, PRDRecords)]
+    chunks = [pending[start:start + PRD_IMPORT_CHUNK_SIZE] for start in range(0, len(pending), PRD_IMPORT_CHUNK_SIZE)]
+
+    async with get_b_db_connection() as conn, conn.cursor() as cur:
+        if atomic:
+            committed_dimension_ids = []
+            try:
+                async with conn.transaction() as tx:
+                    for chunk in chunks:
+                        committed_dimension_ids.append(await _import_chunk(conn, cur, chunk, results))
+                    # 有任何失败都回滚整批
+                    if any(result.status != "ok" for result in results):
+                        raise Rollback(tx)
+                # 只有整批提交后，新建的维度记录才能进入缓存
+                if all(result.status == "ok" for result in results):
+                    for dimension_ids in committed_dimension_ids:
+                        dimension_cache.update_all(dimension_ids)
+            except Exception as e:
+                dimension_cache.clear()
+                logger.error(f"Error resolving dimensions for import batch: {e}")
+                results = [result or PRDImportResult(index=i, status="error", error=str(e)) for i, result in enumerate(results)]
+            # 已写入但被回滚的文档标记为 rolled_back
+            if any(result.status != "ok" for result in results):
+                results = [
+                    PRDImportResult(index=i, status="rolled_back") if result.status == "ok" else result
+                    for i, result in enumerate(results)
+                ]
+        else:
+            for chunk in chunks:
+                try:
+                    async with conn.transaction():
+                        dimension_ids = await _import_chunk(conn, cur, chunk, results)
+                    dimension_cache.update_all(dimension_ids)
+                except Exception as e:
+                    dimension_cache.clear()
+                    logger.error(f"Error resolving dimensions for import chunk: {e}")
+                    for index, _ in chunk:
+                        results[index] = PRDImportResult(index=index, status="error", error=str(e))
+
+    if any(result.status == "ok" for result in results):
+        # 通知 UUR 图快照在下一次读取时刷新，缓存的列表响应失效（导入可能新建法规）
+        invalidate_graph_snapshot()
+        await invalidate_response_cache("usecase", "standards")
+
+    succeeded = sum(1 for result in results if result.status == "ok")
+    return PRDBulkImportResponse(
+        total=len(results),
+        succeeded=succeeded,
+        failed=len(results) - succeeded,
+        results=results,
+    )
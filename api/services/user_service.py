@@ -5,21 +5,20 @@ from api.utils.db import get_db_connection
 from api.schemas.user import User
 from api.schemas.auth import UpdatePasswordRequest, UpdatePasswordResponse
 from api.utils.logger import get_logger
-from api.utils.security import get_password_hash
+from api.utils.security import get_password_hash_async
+from api.services.auth_service import invalidate_cached_user
 
 logger = get_logger(__name__)
 
 # 根据用户ID获取用户信息
 async def get_user_by_id_service(user_id: int) -> Optional[User]:
-    conn = None
     try:
-        conn = get_db_connection()
-        with conn.cursor() as cur:
-            cur.execute(
+        async with get_db_connection() as conn, conn.cursor() as cur:
+            await cur.execute(
                 "SELECT user_id, user_name, email, phone_number FROM users WHERE user_id = %s",
                 (user_id,),
             )
-            result = cur.fetchone()
+            result = await cur.fetchone()
             
             if result:
                 return User(
@@ -32,16 +31,11 @@ async def get_user_by_id_service(user_id: int) -> Optional[User]:
     except Exception as e:
         logger.error(f"Error fetching user by ID {user_id}: {e}")
         raise HTTPException(status_code=500, detail="Database error")
-    finally:
-        if conn:
-            conn.close()
 
 # 更新用户信息
 async def update_user_service(user_id: int, update_data: dict) -> User:
-    conn = None
     try:
-        conn = get_db_connection()
-        with conn.cursor() as cur:
+        async with get_db_connection() as conn, conn.cursor() as cur:
             # 构建更新语句
             update_fields = []
             params = []
@@ -66,12 +60,15 @@ async def update_user_service(user_id: int, update_data: dict) -> User:
             
             # 执行更新
             query = f"UPDATE users SET {', '.join(update_fields)} WHERE user_id = %s RETURNING user_id, user_name, email, phone_number"
-            cur.execute(query, params)
-            conn.commit()
+            await cur.execute(query, params)
+            await conn.commit()
             
-            result = cur.fetchone()
+            result = await cur.fetchone()
             if not result:
                 raise HTTPException(status_code=404, detail="User not found")
+
+            # 用户信息已变更，使鉴权缓存失效
+            invalidate_cached_user(user_id=user_id)
                 
             return User(
                 user_id=result[0],
@@ -84,40 +81,35 @@ async def update_user_service(user_id: int, update_data: dict) -> User:
     except Exception as e:
         logger.error(f"Error updating user {user_id}: {e}")
         raise HTTPException(status_code=500, detail="Database error")
-    finally:
-        if conn:
-            conn.close()
 
 async def update_password_service(request: UpdatePasswordRequest, current_user):
     new_password = request.new_password
-    conn = None
     try:
-        # 获取数据库连接
-        conn = get_db_connection()
-        cur = conn.cursor()
+        # 将新密码进行哈希处理（在线程池中执行，且不占用数据库连接）
+        hashed_password = await get_password_hash_async(new_password)
 
-        # 将新密码进行哈希处理
-        hashed_password = get_password_hash(new_password)
+        # 获取数据库连接
+        async with get_db_connection() as conn, conn.cursor() as cur:
+            # 更新数据库中的密码字段
+            update_query = """
+            UPDATE users
+            SET password = %s
+            WHERE user_id = %s
+            """
+            await cur.execute(update_query, (hashed_password, current_user.user_id))
 
-        # 更新数据库中的密码字段
-        update_query = """
-        UPDATE users
-        SET password = %s
-        WHERE user_id = %s
-        """
-        cur.execute(update_query, (hashed_password, current_user.user_id))
+            # 提交事务
+            await conn.commit()
 
-        # 提交事务
-        conn.commit()
+            # 密码已变更，使鉴权缓存失效
+            invalidate_cached_user(email=current_user.email, user_id=current_user.user_id)
 
-        # 返回成功消息
-        logger.info(f"Password updated successfully for user {current_user.user_id}")
-        return UpdatePasswordResponse(message="Password updated successfully")
+            # 返回成功消息
+            logger.info(f"Password updated successfully for user {current_user.user_id}")
+            return UpdatePasswordResponse(message="Password updated successfully")
 
+    except HTTPException as e:
+        raise e
     except Exception as e:
         logger.error(f"Error updating password for user {current_user.user_id}: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
-
-    finally:
-        if conn:
-            conn.close()  # 将连接关闭
\ No newline at end of file
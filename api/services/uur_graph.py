@@ -1,137 +1,331 @@
-from typing import List
+import asyncio
+import hashlib
+import json
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+from api.config import GRAPH_SNAPSHOT_PROBE_SECONDS
 from api.utils.db import get_b_db_connection
+from api.utils.logger import get_logger
 from psycopg.rows import dict_row
 from fastapi import HTTPException
 
-def fetch_graph_data(type: List[str]) -> dict:
-    conn = get_b_db_connection()
-    cur = conn.cursor(row_factory=dict_row)
-    
-    try:
+logger = get_logger(__name__)
+
+GRAPH_TYPES = ("usecase", "userstory", "requirement")
+
+# 增量刷新时向前回看的时间窗口，覆盖 modified_time 早于提交时间的长事务
+WATERMARK_OVERLAP = timedelta(seconds=60)
+
+
+# 各表的行数和主键校验和，用于发现删除或漏读
+# req_uc_relations 没有唯一约束和非空约束，按去重后的 (requirement_id, uc_id) 统计，两端有 NULL 的行不构成关系，忽略
+SUMMARY_QUERY = """
+    SELECT 'usecase' AS source, COUNT(*) AS count, COALESCE(SUM(uc_id::bigint), 0) AS checksum FROM usecase
+    UNION ALL
+    SELECT 'userstory', COUNT(*), COALESCE(SUM(us_id::bigint), 0) FROM userstory
+    UNION ALL
+    SELECT 'requirement', COUNT(*), COALESCE(SUM(requirement_id::bigint), 0) FROM requirement
+    UNION ALL
+    SELECT 'req_uc', COUNT(*), COALESCE(SUM(requirement_id::bigint * 1000003 + uc_id), 0)
+    FROM (
+        SELECT DISTINCT requirement_id, uc_id FROM req_uc_relations
+        WHERE requirement_id IS NOT NULL AND uc_id IS NOT NULL
+    ) r
+"""
+
+
+# 快照中关系的 (数量, 校验和)，与 SUMMARY_QUERY 的 req_uc 一行对应
+def _relations_summary(req_uc: Dict[int, Set[int]]) -> Tuple[int, int]:
+    count = checksum = 0
+    for requirement_id, uc_ids in req_uc.items():
+        count += len(uc_ids)
+        checksum += sum(requirement_id * 1000003 + uc_id for uc_id in uc_ids)
+    return count, checksum
+
+
+# UUR 图的进程内快照
+# 1. 按主键保存 usecase / userstory / requirement 的节点以及 req_uc_relations 关系
+# 2. 刷新时只读取 modified_time 晚于水位线的行；主键集合的行数或校验和（主键之和）与数据库不一致
+#    （有删除或漏读，包括删除和新增数量相同的情况）时整表重新加载
+#    modified_time 在 UPDATE 时由触发器刷新（见 business/008 迁移），写入方无需自行设置
+# 3. 写入方调用 mark_dirty() 后下一次读取立即刷新，否则最多每 GRAPH_SNAPSHOT_PROBE_SECONDS 秒检查一次
+# 4. 按 type 过滤条件缓存序列化后的响应体和 ETag，快照变化时清空
+# 5. 邻接索引（uuid -> 相邻节点和边）在首次子图查询时构建，快照变化时清空
+class GraphSnapshot:
+    def __init__(self):
+        self.usecases: Dict[int, dict] = {}  # uc_id -> 节点
+        self.userstories: Dict[int, dict] = {}  # us_id -> 节点（附带 uuid_uc）
+        self.requirements: Dict[int, dict] = {}  # requirement_id -> 节点
+        self.req_uc: Dict[int, Set[int]] = {}  # requirement_id -> uc_id 集合
+        self.watermarks: Dict[str, Optional[datetime]] = {t: None for t in GRAPH_TYPES}
+        self.dirty = True
+        self.checked_at = 0.0
+        self._views: Dict[Tuple[str, ...], Tuple[str, bytes, dict]] = {}
+        self._index: Optional[Tuple[Dict[str, Tuple[str, dict]], Dict[str, List[Tuple[str, dict]]]]] = None
+        self._lock = asyncio.Lock()
+
+    # 标记快照需要刷新（写入 usecase / userstory / requirement 后调用）
+    def mark_dirty(self):
+        self.dirty = True
+
+    def _is_fresh(self) -> bool:
+        return not self.dirty and time.monotonic() - self.checked_at < GRAPH_SNAPSHOT_PROBE_SECONDS
+
+    # 按需刷新快照
+    async def refresh(self):
+        if self._is_fresh():
+            return
+        async with self._lock:
+            if self._is_fresh():
+                return
+            # 先清除标记，刷新期间的新写入会再次标记
+            self.dirty = False
+            async with get_b_db_connection() as conn, conn.cursor(row_factory=dict_row) as cur:
+                changed = await self._sync(cur)
+            self.checked_at = time.monotonic()
+            if changed:
+                self._views.clear()
+                self._index = None
+
+    async def _sync(self, cur) -> bool:
+        await cur.execute(SUMMARY_QUERY)
+        summary = {row["source"]: (row["count"], int(row["checksum"])) for row in await cur.fetchall()}
+        changed = False
+
+        for table, nodes in (("usecase", self.usecases), ("userstory", self.userstories), ("requirement", self.requirements)):
+            rows = await self._fetch_changed(cur, table, self.watermarks[table])
+            reloaded = False
+            ids = nodes.keys() | {row["id"] for row in rows}
+            if (len(ids), sum(ids)) != summary[table]:
+                # 主键集合对不上：有删除或者漏读，整表重新加载
+                logger.info("Reloading graph snapshot table %s", table)
+                rows = await self._fetch_changed(cur, table, None)
+                nodes.clear()
+                reloaded = changed = True
+            # 水位线回看窗口会重复读到未变化的行，只有节点内容变化时才视为快照变化
+            for row in rows:
+                node = _build_node(table, row)
+                if nodes.get(row["id"]) != node:
+                    nodes[row["id"]] = node
+                    changed = True
+            if rows:
+                modified_times = [row["modified_time"] for row in rows if row["modified_time"]]
+                if modified_times:
+                    self.watermarks[table] = max(modified_times + [self.watermarks[table] or modified_times[0]])
+            if table == "requirement" and (rows or reloaded):
+                relations = _relations_summary(self.req_uc)
+                await self._sync_relations(cur, None if reloaded else [row["id"] for row in rows])
+                changed = changed or _relations_summary(self.req_uc) != relations
+
+        if _relations_summary(self.req_uc) != summary["req_uc"]:
+            await self._sync_relations(cur, None)
+            changed = True
+        return changed
+
+    async def _fetch_changed(self, cur, table: str, since: Optional[datetime]) -> List[dict]:
+        columns = {
+            "usecase": "uc_id AS id, uuid, name, description",
+            "userstory": "us_id AS id, uuid, uuid_uc, description",
+            "requirement": "requirement_id AS id, uuid, name, description",
+        }[table]
+        if since is None:
+            await cur.execute(f"SELECT {columns}, modified_time FROM {table}")
+        else:
+            await cur.execute(
+                f"SELECT {columns}, modified_time FROM {table} WHERE modified_time >= %s",
+                (since - WATERMARK_OVERLAP,),
+            )
+        return await cur.fetchall()
+
+    # 重新读取关系：requirement_ids 为 None 时整表加载，否则只读取这些需求的关系
+    async def _sync_relations(self, cur, requirement_ids: Optional[List[int]]):
+        if requirement_ids is None:
+            await cur.execute(
+                "SELECT requirement_id, uc_id FROM req_uc_relations WHERE requirement_id IS NOT NULL AND uc_id IS NOT NULL"
+            )
+            self.req_uc.clear()
+        else:
+            await cur.execute(
+                "SELECT requirement_id, uc_id FROM req_uc_relations WHERE requirement_id = ANY(%s) AND uc_id IS NOT NULL",
+                (requirement_ids,),
+            )
+            for requirement_id in requirement_ids:
+                self.req_uc.pop(requirement_id, None)
+        for row in await cur.fetchall():
+            self.req_uc.setdefault(row["requirement_id"], set()).add(row["uc_id"])
+
+    # 按 type 过滤条件生成图数据，返回 (etag, 序列化后的响应体, 图数据)
+    async def view(self, type: Optional[List[str]]) -> Tuple[str, bytes, dict]:
+        await self.refresh()
+        key = tuple(t for t in GRAPH_TYPES if not type or t in type)
+        cached = self._views.get(key)
+        if cached is None:
+            graph = self._build_graph(key)
+            body = json.dumps(graph, ensure_ascii=False).encode("utf-8")
+            # ETag 取内容摘要，多进程部署时相同内容得到相同的 ETag
+            etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+            cached = self._views[key] = (etag, body, graph)
+        return cached
+
+    # 构建邻接索引：uuid -> (节点类型, 节点)，uuid -> [(相邻节点 uuid, 边)]
+    def _adjacency(self) -> Tuple[Dict[str, Tuple[str, dict]], Dict[str, List[Tuple[str, dict]]]]:
+        if self._index is None:
+            nodes: Dict[str, Tuple[str, dict]] = {}
+            for kind, table in (("usecase", self.usecases), ("userstory", self.userstories), ("requirement", self.requirements)):
+                for key in sorted(table):
+                    node = _public_node(table[key])
+                    nodes[node["uuid"]] = (kind, node)
+            adjacency: Dict[str, List[Tuple[str, dict]]] = defaultdict(list)
+            for edge in self._build_graph(GRAPH_TYPES)["edges"]:
+                adjacency[edge["source"]].append((edge["target"], edge))
+                adjacency[edge["target"]].append((edge["source"], edge))
+            self._index = (nodes, adjacency)
+        return self._index
+
+    # 从 roots 出发沿边（不区分方向）做广度优先遍历，返回 depth 跳以内可达的子图
+    # depth 为 None 时返回全部可达节点；type 限定参与遍历的节点类型
+    async def subgraph(self, roots: List[str], depth: Optional[int], type: Optional[List[str]]) -> dict:
+        await self.refresh()
+        nodes, adjacency = self._adjacency()
+        types = set(type or GRAPH_TYPES)
+
+        missing = [root for root in roots if root not in nodes]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Node not found: {', '.join(missing)}")
+
+        visited: Dict[str, int] = {}
+        frontier = [root for root in dict.fromkeys(roots) if nodes[root][0] in types]
+        for root in frontier:
+            visited[root] = 0
+        hops = 0
+        while frontier and (depth is None or hops < depth):
+            hops += 1
+            next_frontier = []
+            for uuid in frontier:
+                for neighbor, _ in adjacency.get(uuid, ()):
+                    if neighbor not in visited and neighbor in nodes and nodes[neighbor][0] in types:
+                        visited[neighbor] = hops
+                        next_frontier.append(neighbor)
+            frontier = next_frontier
+
+        # 只返回两端都在子图中的边，每条边返回一次
+        edges = {}
+        for uuid in visited:
+            for neighbor, edge in adjacency.get(uuid, ()):
+                if neighbor in visited:
+                    edges.setdefault(edge["uuid"], edge)
+        return {"nodes": [nodes[uuid][1] for uuid in visited], "edges": list(edges.values())}
+
+    def _build_graph(self, types: Tuple[str, ...]) -> dict:
         nodes = []
         edges = []
 
-        if not type:
-            type = ["usecase", "userstory", "requirement"]
-
-        if "usecase" in type:
-            cur.execute("SELECT uc_id, uuid, name, description FROM usecase")
-            usecases = cur.fetchall()
-            for usecase in usecases:
-                nodes.append({
-                    "id": f"UC-{str(usecase['uc_id']).zfill(6)}",
-                    "uuid": usecase['uuid'],
-                    "label": usecase['name'],
-                    "type": "node",
-                    "name": usecase['name'],
-                    "description": usecase['description'],
-                    "tags": []
-                })
-
-        if "userstory" in type:
-            cur.execute("SELECT us_id, uuid, uuid_uc, description FROM userstory")
-            userstories = cur.fetchall()
-            for userstory in userstories:
-                nodes.append({
-                    "id": f"US-{str(userstory['us_id']).zfill(6)}",
-                    "uuid": userstory['uuid'],
-                    "label": f"US-{str(userstory['us_id']).zfill(6)}",
-                    "type": "node",
-                    "name": f"US-{str(userstory['us_id']).zfill(6)}",
-                    "description": userstory['description'],
-                    "tags": []
-                })
-            if "usecase" in type and "userstory" in type:
+        if "usecase" in types:
+            nodes.extend(_public_node(self.usecases[uc_id]) for uc_id in sorted(self.usecases))
+
+        if "userstory" in types:
+            userstories = [self.userstories[us_id] for us_id in sorted(self.userstories)]
+            nodes.extend(_public_node(userstory) for userstory in userstories)
+            if "usecase" in types:
+                # 只连接快照中存在的用例（uuid_uc 可能指向已删除的用例，或刷新过程中尚未读到的用例）
+                usecase_uuids = {usecase["uuid"] for usecase in self.usecases.values()}
                 for userstory in userstories:
-                    if userstory['uuid_uc']:
+                    if userstory["uuid_uc"] in usecase_uuids:
                         edges.append({
                             "uuid": f"{userstory['uuid']}+{userstory['uuid_uc']}",
-                            "source": userstory['uuid_uc'],
-                            "target": userstory['uuid'],
+                            "source": userstory["uuid_uc"],
+                            "target": userstory["uuid"],
                             "type": "edges",
                             "label": "Aggregation"
                         })
 
-        if "requirement" in type:
-            cur.execute(""" 
-                SELECT 
-                    r.requirement_id,
-                    r.uuid AS requirement_uuid,
-                    r.name AS requirement_name,
-                    r.description AS requirement_description,
-                    uc.uuid AS uuid_uc
-                FROM requirement r
-                LEFT JOIN req_uc_relations ruc ON r.requirement_id = ruc.requirement_id
-                LEFT JOIN usecase uc ON ruc.uc_id = uc.uc_id
-            """)
-            requirements = cur.fetchall()
-            for requirement in requirements:
-                nodes.append({
-                    "id": f"REQ-{str(requirement['requirement_id']).zfill(6)}",
-                    "uuid": requirement['requirement_uuid'],
-                    "label": requirement['requirement_name'],
-                    "type": "node",
-                    "name": requirement['requirement_name'],
-                    "description": requirement['requirement_description'],
-                    "tags": []
-                })
-            if "usecase" in type and "requirement" in type:
-                for requirement in requirements:
-                    if requirement['uuid_uc']:
-                        edges.append({
-                            "uuid": f"{requirement['uuid_uc']}+{requirement['requirement_uuid']}",
-                            "source": requirement['requirement_uuid'],
-                            "target": requirement['uuid_uc'],
-                            "type": "edges",
-                            "label": "Aggregation"
-                        })
+        if "requirement" in types:
+            requirement_ids = sorted(self.requirements)
+            nodes.extend(_public_node(self.requirements[requirement_id]) for requirement_id in requirement_ids)
+            if "usecase" in types:
+                for requirement_id in requirement_ids:
+                    requirement = self.requirements[requirement_id]
+                    for uc_id in sorted(self.req_uc.get(requirement_id, ())):
+                        usecase = self.usecases.get(uc_id)
+                        if usecase:
+                            edges.append({
+                                "uuid": f"{usecase['uuid']}+{requirement['uuid']}",
+                                "source": requirement["uuid"],
+                                "target": usecase["uuid"],
+                                "type": "edges",
+                                "label": "Aggregation"
+                            })
 
         return {"nodes": nodes, "edges": edges}
 
-    finally:
-        cur.close()
-        conn.close()
-
-def fetch_user_story_table():
-    conn = get_b_db_connection()
-    cur = conn.cursor(row_factory=dict_row)
-
-    try:
-        # 查询 userstory 表，并联结 status 和 userjourney 获取对应名称
-        cur.execute("""
-            SELECT 
-                us.us_id, 
-                us.description, 
-                s.status_name, 
-                uj.name AS user_journey_name, 
-                us.valid_vehicle, 
-                us.uuid
-            FROM userstory us
-            LEFT JOIN status s ON us.status_id = s.status_id
-            LEFT JOIN userjourney uj ON us.user_journey_id = uj.user_journey_id
-        """)
-        userstories = cur.fetchall()
-
-        # 处理数据格式
-        result = [
-            {
-                "us_id": f"US-{str(us['us_id']).zfill(6)}",
-                "description": us["description"],
-                "status_name": us["status_name"],
-                "user_journey_name": us["user_journey_name"],
-                "valid_vehicle": us["valid_vehicle"],
-                "uuid": us["uuid"]
-            }
-            for us in userstories
-        ]
-
-        return result
-
-    except Exception as e:
-        # 捕获异常并抛出 HTTP 错误
-        raise HTTPException(status_code=500, detail=f"Error fetching user story table: {e}")
-
-    finally:
-        # 确保游标和连接关闭
-        cur.close()
-        conn.close()
\ No newline at end of file
+
+# 由数据库行构建节点，编号格式化只在加载时做一次
+def _build_node(table: str, row: dict) -> dict:
+    if table == "usecase":
+        return {
+            "id": f"UC-{str(row['id']).zfill(6)}",
+            "uuid": str(row["uuid"]),
+            "label": row["name"],
+            "type": "node",
+            "name": row["name"],
+            "description": row["description"],
+            "tags": []
+        }
+    if table == "userstory":
+        us_id = f"US-{str(row['id']).zfill(6)}"
+        return {
+            "id": us_id,
+            "uuid": str(row["uuid"]),
+            "label": us_id,
+            "type": "node",
+            "name": us_id,
+            "description": row["description"],
+            "tags": [],
+            "uuid_uc": str(row["uuid_uc"]) if row["uuid_uc"] else None,
+        }
+    return {
+        "id": f"REQ-{str(row['id']).zfill(6)}",
+        "uuid": str(row["uuid"]),
+        "label": row["name"],
+        "type": "node",
+        "name": row["name"],
+        "description": row["description"],
+        "tags": []
+    }
+
+
+# 去掉节点上仅供内部使用的字段
+def _public_node(node: dict) -> dict:
+    if "uuid_uc" in node:
+        return {k: v for k, v in node.items() if k != "uuid_uc"}
+    return node
+
+
+graph_snapshot = GraphSnapshot()
+
+
+# 通知图快照数据已变化
+def invalidate_graph_snapshot():
+    graph_snapshot.mark_dirty()
+
+
+async def fetch_graph_data(type: List[str]) -> dict:
+    return (await graph_snapshot.view(type))[2]
+
+
+# 获取某个节点 depth 跳以内的邻域
+async def fetch_graph_neighborhood(uuid: str, depth: int, type: Optional[List[str]] = None) -> dict:
+    return await graph_snapshot.subgraph([uuid], depth, type)
+
+
+# 获取从一组根节点出发可达的子图
+async def fetch_subgraph(roots: List[str], depth: Optional[int] = None, type: Optional[List[str]] = None) -> dict:
+    return await graph_snapshot.subgraph(roots, depth, type)
+
+
+# 获取图数据及其 ETag，供支持条件请求的接口使用
+async def fetch_graph_view(type: Optional[List[str]]) -> Tuple[str, bytes]:
+    etag, body, _ = await graph_snapshot.view(type)
+    return etag, body
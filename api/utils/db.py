@@ -1,66 +1,176 @@
-from psycopg_pool import ConnectionPool
+import time
+from contextlib import asynccontextmanager
+
+from psycopg import AsyncConnection
+from psycopg.pq import TransactionStatus
+from psycopg.rows import tuple_row
+from typing import List, Optional
+from psycopg_pool import AsyncConnectionPool, PoolTimeout, TooManyRequests
 from fastapi import HTTPException
 from api.utils.logger import get_logger
+from api.utils.metrics import Counter, Gauge, Metric, registry
+from api.utils.query_trace import instrument_connection, record_pool_wait
 from api.config import (
     DB_CONNECTION_STRING, DB_MIN_CONNECTIONS, DB_MAX_CONNECTIONS,
-    B_DB_CONNECTION_STRING, B_DB_MIN_CONNECTIONS, B_DB_MAX_CONNECTIONS
+    B_DB_CONNECTION_STRING, B_DB_MIN_CONNECTIONS, B_DB_MAX_CONNECTIONS,
+    DB_POOL_TIMEOUT, DB_POOL_MAX_WAITING, DB_POOL_MAX_IDLE, DB_POOL_MAX_LIFETIME,
+    DB_POOL_CHECK, DB_POOL_RETRY_AFTER_SECONDS
 )
 
 logger = get_logger(__name__)
 
 
-# 创建主数据库连接池
-db_pool = ConnectionPool(
+# 连接归还连接池时恢复会话级属性，避免上一次借用的设置泄漏给下一个请求
+async def _reset_connection(conn: AsyncConnection):
+    if conn.autocommit:
+        await conn.set_autocommit(False)
+    if conn.read_only is not None:
+        await conn.set_read_only(None)
+    conn.row_factory = tuple_row
+
+# 创建主数据库连接池（异步，在应用启动时打开）
+db_pool = AsyncConnectionPool(
     conninfo=DB_CONNECTION_STRING,
+    name="main",
     min_size=DB_MIN_CONNECTIONS,
     max_size=DB_MAX_CONNECTIONS,
+    timeout=DB_POOL_TIMEOUT,
+    max_waiting=DB_POOL_MAX_WAITING,
+    max_idle=DB_POOL_MAX_IDLE,
+    max_lifetime=DB_POOL_MAX_LIFETIME,
+    check=AsyncConnectionPool.check_connection if DB_POOL_CHECK else None,
+    configure=instrument_connection("main"),
+    reset=_reset_connection,
+    open=False,
 )
 
-# 创建业务数据库连接池
-b_db_pool = ConnectionPool(
+# 创建业务数据库连接池（异步，在应用启动时打开）
+b_db_pool = AsyncConnectionPool(
     conninfo=B_DB_CONNECTION_STRING,
+    name="business",
     min_size=B_DB_MIN_CONNECTIONS,
     max_size=B_DB_MAX_CONNECTIONS,
+    timeout=DB_POOL_TIMEOUT,
+    max_waiting=DB_POOL_MAX_WAITING,
+    max_idle=DB_POOL_MAX_IDLE,
+    max_lifetime=DB_POOL_MAX_LIFETIME,
+    check=AsyncConnectionPool.check_connection if DB_POOL_CHECK else None,
+    configure=instrument_connection("business"),
+    reset=_reset_connection,
+    open=False,
 )
 
-# 获取主数据库连接
-def get_db_connection():
-    if db_pool:
+# 打开所有连接池，在应用启动时调用
+async def open_db_pools():
+    await db_pool.open()
+    await b_db_pool.open()
+
+# 关闭所有连接池，在应用关闭时调用
+async def close_db_pools():
+    await db_pool.close()
+    await b_db_pool.close()
+
+# 连接池繁忙：等待连接超时或排队请求数达到 DB_POOL_MAX_WAITING，返回 503 并提示客户端稍后重试
+class DatabaseBusyError(HTTPException):
+    def __init__(self, label: str):
+        super().__init__(
+            status_code=503,
+            detail=f"{label.capitalize()} is busy, please retry later",
+            headers={"Retry-After": str(DB_POOL_RETRY_AFTER_SECONDS)},
+        )
+
+
+# 在异常链中查找 DatabaseBusyError
+# 服务层普遍把异常包装为 500 的 HTTPException，包装后的异常通过 __cause__ / __context__ 仍可追溯到连接池繁忙
+def find_database_busy(exc: BaseException) -> Optional[DatabaseBusyError]:
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        if isinstance(exc, DatabaseBusyError):
+            return exc
+        seen.add(id(exc))
+        exc = exc.__cause__ or exc.__context__
+    return None
+
+
+# 从指定连接池租借连接，退出时回滚未提交的事务并通过 putconn 归还连接池
+# 连接永远不会被调用方关闭；已断开的连接由连接池在归还时丢弃并补充
+# 等待连接的耗时计入查询追踪（按连接池名称统计）
+@asynccontextmanager
+async def lease_connection(pool: AsyncConnectionPool, label: str):
+    start = time.perf_counter()
+    try:
+        conn = await pool.getconn()
+    except (PoolTimeout, TooManyRequests) as e:
+        record_pool_wait(pool.name, time.perf_counter() - start)
+        logger.warning(f"{label.capitalize()} pool saturated: {e}")
+        raise DatabaseBusyError(label)
+    except Exception as e:
+        record_pool_wait(pool.name, time.perf_counter() - start)
+        logger.error(f"Error getting {label} connection: {e}")
+        raise HTTPException(status_code=500, detail=f"{label.capitalize()} connection error")
+    record_pool_wait(pool.name, time.perf_counter() - start)
+    try:
+        yield conn
+    finally:
         try:
-            conn = db_pool.getconn()
-            if conn.closed:
-                conn = db_pool.getconn()
-            return conn
+            # 只读查询或异常退出会留下打开/失败的事务，归还前显式回滚
+            if conn.info.transaction_status in (TransactionStatus.INTRANS, TransactionStatus.INERROR):
+                await conn.rollback()
         except Exception as e:
-            logger.error(f"Error getting database connection: {e}")
-            raise HTTPException(status_code=500, detail="Database connection error")
-    else:
-        raise HTTPException(
-            status_code=500, detail="Database connection pool not initialized"
-        )
+            logger.warning(f"Error resetting {label} connection before release: {e}")
+        await pool.putconn(conn)
 
-# 释放主数据库连接
-def put_db_connection(conn):
-    if db_pool:
-        db_pool.putconn(conn)
+# 获取主数据库连接
+# 用法: async with get_db_connection() as conn: ...
+def get_db_connection():
+    return lease_connection(db_pool, "database")
 
 # 获取业务数据库连接
+# 用法: async with get_b_db_connection() as conn: ...
 def get_b_db_connection():
-    if b_db_pool:
-        try:
-            conn = b_db_pool.getconn()
-            if conn.closed:
-                conn = b_db_pool.getconn()
-            return conn
-        except Exception as e:
-            logger.error(f"Error getting business database connection: {e}")
-            raise HTTPException(status_code=500, detail="Business database connection error")
-    else:
-        raise HTTPException(
-            status_code=500, detail="Business database connection pool not initialized"
-        )
+    return lease_connection(b_db_pool, "business database")
+
+# FastAPI 依赖：在请求处理期间租借主数据库连接
+async def db_connection_dependency():
+    async with get_db_connection() as conn:
+        yield conn
+
+# FastAPI 依赖：在请求处理期间租借业务数据库连接
+async def b_db_connection_dependency():
+    async with get_b_db_connection() as conn:
+        yield conn
+
+
+# 连接池统计信息，由 psycopg_pool 的 get_stats 提供，计数类指标为连接池创建以来的累计值
+def _pool_metrics() -> List[Metric]:
+    size = Gauge("db_pool_size", "Connections currently managed by the pool (in use and idle)", ["pool"])
+    idle = Gauge("db_pool_idle", "Idle connections available in the pool", ["pool"])
+    max_size = Gauge("db_pool_max_size", "Configured maximum pool size", ["pool"])
+    waiting = Gauge("db_pool_requests_waiting", "Requests currently waiting for a connection", ["pool"])
+    requests = Counter("db_pool_requests_total", "Connections requested from the pool", ["pool"])
+    queued = Counter("db_pool_requests_queued_total", "Requests that had to wait for a connection", ["pool"])
+    request_errors = Counter("db_pool_requests_errors_total", "Requests that timed out or were rejected because the queue was full", ["pool"])
+    wait_seconds = Counter("db_pool_requests_wait_seconds_total", "Total time queued requests waited for a connection", ["pool"])
+    opened = Counter("db_pool_connections_opened_total", "Connections opened by the pool", ["pool"])
+    connection_errors = Counter("db_pool_connections_errors_total", "Failed connection attempts", ["pool"])
+    lost = Counter("db_pool_connections_lost_total", "Connections found broken by health checks or on return", ["pool"])
+    retired = Counter("db_pool_connections_retired_total", "Connections closed by the pool (max_lifetime recycle, max_idle shrink or broken)", ["pool"])
+    for pool in (db_pool, b_db_pool):
+        stats = pool.get_stats()
+        labels = (pool.name,)
+        size.set(labels, stats.get("pool_size", 0))
+        idle.set(labels, stats.get("pool_available", 0))
+        max_size.set(labels, stats.get("pool_max", pool.max_size))
+        waiting.set(labels, stats.get("requests_waiting", 0))
+        requests.inc(labels, stats.get("requests_num", 0))
+        queued.inc(labels, stats.get("requests_queued", 0))
+        request_errors.inc(labels, stats.get("requests_errors", 0))
+        wait_seconds.inc(labels, stats.get("requests_wait_ms", 0) / 1000)
+        opened.inc(labels, stats.get("connections_num", 0))
+        connection_errors.inc(labels, stats.get("connections_errors", 0))
+        lost.inc(labels, stats.get("connections_lost", 0) + stats.get("returns_bad", 0))
+        retired.inc(labels, max(stats.get("connections_num", 0) - stats.get("pool_size", 0), 0))
+    return [size, idle, max_size, waiting, requests, queued, request_errors, wait_seconds, opened, connection_errors, lost, retired]
+
 
-# 释放业务数据库连接
-def put_b_db_connection(conn):
-    if b_db_pool:
-        b_db_pool.putconn(conn)
\ No newline at end of file
+registry.register_collector(_pool_metrics)
@@ -0,0 +1,226 @@
+import math
+from abc import ABC, abstractmethod
+import threading
+import time
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from starlette.routing import Match
+
+# 请求耗时（秒）和响应大小（字节）的直方图分桶
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# 未匹配任何路由的请求统一记为该路由，避免任意路径导致标签数量无限增长
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+# 指标基类：按标签值分组保存数值，labels 为与 labelnames 顺序一致的元组
+class Metric(ABC):
+    type = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+
+    @abstractmethod
+    def collect(self) -> List[str]:
+        ...
+
+
+# 只增不减的计数器
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}" for labels, value in values
+        ]
+
+
+# 可增可减的瞬时值
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, labels: Tuple[str, ...] = (), amount: float = 1):
+        self.inc(labels, -amount)
+
+    def set(self, labels: Tuple[str, ...], value: float):
+        with self._lock:
+            self._values[labels] = value
+
+
+# 累积分桶直方图，输出 _bucket / _sum / _count
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, labels: Tuple[str, ...], value: float):
+        with self._lock:
+            counts, total = self._values.setdefault(labels, ([0] * len(self.buckets), [0.0]))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            total[0] += value
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            values = [(labels, list(counts), total[0]) for labels, (counts, total) in self._values.items()]
+        lines = self.header()
+        for labels, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                bucket_labels = _format_labels(self.labelnames + ("le",), labels + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+# 指标注册表，render 输出 Prometheus 文本格式
+# 缓存、连接池等组件的统计信息通过 register_cache / register_collector 注册，在输出时读取
+class Registry:
+    def __init__(self):
+        self.metrics: List[Metric] = []
+        self._caches: Dict[str, Callable[[], dict]] = {}
+        self._collectors: List[Callable[[], List[Metric]]] = [self._cache_metrics]
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    # 注册在输出时生成指标的回调
+    def register_collector(self, collector: Callable[[], List[Metric]]):
+        self._collectors.append(collector)
+
+    # 注册缓存统计信息，stats 返回包含 size / hits / misses 的字典（与 TTLCache.stats 一致）
+    def register_cache(self, name: str, stats: Callable[[], dict]):
+        self._caches[name] = stats
+
+    def _cache_metrics(self) -> List[Metric]:
+        entries = Gauge("cache_entries", "Number of entries held by in-process caches", ["cache"])
+        hits = Counter("cache_hits_total", "Cache hits", ["cache"])
+        misses = Counter("cache_misses_total", "Cache misses", ["cache"])
+        for name, stats in self._caches.items():
+            values = stats()
+            if not values:
+                continue
+            entries.set((name,), values.get("size", 0))
+            hits.inc((name,), values.get("hits", 0))
+            misses.inc((name,), values.get("misses", 0))
+        return [entries, hits, misses]
+
+    def render(self) -> str:
+        lines = []
+        metrics = list(self.metrics)
+        for collector in self._collectors:
+            metrics.extend(collector())
+        for metric in metrics:
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUESTS = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route and status code", ["method", "route", "status"]
+))
+EXCEPTIONS = registry.register(Counter(
+    "http_request_exceptions_total", "Requests that raised an unhandled exception", ["method", "route"]
+))
+IN_PROGRESS = registry.register(Gauge(
+    "http_requests_in_progress", "HTTP requests currently being handled", ["method", "route"]
+))
+LATENCY = registry.register(Histogram(
+    "http_request_duration_seconds", "Time from request start until the response body is sent", ["method", "route"],
+    LATENCY_BUCKETS,
+))
+RESPONSE_SIZE = registry.register(Histogram(
+    "http_response_size_bytes", "Response body size", ["method", "route"], SIZE_BUCKETS,
+))
+
+
+# 按路由模板（如 /conversations/sessions/{session_id}）而不是实际路径统计，保证标签数量有限
+def resolve_route(scope) -> str:
+    app = scope.get("app")
+    routes = getattr(getattr(app, "router", None), "routes", [])
+    partial = None
+    for route in routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", UNMATCHED_ROUTE)
+        if match == Match.PARTIAL and partial is None:
+            partial = getattr(route, "path", None)
+    return partial or UNMATCHED_ROUTE
+
+
+# 请求指标中间件（ASGI）：记录每个路由的请求数、进行中的请求数、耗时、响应大小和异常数
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        labels = (scope["method"], resolve_route(scope))
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        IN_PROGRESS.inc(labels)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            EXCEPTIONS.inc(labels)
+            raise
+        finally:
+            LATENCY.observe(labels, time.perf_counter() - start)
+            RESPONSE_SIZE.observe(labels, size)
+            REQUESTS.inc(labels + (str(status),))
+            IN_PROGRESS.dec(labels)
@@ -0,0 +1,65 @@
+import difflib
+import json
+import zlib
+from typing import Optional
+
+# PRD 存储编码
+# plain: 全文存放在 prd_content（历史数据和 full 模式）
+# zlib: 压缩后的全文快照，存放在 prd_blob
+# delta: 相对于快照（base_prd_id 指向的记录）的行级差异，压缩后存放在 prd_blob
+ENCODING_PLAIN = "plain"
+ENCODING_ZLIB = "zlib"
+ENCODING_DELTA = "delta"
+
+
+# 压缩全文快照
+def compress_snapshot(text: str) -> bytes:
+    return zlib.compress(text.encode("utf-8"), 9)
+
+
+# 计算 text 相对于 base_text 的差异
+# 差异是一个操作列表：[start, end] 表示复制快照的第 start 到 end 行，字符串表示新插入的内容
+def encode_delta(base_text: str, text: str) -> bytes:
+    base_lines = base_text.splitlines(keepends=True)
+    lines = text.splitlines(keepends=True)
+    ops = []
+    matcher = difflib.SequenceMatcher(None, base_lines, lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append("".join(lines[j1:j2]))
+    return zlib.compress(json.dumps(ops, ensure_ascii=False).encode("utf-8"), 9)
+
+
+# 将差异应用到快照上还原全文
+def apply_delta(base_text: str, blob: bytes) -> str:
+    base_lines = base_text.splitlines(keepends=True)
+    parts = []
+    for op in json.loads(zlib.decompress(blob)):
+        if isinstance(op, str):
+            parts.append(op)
+        else:
+            parts.extend(base_lines[op[0]:op[1]])
+    return "".join(parts)
+
+
+# 还原快照记录（plain 或 zlib）的全文
+def decode_snapshot(encoding: Optional[str], content: Optional[str], blob: Optional[bytes]) -> Optional[str]:
+    if encoding == ENCODING_ZLIB:
+        return zlib.decompress(blob).decode("utf-8")
+    return content
+
+
+# 还原任意一条 PRD 记录的全文，delta 记录需要同时传入其快照记录的字段
+def decode_prd(
+    encoding: Optional[str],
+    content: Optional[str],
+    blob: Optional[bytes],
+    base_encoding: Optional[str] = None,
+    base_content: Optional[str] = None,
+    base_blob: Optional[bytes] = None,
+) -> Optional[str]:
+    if encoding == ENCODING_DELTA:
+        return apply_delta(decode_snapshot(base_encoding, base_content, base_blob), blob)
+    return decode_snapshot(encoding, content, blob)
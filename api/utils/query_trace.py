@@ -0,0 +1,156 @@
+import re
+import time
+from collections import Counter as FingerprintCounter
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Dict, Optional, Tuple, Type
+
+from psycopg import AsyncConnection, AsyncCursor, AsyncServerCursor
+
+from api.config import DB_SLOW_QUERY_MS, DB_REQUEST_QUERY_WARN
+from api.utils.logger import get_logger
+from api.utils.metrics import Counter, Histogram, registry
+
+logger = get_logger(__name__)
+
+QUERIES = registry.register(Counter("db_queries_total", "Executed statements", ["pool"]))
+QUERY_DURATION = registry.register(Histogram("db_query_duration_seconds", "Statement execution time", ["pool"]))
+POOL_WAIT = registry.register(Histogram("db_pool_wait_seconds", "Time spent waiting for a pooled connection", ["pool"]))
+
+
+# 单个请求内的数据库访问汇总
+class RequestTrace:
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0.0
+        self.pool_wait = 0.0
+        self.fingerprints = FingerprintCounter()
+
+    # Server-Timing 响应头：db 为语句执行总耗时，dbwait 为等待连接池的总耗时（毫秒）
+    def server_timing(self) -> str:
+        return (
+            f'db;dur={self.query_time * 1000:.1f};desc="{self.queries} queries", '
+            f"dbwait;dur={self.pool_wait * 1000:.1f}"
+        )
+
+
+# 当前请求的汇总，由 QueryTraceMiddleware 设置；请求之外（启动预加载、迁移等）为 None
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("request_trace", default=None)
+
+
+# 语句指纹：去掉字面量和多余空白，同一条语句的不同参数得到相同的指纹
+@lru_cache(maxsize=1024)
+def fingerprint(query: str) -> str:
+    text = re.sub(r"--[^\n]*", " ", query)
+    text = re.sub(r"'(?:[^']|'')*'", "?", text)
+    text = re.sub(r"\b\d+(?:\.\d+)?\b", "?", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    return text[:200]
+
+
+def _query_text(query) -> str:
+    return query if isinstance(query, str) else query.decode() if isinstance(query, bytes) else str(query)
+
+
+# 记录一次语句执行：指标、请求汇总，超过 DB_SLOW_QUERY_MS 时记录慢查询日志
+def record_query(pool: str, query, duration: float, rowcount: int):
+    QUERIES.inc((pool,))
+    QUERY_DURATION.observe((pool,), duration)
+    trace = _current_trace.get()
+    if trace is not None or duration * 1000 >= DB_SLOW_QUERY_MS:
+        statement = fingerprint(_query_text(query))
+        if trace is not None:
+            trace.queries += 1
+            trace.query_time += duration
+            trace.fingerprints[statement] += 1
+        if duration * 1000 >= DB_SLOW_QUERY_MS:
+            logger.warning(f"Slow query on {pool} ({duration * 1000:.1f} ms, {rowcount} rows): {statement}")
+
+
+# 记录一次从连接池获取连接的等待时间
+def record_pool_wait(pool: str, duration: float):
+    POOL_WAIT.observe((pool,), duration)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.pool_wait += duration
+
+
+# 记录执行耗时的游标，pool 为所属连接池的名称
+class TracingCursor(AsyncCursor):
+    pool = ""
+
+    async def execute(self, query, params=None, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await super().execute(query, params, **kwargs)
+        finally:
+            record_query(self.pool, query, time.perf_counter() - start, self.rowcount)
+
+    async def executemany(self, query, params_seq, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await super().executemany(query, params_seq, **kwargs)
+        finally:
+            record_query(self.pool, query, time.perf_counter() - start, self.rowcount)
+
+
+# 服务端（命名）游标，只统计 DECLARE 的耗时，之后的分批读取不计入
+class TracingServerCursor(AsyncServerCursor):
+    pool = ""
+
+    async def execute(self, query, params=None, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await super().execute(query, params, **kwargs)
+        finally:
+            record_query(self.pool, query, time.perf_counter() - start, self.rowcount)
+
+
+_cursor_classes: Dict[str, Tuple[Type[TracingCursor], Type[TracingServerCursor]]] = {}
+
+
+# 连接池的 configure 回调：新建的连接使用记录耗时的游标
+def instrument_connection(pool: str):
+    if pool not in _cursor_classes:
+        _cursor_classes[pool] = (
+            type("TracingCursor", (TracingCursor,), {"pool": pool}),
+            type("TracingServerCursor", (TracingServerCursor,), {"pool": pool}),
+        )
+    cursor_class, server_cursor_class = _cursor_classes[pool]
+
+    async def configure(conn: AsyncConnection):
+        conn.cursor_factory = cursor_class
+        conn.server_cursor_factory = server_cursor_class
+
+    return configure
+
+
+# 请求级查询追踪中间件（ASGI）：汇总请求内的语句数、执行耗时和连接池等待耗时，写入 Server-Timing 响应头
+# 语句数超过 DB_REQUEST_QUERY_WARN 时记录日志并列出重复最多的语句，便于发现 N+1 查询
+class QueryTraceMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        trace = RequestTrace()
+        token = _current_trace.set(trace)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", [])) + [(b"server-timing", trace.server_timing().encode())]
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_trace.reset(token)
+            if trace.queries > DB_REQUEST_QUERY_WARN:
+                repeated = "; ".join(f"{count}x {statement}" for statement, count in trace.fingerprints.most_common(3))
+                logger.warning(
+                    f"{scope['method']} {scope['path']} ran {trace.queries} queries "
+                    f"({trace.query_time * 1000:.1f} ms): {repeated}"
+                )
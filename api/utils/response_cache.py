@@ -0,0 +1,201 @@
+import json
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from api.config import (
+    RESPONSE_CACHE_BACKEND, RESPONSE_CACHE_URL, RESPONSE_CACHE_TTL_SECONDS, RESPONSE_CACHE_MAX_SIZE
+)
+from api.utils.cache import TTLCache
+from api.utils.logger import get_logger
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # redis 为可选依赖：pip install "studio[redis]"
+    redis = None
+
+logger = get_logger(__name__)
+
+
+# 响应缓存后端接口
+# 缓存键中带有命名空间的代数（generation），失效时只需将代数加一，旧代数的条目不会再被读到，随 TTL 过期
+# 读取在请求开始时的代数下进行、写入也写在该代数下，因此请求处理期间发生的失效不会让旧数据被缓存
+class ResponseCacheBackend(ABC):
+    @abstractmethod
+    async def generation(self, namespace: str) -> int:
+        ...
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes):
+        ...
+
+    @abstractmethod
+    async def invalidate(self, namespace: str):
+        ...
+
+    def stats(self) -> dict:
+        return {}
+
+
+# 进程内 LRU 后端（默认），多进程部署时各进程独立失效
+class MemoryResponseCacheBackend(ResponseCacheBackend):
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._generations: Dict[str, int] = {}
+
+    async def generation(self, namespace: str) -> int:
+        return self._generations.get(namespace, 0)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: bytes):
+        self._cache.set(key, value)
+
+    async def invalidate(self, namespace: str):
+        self._generations[namespace] = self._generations.get(namespace, 0) + 1
+        # 旧代数的条目已不可达，顺便释放内存
+        self._cache.pop_where(lambda key, _: key.startswith(f"{namespace}:"))
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+# Redis 共享后端，多个进程 / 实例共享缓存和失效
+class RedisResponseCacheBackend(ResponseCacheBackend):
+    def __init__(self, url: str, ttl: float, prefix: str = "studio:response:"):
+        self._redis = redis.from_url(url)
+        self._ttl = int(ttl)
+        self._prefix = prefix
+
+    async def generation(self, namespace: str) -> int:
+        value = await self._redis.get(f"{self._prefix}gen:{namespace}")
+        return int(value or 0)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._redis.get(self._prefix + key)
+
+    async def set(self, key: str, value: bytes):
+        await self._redis.set(self._prefix + key, value, ex=self._ttl)
+
+    async def invalidate(self, namespace: str):
+        await self._redis.incr(f"{self._prefix}gen:{namespace}")
+
+
+# 按配置创建缓存后端，RESPONSE_CACHE_BACKEND=none 时不缓存
+def create_backend() -> Optional[ResponseCacheBackend]:
+    if RESPONSE_CACHE_BACKEND == "none":
+        return None
+    if RESPONSE_CACHE_BACKEND == "redis":
+        if redis is None:
+            logger.warning("RESPONSE_CACHE_BACKEND=redis but the redis package is not installed, falling back to memory")
+        elif not RESPONSE_CACHE_URL:
+            logger.warning("RESPONSE_CACHE_BACKEND=redis but RESPONSE_CACHE_URL is not set, falling back to memory")
+        else:
+            return RedisResponseCacheBackend(RESPONSE_CACHE_URL, RESPONSE_CACHE_TTL_SECONDS)
+    return MemoryResponseCacheBackend(RESPONSE_CACHE_MAX_SIZE, RESPONSE_CACHE_TTL_SECONDS)
+
+
+# 当前使用的缓存后端，测试或本地运行时可直接替换
+backend: Optional[ResponseCacheBackend] = create_backend()
+
+
+# 当前缓存后端的统计信息，共享后端或未启用缓存时为空
+def response_cache_stats() -> dict:
+    return backend.stats() if backend is not None else {}
+
+
+# 写入路径调用：使某个命名空间下的所有缓存响应失效
+# 缓存后端不可用时只记录日志，写入本身不受影响（缓存条目随 TTL 过期）
+async def invalidate_response_cache(*namespaces: str):
+    if backend is None:
+        return
+    for namespace in namespaces:
+        try:
+            await backend.invalidate(namespace)
+        except Exception as e:
+            logger.warning(f"Error invalidating response cache namespace {namespace}: {e}")
+
+
+def _pack(status: int, headers: List[Tuple[bytes, bytes]], body: bytes) -> bytes:
+    meta = json.dumps({"status": status, "headers": [[k.decode("latin-1"), v.decode("latin-1")] for k, v in headers]})
+    return meta.encode() + b"\n" + body
+
+
+def _unpack(value: bytes) -> Tuple[int, List[Tuple[bytes, bytes]], bytes]:
+    meta, body = value.split(b"\n", 1)
+    meta = json.loads(meta)
+    return meta["status"], [(k.encode("latin-1"), v.encode("latin-1")) for k, v in meta["headers"]], body
+
+
+# 响应缓存中间件（ASGI）
+# 只缓存 routes 中列出的路径（及其子路径）的 GET 200 响应，键为 命名空间 + 代数 + 路径 + 排序后的查询参数
+# 命中时直接返回缓存的响应体和响应头，请求带有匹配的 If-None-Match 时返回 304
+class ResponseCacheMiddleware:
+    # 不缓存的响应头：每次请求都会不同或与连接相关
+    SKIP_HEADERS = {b"content-length", b"date", b"server", b"set-cookie", b"server-timing"}
+
+    def __init__(self, app, routes: Dict[str, str]):
+        self.app = app
+        self.routes = routes  # 路径前缀 -> 命名空间
+
+    def _namespace(self, path: str) -> Optional[str]:
+        for prefix, namespace in self.routes.items():
+            if path == prefix or path.startswith(prefix.rstrip("/") + "/"):
+                return namespace
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET" or backend is None:
+            return await self.app(scope, receive, send)
+        namespace = self._namespace(scope["path"])
+        if namespace is None:
+            return await self.app(scope, receive, send)
+
+        query = urlencode(sorted(parse_qsl(scope["query_string"].decode("latin-1"), keep_blank_values=True)))
+        try:
+            generation = await backend.generation(namespace)
+            key = f"{namespace}:{generation}:{scope['path']}?{query}"
+            cached = await backend.get(key)
+        except Exception as e:
+            logger.warning(f"Error reading response cache: {e}")
+            return await self.app(scope, receive, send)
+
+        if cached is not None:
+            status, headers, body = _unpack(cached)
+            etag = next((v for k, v in headers if k == b"etag"), None)
+            if_none_match = next((v for k, v in scope["headers"] if k == b"if-none-match"), None)
+            if etag and if_none_match and etag in [tag.strip() for tag in if_none_match.split(b",")]:
+                status, body = 304, b""
+                headers = [(k, v) for k, v in headers if k != b"content-type"]
+            await send({
+                "type": "http.response.start",
+                "status": status,
+                "headers": headers + [(b"content-length", str(len(body)).encode()), (b"x-cache", b"HIT")],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        # 未命中：转发请求并收集响应，200 响应写入缓存
+        start = {}
+        chunks = []
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+                message = dict(message, headers=list(message.get("headers", [])) + [(b"x-cache", b"MISS")])
+            elif message["type"] == "http.response.body" and start.get("status") == 200:
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    headers = [(k, v) for k, v in start.get("headers", []) if k.lower() not in self.SKIP_HEADERS]
+                    try:
+                        await backend.set(key, _pack(200, headers, b"".join(chunks)))
+                    except Exception as e:
+                        logger.warning(f"Error writing response cache: {e}")
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
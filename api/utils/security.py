@@ -1,10 +1,22 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta, timezone  # 添加 timezone 导入
+from fastapi import HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from typing import Optional, Union
 
-from api.config import JWT_SECRET_KEY, JWT_ALGORITHM, JWT_ACCESS_TOKEN_EXPIRE_MINUTES
+from api.config import (
+    JWT_SECRET_KEY,
+    JWT_ALGORITHM,
+    JWT_ACCESS_TOKEN_EXPIRE_MINUTES,
+    PASSWORD_HASH_WORKERS,
+    PASSWORD_HASH_MAX_PENDING,
+    PASSWORD_HASH_RETRY_AFTER_SECONDS,
+)
 from api.schemas.auth import TokenData
 from api.schemas.user import UserInDB
 
@@ -22,6 +34,44 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+# bcrypt 计算是纯 CPU 操作（单次 100ms 以上），放到有界线程池中执行，避免阻塞事件循环
+_password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+_pending_password_jobs = 0
+_pending_lock = threading.Lock()
+
+def _release_password_job(_future):
+    global _pending_password_jobs
+    with _pending_lock:
+        _pending_password_jobs -= 1
+
+# 在线程池中执行密码计算，排队任务过多时直接返回 503，而不是无限堆积
+# 计数在线程池任务结束时才减少：等待方被取消（如客户端断开）后，已提交的计算仍在占用线程
+async def _run_password_job(func, *args):
+    global _pending_password_jobs
+    with _pending_lock:
+        if _pending_password_jobs >= PASSWORD_HASH_MAX_PENDING:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many concurrent password operations, please retry later",
+                headers={"Retry-After": str(PASSWORD_HASH_RETRY_AFTER_SECONDS)},
+            )
+        _pending_password_jobs += 1
+    try:
+        future = _password_executor.submit(func, *args)
+    except BaseException:
+        _release_password_job(None)
+        raise
+    future.add_done_callback(_release_password_job)
+    return await asyncio.wrap_future(future)
+
+# 验证密码（异步，不阻塞事件循环）
+async def verify_password_async(plain_password, hashed_password):
+    return await _run_password_job(verify_password, plain_password, hashed_password)
+
+# 生成密码哈希（异步，不阻塞事件循环）
+async def get_password_hash_async(password):
+    return await _run_password_job(get_password_hash, password)
+
 # 创建访问令牌
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
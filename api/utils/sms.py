@@ -24,7 +24,7 @@ logger = get_logger(__name__)
 # 发送验证码
 async def send_verification_code(phone_number: str, purpose: int):
     if purpose == 1:  # 登录
-        user = get_user_by_phone(phone_number)
+        user = await get_user_by_phone(phone_number)
         if not user:
             raise HTTPException(
                 status_code=400,
@@ -62,7 +62,7 @@ async def send_verification_code(phone_number: str, purpose: int):
         logger.info(f"SMS sent to {phone_number}: {response.to_json_string()}")
 
         # 储存验证码到数据库，并记录用途
-        store_verification_code(phone_number, verification_code, purpose)
+        await store_verification_code(phone_number, verification_code, purpose)
         return {"message": "Verification code sent successfully"}
 
     except TencentCloudSDKException as err:
@@ -74,65 +74,58 @@ async def send_verification_code(phone_number: str, purpose: int):
         raise HTTPException(status_code=500, detail="Unexpected error occurred")
 
 # 存储验证码
-def store_verification_code(phone_number: str, verification_code: str, purpose: int):
+async def store_verification_code(phone_number: str, verification_code: str, purpose: int):
     # 获取当前时间和过期时间（5分钟后）
     expiration_time = datetime.now() + timedelta(minutes=5)
 
-    conn = None
     try:
         # 连接到数据库
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        # 检查是否已存在相同手机号和用途的验证码记录
-        cursor.execute(
-            """
-            SELECT COUNT(*) FROM verification_codes
-            WHERE phone_number = %s AND purpose = %s;
-        """,
-            (phone_number, purpose),
-        )
-
-        existing_record = cursor.fetchone()[0]
-
-        if existing_record > 0:
-            # 如果记录存在，更新验证码和过期时间
-            cursor.execute(
+        async with get_db_connection() as conn, conn.cursor() as cursor:
+            # 检查是否已存在相同手机号和用途的验证码记录
+            await cursor.execute(
                 """
-                UPDATE verification_codes
-                SET verification_code = %s, expiration_time = %s
+                SELECT COUNT(*) FROM verification_codes
                 WHERE phone_number = %s AND purpose = %s;
             """,
-                (verification_code, expiration_time, phone_number, purpose),
-            )
-            conn.commit()
-            logger.info(f"Updated verification code for {phone_number} with purpose {purpose}")
-        else:
-            # 如果记录不存在，插入新的验证码记录
-            cursor.execute(
-                """
-                INSERT INTO verification_codes (phone_number, verification_code, expiration_time, purpose)
-                VALUES (%s, %s, %s, %s);
-            """,
-                (phone_number, verification_code, expiration_time, purpose),
+                (phone_number, purpose),
             )
-            conn.commit()
-            logger.info(f"Inserted new verification code for {phone_number} with purpose {purpose}")
+
+            existing_record = (await cursor.fetchone())[0]
+
+            if existing_record > 0:
+                # 如果记录存在，更新验证码和过期时间
+                await cursor.execute(
+                    """
+                    UPDATE verification_codes
+                    SET verification_code = %s, expiration_time = %s
+                    WHERE phone_number = %s AND purpose = %s;
+                """,
+                    (verification_code, expiration_time, phone_number, purpose),
+                )
+                await conn.commit()
+                logger.info(f"Updated verification code for {phone_number} with purpose {purpose}")
+            else:
+                # 如果记录不存在，插入新的验证码记录
+                await cursor.execute(
+                    """
+                    INSERT INTO verification_codes (phone_number, verification_code, expiration_time, purpose)
+                    VALUES (%s, %s, %s, %s);
+                """,
+                    (phone_number, verification_code, expiration_time, purpose),
+                )
+                await conn.commit()
+                logger.info(f"Inserted new verification code for {phone_number} with purpose {purpose}")
 
     except Exception as e:
         logger.error(f"Error storing verification code: {e}")
         raise HTTPException(status_code=500, detail="Error storing verification code")
-    finally:
-        if conn:
-            conn.close()
 
 # 从数据库中获取有效验证码
-def get_verification_code(phone_number: str, purpose: int):
-    conn = get_db_connection()
+async def get_verification_code(phone_number: str, purpose: int):
     try:
-        with conn.cursor() as cur:
+        async with get_db_connection() as conn, conn.cursor() as cur:
             # 查询指定手机号和用途的验证码
-            cur.execute(
+            await cur.execute(
                 """
                 SELECT verification_code, expiration_time
                 FROM verification_codes
@@ -143,7 +136,7 @@ def get_verification_code(phone_number: str, purpose: int):
                 (phone_number, purpose),
             )
 
-            result = cur.fetchone()
+            result = await cur.fetchone()
             if result:
                 stored_code, expiration_time = result
                 # 如果验证码过期，返回 None
@@ -154,11 +147,8 @@ def get_verification_code(phone_number: str, purpose: int):
     except Exception as e:
         logger.error(f"Error fetching verification code: {e}")
         return None
-    finally:
-        if conn:
-            conn.close()
 
 # 根据手机号获取用户
-def get_user_by_phone(phone_number: str):
+async def get_user_by_phone(phone_number: str):
     from ..services.auth_service import get_user_from_db
-    return get_user_from_db(phone_number, is_email=False)
\ No newline at end of file
+    return await get_user_from_db(phone_number, is_email=False)
\ No newline at end of file
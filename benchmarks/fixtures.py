@@ -0,0 +1,94 @@
+"""
+性能测试数据生成
+
+所有生成函数都接收 random.Random 实例，同一个随机种子生成相同的数据，便于多次运行之间对比。
+"""
+import random
+from typing import List
+
+# 性能测试用户：邮箱为 bench-user-<序号>@example.com，密码统一为 BENCH_PASSWORD
+BENCH_EMAIL_PATTERN = "bench-user-%@example.com"
+BENCH_PASSWORD = "benchmark-password"
+
+WORDS = (
+    "vehicle driver lane brake speed sensor camera radar parking assist warning display "
+    "signal door window seat climate battery charge route navigation voice alert steering "
+    "mirror light engine torque mode safety status trigger condition response timeout"
+).split()
+JOURNEYS = [f"journey {i}" for i in range(12)]
+STATUSES = ["draft", "review", "approved", "released", "deprecated"]
+VEHICLES = ["A", "B", "C", "D"]
+ASIL = ["QM", "A", "B", "C", "D"]
+
+
+def bench_email(index: int) -> str:
+    return f"bench-user-{index}@example.com"
+
+
+def sentence(rng: random.Random, words: int = 8) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+# 生成一份 PRD 文档（/achieve_data 的请求体），结构与前端导出的 PRD 一致
+def make_prd_document(index: int, rng: random.Random, requirements: int = 4, stakeholders: int = 2, standards: int = 200) -> dict:
+    regulations = [f"GB/T {rng.randrange(standards)} - {sentence(rng, 3)}" for _ in range(rng.randint(1, 3))]
+    return {"chapters": [
+        {"sections": [{"subsections": [{"description": f"Story {index}: {sentence(rng)}", "verticalHeaderTable": [
+            {"userJourney": rng.choice(JOURNEYS)},
+            {"stakeholders&Interests": [f"{sentence(rng, 2)} : {sentence(rng, 4)}" for _ in range(stakeholders)]},
+            {"status": rng.choice(STATUSES)},
+            {"validVehicles": rng.sample(VEHICLES, rng.randint(1, len(VEHICLES)))},
+            {"acceptanceCriteria": [sentence(rng) for _ in range(3)]},
+        ]}]}]},
+        {"sections": [{}, {"subsections": [{"description": f"Use case {index}: {sentence(rng, 4)}", "verticalHeaderTable": [
+            {"overview": sentence(rng, 12)}, {}, {"regulations": regulations}, {"primaryActor": "driver"},
+            {"secondaryActors": [rng.choice(WORDS)]}, {"preconditions": [sentence(rng)]},
+            {"successEndConditions": [sentence(rng)]}, {"failProtectionConditions": [sentence(rng)]}]}]},
+            {"subsections": [{"horizontalHeaderTable": [{"step": step, "action": sentence(rng)} for step in range(1, 6)]}]},
+            {"subsections": [{"extension": sentence(rng)}]}, {"subsections": [{"io": sentence(rng, 4)}]}]},
+        {"sections": [{"subsections": [{"horizontalHeaderTable": [
+            {
+                "requirementName": f"REQ {index}-{k} {sentence(rng, 3)}",
+                "description": sentence(rng, 16),
+                "requirementType": rng.choice(["Functional", "Performance", "Safety"]),
+                "ASIL": rng.choice(ASIL),
+                "source": rng.choice(regulations),
+            }
+            for k in range(requirements)
+        ]}]}]},
+        {"sections": [{"subsections": [{"horizontalHeaderTable": [{"signal": rng.choice(WORDS), "value": rng.randint(0, 255)}]}]}]},
+    ]}
+
+
+# 生成一个标准及其术语（/store-standard/ 的请求体）
+def make_standard(index: int, rng: random.Random, terms: int = 20) -> dict:
+    return {
+        "standardID": f"GB/T {index}",  # 与 make_prd_document 中引用的法规编号一致
+        "documentName": f"标准 {index} {sentence(rng, 3)}",
+        "documentNameEnglish": sentence(rng, 5),
+        "scope": sentence(rng, 20),
+        "terms": [
+            {
+                "termID": k + 1,
+                "term": f"术语 {index}.{k + 1}",
+                "termEnglish": sentence(rng, 2),
+                "definition": sentence(rng, 24),
+                "notes": [{"ID": 1, "content": sentence(rng, 10)}],
+            }
+            for k in range(terms)
+        ],
+    }
+
+
+# 在上一版 PRD 全文的基础上修改若干行，模拟对话中逐步演进的 PRD
+def evolve_prd_text(previous: str, rng: random.Random, lines: int = 200) -> str:
+    if not previous:
+        return "\n".join(f"{i}. {sentence(rng, 12)}" for i in range(lines)) + "\n"
+    content: List[str] = previous.splitlines()
+    for _ in range(rng.randint(1, 5)):
+        position = rng.randrange(len(content))
+        if rng.random() < 0.7:
+            content[position] = f"{position}. {sentence(rng, 12)}"
+        else:
+            content.insert(position, f"{position}+ {sentence(rng, 12)}")
+    return "\n".join(content) + "\n"
@@ -0,0 +1,250 @@
+"""
+API 负载测试
+
+按场景并发请求 API，统计每个场景的吞吐量（RPS）和延迟分位数（p50 / p95 / p99），
+结果可保存为 JSON，并与上一次的结果对比。测试数据由 benchmarks.seed 生成。
+
+默认在进程内通过 ASGI 直接调用应用（无需启动服务，客户端与服务端共用一个事件循环，适合前后对比）；
+传入 --base-url 时请求已启动的服务（如 uvicorn api.main:app --workers 4），此时的数值更接近线上。
+
+场景:
+    login       邮箱 + 密码登录
+    chat        在自己的会话中追加一轮对话（用户消息 + 带 PRD 的模型回复）
+    history     分页读取会话的对话记录
+    graph       读取 UUR 图
+    prd_import  导入一份 PRD 文档
+
+用法（在项目根目录执行）:
+    python -m benchmarks.load --scenarios history,graph --concurrency 16 --duration 20
+    python -m benchmarks.load --output benchmarks/results/after.json --compare benchmarks/results/before.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+import psycopg
+
+from api.config import DB_CONNECTION_STRING
+from benchmarks.fixtures import BENCH_EMAIL_PATTERN, BENCH_PASSWORD, evolve_prd_text, make_prd_document, sentence
+
+SCENARIOS = ["login", "chat", "history", "graph", "prd_import"]
+
+
+# 单个虚拟用户：登录后的 token 以及自己使用的会话
+class VirtualUser:
+    def __init__(self, user_id: int, email: str, session_id: int, leaf_id: Optional[str]):
+        self.user_id = user_id
+        self.email = email
+        self.session_id = session_id
+        self.leaf_id = leaf_id  # 当前对话链末端，chat 场景在其后追加
+        self.headers: Dict[str, str] = {}
+        self.prd_text = ""
+
+
+# 从主数据库读取测试用户、每个用户的一个会话以及该会话最新的对话
+def load_fixtures() -> List[VirtualUser]:
+    with psycopg.connect(DB_CONNECTION_STRING) as conn:
+        rows = conn.execute("""
+            SELECT DISTINCT ON (u.user_id) u.user_id, u.email, s.session_id,
+                   (SELECT c.conversation_id FROM conversations c
+                    WHERE c.session_id = s.session_id ORDER BY c.created_at DESC LIMIT 1)
+            FROM users u
+            JOIN sessions s ON s.user_id = u.user_id
+            WHERE u.email LIKE %s
+            ORDER BY u.user_id, s.session_id
+        """, (BENCH_EMAIL_PATTERN,)).fetchall()
+    if not rows:
+        raise SystemExit("No benchmark users found, run `python -m benchmarks.seed` first")
+    return [VirtualUser(row[0], row[1], row[2], str(row[3]) if row[3] else None) for row in rows]
+
+
+async def login(client: httpx.AsyncClient, user: VirtualUser) -> httpx.Response:
+    response = await client.post("/login", json={"username": user.email, "password": BENCH_PASSWORD})
+    if response.status_code == 200:
+        user.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    return response
+
+
+async def chat(client: httpx.AsyncClient, user: VirtualUser, rng: random.Random) -> httpx.Response:
+    response = await client.post("/conversations", headers=user.headers, json={
+        "user_id": user.user_id,
+        "session_id": user.session_id,
+        "conversation_type": 0,
+        "content": sentence(rng, 12),
+        "conversation_parent_id": user.leaf_id,
+    })
+    if response.status_code != 200:
+        return response
+    user.prd_text = evolve_prd_text(user.prd_text, rng)
+    response = await client.post("/conversations", headers=user.headers, json={
+        "user_id": user.user_id,
+        "session_id": user.session_id,
+        "conversation_type": 1,
+        "content": sentence(rng, 40),
+        "conversation_parent_id": response.json()["conversation_id"],
+        "prd_content": user.prd_text,
+    })
+    if response.status_code == 200:
+        user.leaf_id = response.json()["conversation_id"]
+    return response
+
+
+async def history(client: httpx.AsyncClient, user: VirtualUser, rng: random.Random) -> httpx.Response:
+    params = {"user_id": user.user_id, "limit": 20}
+    if user.leaf_id:
+        params["conversation_id"] = user.leaf_id
+    return await client.get(f"/conversations/sessions/{user.session_id}/page", headers=user.headers, params=params)
+
+
+async def graph(client: httpx.AsyncClient, user: VirtualUser, rng: random.Random) -> httpx.Response:
+    return await client.get("/uur_graph_query")
+
+
+async def prd_import(client: httpx.AsyncClient, user: VirtualUser, rng: random.Random) -> httpx.Response:
+    # 编号取随机值，避免不同运行之间生成完全相同的文档
+    return await client.post("/achieve_data", json=make_prd_document(rng.randrange(10**9), rng))
+
+
+SCENARIO_FUNCS = {
+    "login": lambda client, user, rng: login(client, user),
+    "chat": chat,
+    "history": history,
+    "graph": graph,
+    "prd_import": prd_import,
+}
+
+
+# 最近秩法计算分位数（毫秒）
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values), max(1, math.ceil(q / 100 * len(sorted_values)))) - 1
+    return sorted_values[index] * 1000
+
+
+# 以 concurrency 个并发虚拟用户循环执行一个场景 duration 秒
+async def run_scenario(client, name: str, users: List[VirtualUser], concurrency: int, duration: float, seed: int) -> dict:
+    func = SCENARIO_FUNCS[name]
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    deadline = time.perf_counter() + duration
+
+    async def worker(index: int):
+        user = users[index % len(users)]
+        rng = random.Random(f"{seed}-{name}-{index}")
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                response = await func(client, user, rng)
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - start)
+            if not status.startswith("2"):
+                errors[status] = errors.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": latencies[-1] * 1000 if latencies else 0.0,
+    }
+
+
+def print_report(results: Dict[str, dict], baseline: Optional[Dict[str, dict]] = None):
+    header = f"{'scenario':<12}{'requests':>10}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    if baseline:
+        header += f"{'rps Δ':>10}{'p95 Δ':>10}"
+    print(header)
+    for name, result in results.items():
+        line = (
+            f"{name:<12}{result['requests']:>10}{sum(result['errors'].values()):>8}{result['rps']:>10.1f}"
+            f"{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}{result['p99_ms']:>10.1f}"
+        )
+        previous = (baseline or {}).get(name)
+        if previous:
+            line += f"{_change(result['rps'], previous['rps']):>10}{_change(result['p95_ms'], previous['p95_ms']):>10}"
+        print(line)
+        if result["errors"]:
+            print(f"{'':<12}errors: {result['errors']}")
+
+
+def _change(current: float, previous: float) -> str:
+    if not previous:
+        return "n/a"
+    return f"{(current - previous) / previous * 100:+.1f}%"
+
+
+async def main(args):
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    users = load_fixtures()
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout)
+        lifespan = None
+    else:
+        from api.main import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark", timeout=args.timeout)
+        lifespan = app.router.lifespan_context(app)
+
+    results: Dict[str, dict] = {}
+    async with client:
+        if lifespan is not None:
+            await lifespan.__aenter__()
+        try:
+            # 所有虚拟用户先登录一次，需要鉴权的场景使用各自的 token
+            for response in await asyncio.gather(*(login(client, user) for user in users)):
+                response.raise_for_status()
+            for name in scenarios:
+                if args.warmup:
+                    await run_scenario(client, name, users, args.concurrency, args.warmup, args.seed)
+                results[name] = await run_scenario(client, name, users, args.concurrency, args.duration, args.seed)
+        finally:
+            if lifespan is not None:
+                await lifespan.__aexit__(None, None, None)
+
+    baseline = json.loads(Path(args.compare).read_text())["results"] if args.compare else None
+    print_report(results, baseline)
+    if args.output:
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps({
+            "run_id": str(uuid.uuid4()),
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "target": args.base_url or "in-process",
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "results": results,
+        }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Drive load scenarios against the API and report RPS and latency percentiles")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Comma-separated, from: {', '.join(SCENARIOS)}")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent virtual users per scenario")
+    parser.add_argument("--duration", type=float, default=15, help="Seconds to run each scenario")
+    parser.add_argument("--warmup", type=float, default=2, help="Seconds of unmeasured warmup per scenario")
+    parser.add_argument("--base-url", help="Target a running server instead of the in-process app")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write results as JSON")
+    parser.add_argument("--compare", help="Baseline JSON written by a previous run")
+    asyncio.run(main(parser.parse_args()))
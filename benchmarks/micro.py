@@ -0,0 +1,331 @@
+"""
+服务层微基准测试
+
+单独测量服务层中与行数相关的纯 Python 开销（行到响应结构的转换、分组、节点和边的构建、PRD 文档提取），
+数据库连接替换为返回 N 行假数据的游标，不访问数据库。每个用例在多个规模下运行，
+用于在合入前发现意外的 O(n²) 行为：
+
+- 增长指数：相邻两个规模的耗时比取对数（线性约为 1，平方约为 2），超过 --max-growth 视为失败
+- 基线对比：与 --save 保存的基线相比，耗时增加超过 --threshold 百分比视为失败
+
+基线与机器相关，请在同一台机器上先对修改前的代码保存基线，再对修改后的代码对比。
+INFO 及以下级别的日志在测量期间关闭，避免日志输出的开销淹没被测代码。
+
+用法（在项目根目录执行）:
+    python -m benchmarks.micro --save benchmarks/results/micro-baseline.json
+    python -m benchmarks.micro --baseline benchmarks/results/micro-baseline.json --threshold 25
+    python -m benchmarks.micro --cases graph,conversations --sizes 1000,10000,50000
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import logging
+import math
+import random
+import sys
+import time
+import uuid
+from contextlib import ExitStack, asynccontextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from unittest.mock import patch
+
+from api.schemas.usecase import PRDData
+from api.services import conversation_service, standard_service, usecase_service, uur_graph
+from api.utils.prd_codec import ENCODING_DELTA, ENCODING_ZLIB, compress_snapshot, encode_delta
+from benchmarks.fixtures import evolve_prd_text, make_prd_document, sentence
+
+
+# 假游标：execute 记录语句，fetchone / fetchall 返回 responder(语句) 给出的行
+# 行的形式（元组或字典）需与服务使用的 row_factory 一致
+class FakeCursor:
+    def __init__(self, responder: Callable[[str], list]):
+        self.responder = responder
+        self.rows: list = []
+        self.rowcount = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, query, params=None, **kwargs):
+        self.rows = self.responder(query)
+        self.rowcount = len(self.rows)
+
+    async def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    async def fetchall(self):
+        return self.rows
+
+
+class FakeConnection:
+    def __init__(self, responder: Callable[[str], list]):
+        self.responder = responder
+
+    def cursor(self, *args, **kwargs) -> FakeCursor:
+        return FakeCursor(self.responder)
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+
+# 替代 get_db_connection / get_b_db_connection
+def fake_connection(responder: Callable[[str], list]):
+    @asynccontextmanager
+    async def connect():
+        yield FakeConnection(responder)
+    return connect
+
+
+# 用例注册表：setup(stack, n, rng) 准备 n 行假数据（替换连接时登记到 stack），返回被测的可调用对象
+CASES: Dict[str, Callable] = {}
+DESCRIPTIONS: Dict[str, str] = {}
+
+
+def case(name: str, description: str):
+    def register(setup):
+        CASES[name] = setup
+        DESCRIPTIONS[name] = description
+        return setup
+    return register
+
+
+@case("usecases", "get_all_ucus: n user stories grouped under n/4 use cases")
+def setup_usecases(stack: ExitStack, n: int, rng: random.Random):
+    rows = [
+        (us_id // 4 + 1, f"Use case {us_id // 4}", sentence(rng, 12), us_id + 1, sentence(rng, 20))
+        for us_id in range(n)
+    ]
+    stack.enter_context(patch.object(usecase_service, "get_b_db_connection", fake_connection(lambda query: rows)))
+    return usecase_service.get_all_ucus
+
+
+@case("standards", "get_standards_from_db: n standards with 5 aggregated terms each")
+def setup_standards(stack: ExitStack, n: int, rng: random.Random):
+    rows = [
+        {
+            "_id": i + 1,
+            "id": i + 1,
+            "standardID": f"GB/T {i}",
+            "documentName": f"标准 {i}",
+            "documentNameEnglish": sentence(rng, 5),
+            "scope": sentence(rng, 20),
+            "terms": [
+                {"termID": k + 1, "term": f"术语 {i}.{k + 1}", "termEnglish": sentence(rng, 2),
+                 "definition": sentence(rng, 24), "notes": []}
+                for k in range(5)
+            ],
+        }
+        for i in range(n)
+    ]
+    stack.enter_context(patch.object(standard_service, "get_b_db_connection", fake_connection(lambda query: rows)))
+    return lambda: standard_service.get_standards_from_db(terms=1)
+
+
+@case("graph", "fetch_graph_data (cold snapshot): n/4 use cases, n/2 user stories, n/4 requirements")
+def setup_graph(stack: ExitStack, n: int, rng: random.Random):
+    modified = datetime(2024, 1, 1)
+    usecases = [
+        {"id": i + 1, "uuid": uuid.UUID(int=rng.getrandbits(128)), "name": sentence(rng, 4),
+         "description": sentence(rng, 12), "modified_time": modified + timedelta(seconds=i)}
+        for i in range(max(1, n // 4))
+    ]
+    userstories = [
+        {"id": i + 1, "uuid": uuid.UUID(int=rng.getrandbits(128)), "uuid_uc": rng.choice(usecases)["uuid"],
+         "description": sentence(rng, 12), "modified_time": modified + timedelta(seconds=i)}
+        for i in range(max(1, n // 2))
+    ]
+    requirements = [
+        {"id": i + 1, "uuid": uuid.UUID(int=rng.getrandbits(128)), "name": sentence(rng, 4),
+         "description": sentence(rng, 12), "modified_time": modified + timedelta(seconds=i)}
+        for i in range(max(1, n // 4))
+    ]
+    relations = [{"requirement_id": r["id"], "uc_id": rng.choice(usecases)["id"]} for r in requirements]
+    summary = [
+        {"source": source, "count": len(rows), "checksum": sum(row["id"] for row in rows)}
+        for source, rows in (("usecase", usecases), ("userstory", userstories), ("requirement", requirements))
+    ] + [{"source": "req_uc", "count": len(relations),
+          "checksum": sum(r["requirement_id"] * 1000003 + r["uc_id"] for r in relations)}]
+
+    def respond(query: str) -> list:
+        if query is uur_graph.SUMMARY_QUERY:
+            return summary
+        if "FROM req_uc_relations" in query:
+            return relations
+        if "FROM usecase" in query:
+            return usecases
+        if "FROM userstory" in query:
+            return userstories
+        return requirements
+
+    stack.enter_context(patch.object(uur_graph, "get_b_db_connection", fake_connection(respond)))
+
+    # 每次使用新的快照，测量首次加载（读取行、构建节点和边、序列化响应体）的完整开销
+    async def run():
+        with patch.object(uur_graph, "graph_snapshot", uur_graph.GraphSnapshot()):
+            return await uur_graph.fetch_graph_data(None)
+    return run
+
+
+@case("conversations", "get_conversations_service: n-turn chain, a delta-encoded PRD every 4th turn")
+def setup_conversations(stack: ExitStack, n: int, rng: random.Random):
+    created = datetime(2024, 1, 1)
+    snapshot_text = evolve_prd_text("", rng)
+    snapshot_blob = compress_snapshot(snapshot_text)
+    rows = []
+    parent_id = None
+    for turn in range(n):
+        conversation_id = uuid.UUID(int=rng.getrandbits(128))
+        prd = (None,) * 9
+        if turn % 4 == 1:
+            # 每个版本都是快照上的少量修改，PRD 大小与 n 无关（与 delta 模式定期重建快照一致）
+            prd = (None, turn, 1, None, ENCODING_DELTA, encode_delta(snapshot_text, evolve_prd_text(snapshot_text, rng)),
+                   ENCODING_ZLIB, None, snapshot_blob)
+        child_version = json.dumps({"version": 1, "count": 1}) if parent_id else None
+        rows.append((
+            conversation_id, 1, created + timedelta(seconds=turn), turn % 2, sentence(rng, 40 if turn % 2 else 12),
+            1, parent_id, child_version, None, None, None, None, None,
+        ) + prd)
+        parent_id = conversation_id
+
+    def respond(query: str) -> list:
+        return [(1,)] if "FROM sessions" in query else rows
+
+    stack.enter_context(patch.object(conversation_service, "get_db_connection", fake_connection(respond)))
+    return lambda: conversation_service.get_conversations_service(1, 1, None, None)
+
+
+@case("prd_extract", "extract_prd_records: one PRD document with n requirements and n/10 stakeholders")
+def setup_prd_extract(stack: ExitStack, n: int, rng: random.Random):
+    data = PRDData(**make_prd_document(0, rng, requirements=n, stakeholders=max(1, n // 10)))
+    return lambda: usecase_service.extract_prd_records(data)
+
+
+# 测量一次调用的耗时（秒）：自动确定每组调用次数使一组不少于 min_time 秒，取 repeat 组中最快的一组
+def measure(loop: asyncio.AbstractEventLoop, func: Callable, repeat: int, min_time: float) -> float:
+    # 预热一次，同时判断被测对象是否返回协程
+    result = func()
+    if inspect.iscoroutine(result):
+        loop.run_until_complete(result)
+
+        async def batch(number: int):
+            for _ in range(number):
+                await func()
+
+        def timed(number: int) -> float:
+            start = time.perf_counter()
+            loop.run_until_complete(batch(number))
+            return time.perf_counter() - start
+    else:
+        def timed(number: int) -> float:
+            start = time.perf_counter()
+            for _ in range(number):
+                func()
+            return time.perf_counter() - start
+
+    number = 1
+    while True:
+        elapsed = timed(number)
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2 if elapsed == 0 else max(2, min(10, math.ceil(min_time / elapsed)))
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        best = min(best, timed(number) / number)
+    return best
+
+
+# 相邻两个规模之间的增长指数：耗时比的对数 / 规模比的对数
+def growth(sizes: List[int], timings: Dict[int, float], n: int) -> Optional[float]:
+    index = sizes.index(n)
+    if index == 0:
+        return None
+    previous = sizes[index - 1]
+    if timings[previous] <= 0:
+        return None
+    return math.log(timings[n] / timings[previous]) / math.log(n / previous)
+
+
+def run(args) -> int:
+    names = [name.strip() for name in args.cases.split(",") if name.strip()] if args.cases else list(CASES)
+    unknown = set(names) - set(CASES)
+    if unknown:
+        raise SystemExit(f"Unknown cases: {', '.join(sorted(unknown))}")
+    sizes = sorted({int(size) for size in args.sizes.split(",")})
+    baseline = json.loads(Path(args.baseline).read_text())["cases"] if args.baseline else {}
+
+    logging.disable(logging.INFO)
+    loop = asyncio.new_event_loop()
+    results: Dict[str, Dict[int, float]] = {}
+    failures = []
+
+    header = f"{'case':<15}{'n':>8}{'ms/call':>12}{'us/row':>10}{'growth':>8}"
+    if baseline:
+        header += f"{'baseline':>12}{'change':>9}"
+    print(header)
+    try:
+        for name in names:
+            results[name] = {}
+            for n in sizes:
+                with ExitStack() as stack:
+                    func = CASES[name](stack, n, random.Random(f"{args.seed}-{name}-{n}"))
+                    results[name][n] = measure(loop, func, args.repeat, args.min_time)
+
+                seconds = results[name][n]
+                exponent = growth(sizes, results[name], n)
+                line = f"{name:<15}{n:>8}{seconds * 1000:>12.3f}{seconds / n * 1e6:>10.3f}"
+                line += f"{exponent:>8.2f}" if exponent is not None else f"{'':>8}"
+                if exponent is not None and exponent > args.max_growth:
+                    failures.append(f"{name} grows as n^{exponent:.2f} between n={sizes[sizes.index(n) - 1]} and n={n}")
+
+                previous = baseline.get(name, {}).get(str(n))
+                if previous:
+                    change = (seconds - previous) / previous * 100
+                    line += f"{previous * 1000:>12.3f}{change:>+8.1f}%"
+                    if change > args.threshold:
+                        failures.append(f"{name} n={n} is {change:.1f}% slower than the baseline")
+                print(line)
+    finally:
+        loop.close()
+        logging.disable(logging.NOTSET)
+
+    if args.save:
+        output = Path(args.save)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps({
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "cases": {name: {str(n): seconds for n, seconds in timings.items()} for name, timings in results.items()},
+        }, indent=2))
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time service-layer hot paths over fake cursors and flag regressions")
+    parser.add_argument("--cases", help=f"Comma-separated, from: {', '.join(CASES)}")
+    parser.add_argument("--sizes", default="1000,10000", help="Comma-separated row counts")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed batches per case, the fastest is reported")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Minimum seconds per timed batch")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", help="Write timings as a baseline JSON file")
+    parser.add_argument("--baseline", help="Baseline JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=25, help="Fail when a case is this many percent slower than the baseline")
+    parser.add_argument("--max-growth", type=float, default=1.5, help="Fail when time grows faster than n^max-growth")
+    parser.add_argument("--list", action="store_true", help="List cases and exit")
+    args = parser.parse_args()
+    if args.list:
+        for name, description in DESCRIPTIONS.items():
+            print(f"{name:<15}{description}")
+        sys.exit(0)
+    sys.exit(run(args))
@@ -0,0 +1,115 @@
+-- 业务数据库基础表结构（迁移之前的状态），仅用于在空数据库上搭建性能测试环境
+-- 之后由 scripts/migrate.py 执行 scripts/migrations/business/ 下的迁移
+
+CREATE TABLE IF NOT EXISTS userjourney (
+    user_journey_id serial PRIMARY KEY,
+    name text
+);
+
+CREATE TABLE IF NOT EXISTS status (
+    status_id serial PRIMARY KEY,
+    status_name text
+);
+
+CREATE TABLE IF NOT EXISTS stakeholder (
+    stakeholder_id serial PRIMARY KEY,
+    name text
+);
+
+CREATE TABLE IF NOT EXISTS interest (
+    interest_id serial PRIMARY KEY,
+    description text
+);
+
+CREATE TABLE IF NOT EXISTS uc_appendix (
+    id serial PRIMARY KEY,
+    table_txt text
+);
+
+CREATE TABLE IF NOT EXISTS usecase (
+    uc_id serial PRIMARY KEY,
+    uuid uuid DEFAULT gen_random_uuid(),
+    name text,
+    description text,
+    system text,
+    primary_actor text,
+    secondary_actor text,
+    precondition text,
+    success_end_condition text,
+    failed_end_condition text,
+    uc_appendix_id int,
+    main_success_scenario text,
+    extensions text,
+    io_variations text,
+    created_time timestamp DEFAULT now(),
+    created_by text,
+    modified_time timestamp DEFAULT now(),
+    modified_by text
+);
+
+CREATE TABLE IF NOT EXISTS userstory (
+    us_id serial PRIMARY KEY,
+    uuid uuid DEFAULT gen_random_uuid(),
+    uc_id int,
+    uuid_uc uuid,
+    description text,
+    status_id int,
+    user_journey_id int,
+    acceptance_criteria text,
+    valid_vehicle text,
+    created_time timestamp DEFAULT now(),
+    created_by text,
+    modified_time timestamp DEFAULT now(),
+    modified_by text
+);
+
+CREATE TABLE IF NOT EXISTS requirement (
+    requirement_id serial PRIMARY KEY,
+    uuid uuid DEFAULT gen_random_uuid(),
+    name text,
+    description text,
+    requirement_type text,
+    standard_id text,
+    source text,
+    purpose text,
+    verification_method text,
+    asil text,
+    created_time timestamp DEFAULT now(),
+    created_by text,
+    modified_time timestamp DEFAULT now(),
+    modified_by text
+);
+
+CREATE TABLE IF NOT EXISTS req_uc_relations (
+    requirement_id int,
+    uc_id int
+);
+
+CREATE TABLE IF NOT EXISTS sta_int_us_relations (
+    stakeholder_id int,
+    interest_id int,
+    us_id int
+);
+
+CREATE TABLE IF NOT EXISTS standards (
+    id serial PRIMARY KEY,
+    standard_id text,
+    document_name text,
+    document_name_english text,
+    scope text
+);
+
+CREATE TABLE IF NOT EXISTS terms (
+    id serial PRIMARY KEY,
+    standard_id int REFERENCES standards(id),
+    term_id int,
+    term text,
+    term_english text,
+    definition text,
+    notes jsonb
+);
+
+CREATE TABLE IF NOT EXISTS std_uc_relations (
+    standards_id int,
+    uc_id int
+);
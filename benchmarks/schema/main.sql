@@ -0,0 +1,53 @@
+-- 主数据库基础表结构（迁移之前的状态），仅用于在空数据库上搭建性能测试环境
+-- 之后由 scripts/migrate.py 执行 scripts/migrations/main/ 下的迁移
+
+CREATE TABLE IF NOT EXISTS users (
+    user_id serial PRIMARY KEY,
+    user_name text UNIQUE,
+    email text UNIQUE,
+    password text,
+    phone_number text UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS verification_codes (
+    id serial PRIMARY KEY,
+    phone_number text,
+    verification_code text,
+    expiration_time timestamp,
+    purpose int
+);
+
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id serial PRIMARY KEY,
+    user_id int REFERENCES users,
+    session_name text,
+    start_time timestamp,
+    end_time timestamp
+);
+
+CREATE TABLE IF NOT EXISTS conversations (
+    conversation_id uuid PRIMARY KEY,
+    session_id int REFERENCES sessions,
+    created_at timestamp,
+    conversation_type int,
+    content text,
+    version int,
+    conversation_parent_id uuid,
+    conversation_child_version json,
+    knowledge_graph text,
+    dify_func_des text,
+    knowledge_id text,
+    dify_id text,
+    preview_code text
+);
+
+CREATE TABLE IF NOT EXISTS prd (
+    prd_id serial PRIMARY KEY,
+    prd_version int,
+    conversation_id uuid,
+    session_id int,
+    prd_content text,
+    created_by text,
+    latest int,
+    restore_version int
+);
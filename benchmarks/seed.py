@@ -0,0 +1,201 @@
+"""
+性能测试数据准备
+
+在 .env 配置的主数据库和业务数据库中生成性能测试数据，请使用专用的测试数据库。
+数据通过服务层写入（与线上请求走相同的代码路径），同一个 --seed 生成相同的数据：
+
+- 用户：bench-user-<序号>@example.com，密码为 benchmarks.fixtures.BENCH_PASSWORD
+- 每个用户若干会话，每个会话一条较深的对话链，按 --branch-rate 重新生成回复形成分支，
+  模型回复按 --prd-every 附带逐步演进的 PRD（按 PRD_STORAGE_MODE 存储）
+- 标准及术语、批量导入的 PRD 文档（用例 / 用户故事 / 需求）
+
+用户和标准已存在时跳过，会话、对话和 PRD 每次运行都会追加。
+
+用法（在项目根目录执行）:
+    python -m benchmarks.seed --bootstrap               # 空数据库：先建表并执行迁移
+    python -m benchmarks.seed --users 20 --prds 5000    # 追加更多数据
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import psycopg
+
+from api.config import DB_CONNECTION_STRING, B_DB_CONNECTION_STRING
+from api.schemas.conversation import ConversationCreateRequest
+from api.schemas.standard import Standard
+from api.schemas.user import UserInDB
+from api.services.conversation_service import create_conversation_service
+from api.services.standard_service import insert_standard_data
+from api.services.usecase_service import process_prd_bulk_service
+from api.utils.db import open_db_pools, close_db_pools
+from api.utils.logger import get_logger
+from api.utils.security import get_password_hash
+from benchmarks.fixtures import BENCH_PASSWORD, bench_email, evolve_prd_text, make_prd_document, make_standard, sentence
+from scripts.migrate import run_migrations
+
+logger = get_logger(__name__)
+
+SCHEMA_DIR = Path(__file__).parent / "schema"
+
+
+# 在空数据库上创建基础表，再执行全部迁移
+def bootstrap():
+    for database, conninfo in (("main", DB_CONNECTION_STRING), ("business", B_DB_CONNECTION_STRING)):
+        with psycopg.connect(conninfo) as conn:
+            conn.execute((SCHEMA_DIR / f"{database}.sql").read_text(encoding="utf-8"))
+        run_migrations(database)
+
+
+# 创建测试用户（已存在则跳过），返回 UserInDB 列表
+def seed_users(count: int):
+    hashed_password = get_password_hash(BENCH_PASSWORD)  # 所有测试用户共用一个哈希，避免重复的 bcrypt 计算
+    with psycopg.connect(DB_CONNECTION_STRING) as conn:
+        with conn.cursor() as cur:
+            cur.executemany(
+                """
+                INSERT INTO users (user_name, email, password, phone_number)
+                VALUES (%s, %s, %s, %s)
+                ON CONFLICT DO NOTHING
+                """,
+                [(f"bench-user-{i}", bench_email(i), hashed_password, f"199{i:08d}") for i in range(count)],
+            )
+            cur.execute(
+                "SELECT user_id, user_name, email, password, phone_number FROM users WHERE email = ANY(%s) ORDER BY user_id",
+                ([bench_email(i) for i in range(count)],),
+            )
+            rows = cur.fetchall()
+    return [
+        UserInDB(user_id=row[0], username=row[1], email=row[2], hashed_password=row[3], phone_number=row[4])
+        for row in rows
+    ]
+
+
+# 为每个用户创建会话，返回 (用户, session_id) 列表
+def seed_sessions(users, per_user: int):
+    sessions = []
+    with psycopg.connect(DB_CONNECTION_STRING) as conn:
+        with conn.cursor() as cur:
+            for user in users:
+                for i in range(per_user):
+                    cur.execute(
+                        "INSERT INTO sessions (user_id, session_name, start_time) VALUES (%s, %s, %s) RETURNING session_id",
+                        (user.user_id, f"bench session {i}", datetime.now()),
+                    )
+                    sessions.append((user, cur.fetchone()[0]))
+    return sessions
+
+
+# 沿一条对话链交替写入用户消息和模型回复，模型回复有一定概率被重新生成（同一父对话下的新版本）
+async def seed_conversation_tree(user, session_id: int, turns: int, branch_rate: float, prd_every: int, rng: random.Random):
+    parent_id = None
+    prd_text = ""
+    created = 0
+    for turn in range(turns):
+        conversation_type = turn % 2  # 0: 用户消息，1: 模型回复
+        regenerations = 1 + (conversation_type == 1 and rng.random() < branch_rate)
+        for _ in range(regenerations):
+            request = ConversationCreateRequest(
+                user_id=user.user_id,
+                session_id=session_id,
+                conversation_type=conversation_type,
+                content=sentence(rng, 40 if conversation_type else 12),
+                conversation_parent_id=parent_id,
+                conversation_id=uuid.UUID(int=rng.getrandbits(128), version=4),
+            )
+            if conversation_type == 1 and prd_every and turn % prd_every == 1:
+                prd_text = evolve_prd_text(prd_text, rng)
+                request.prd_content = prd_text
+            response = await create_conversation_service(request, user)
+            created += 1
+        # 继续沿最新生成的版本向下
+        parent_id = uuid.UUID(response.conversation_id)
+    return created
+
+
+async def seed_conversations(sessions, turns: int, branch_rate: float, prd_every: int, seed: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(index, user, session_id):
+        async with semaphore:
+            rng = random.Random(f"{seed}-conversation-{index}")
+            return await seed_conversation_tree(user, session_id, turns, branch_rate, prd_every, rng)
+
+    counts = await asyncio.gather(*(run(i, user, session_id) for i, (user, session_id) in enumerate(sessions)))
+    return sum(counts)
+
+
+async def seed_standards(count: int, terms: int, seed: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(index):
+        async with semaphore:
+            rng = random.Random(f"{seed}-standard-{index}")
+            return await insert_standard_data(Standard(**make_standard(index, rng, terms)))
+
+    inserted = await asyncio.gather(*(run(i) for i in range(count)))
+    return sum(inserted)
+
+
+async def seed_prds(count: int, standards: int, seed: int, batch_size: int):
+    rng = random.Random(f"{seed}-prd")
+    succeeded = 0
+    for start in range(0, count, batch_size):
+        documents = [
+            make_prd_document(index, rng, requirements=rng.randint(2, 8), standards=standards)
+            for index in range(start, min(start + batch_size, count))
+        ]
+        result = await process_prd_bulk_service(json.dumps(documents).encode(), ndjson=False)
+        succeeded += result.succeeded
+        if result.failed:
+            errors = {r.error for r in result.results if r.status != "ok"}
+            logger.warning(f"{result.failed} PRD documents failed: {errors}")
+    return succeeded
+
+
+async def main(args):
+    if args.bootstrap:
+        bootstrap()
+
+    await open_db_pools()
+    try:
+        started = time.perf_counter()
+        users = seed_users(args.users)
+        sessions = seed_sessions(users, args.sessions)
+        logger.info(f"Users: {len(users)}, new sessions: {len(sessions)}")
+
+        conversations = await seed_conversations(
+            sessions, args.turns, args.branch_rate, args.prd_every, args.seed, args.concurrency
+        )
+        logger.info(f"Conversations created: {conversations}")
+
+        standards = await seed_standards(args.standards, args.terms, args.seed, args.concurrency)
+        logger.info(f"Standards created: {standards}")
+
+        prds = await seed_prds(args.prds, args.standards, args.seed, args.batch_size)
+        logger.info(f"PRD documents imported: {prds}")
+        logger.info(f"Seeding finished in {time.perf_counter() - started:.1f}s")
+    finally:
+        await close_db_pools()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Seed benchmark fixtures into the configured databases")
+    parser.add_argument("--bootstrap", action="store_true", help="Create base tables and apply migrations first")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for reproducible fixtures")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--sessions", type=int, default=3, help="Sessions per user")
+    parser.add_argument("--turns", type=int, default=60, help="Conversation depth per session")
+    parser.add_argument("--branch-rate", type=float, default=0.2, help="Probability a model reply is regenerated")
+    parser.add_argument("--prd-every", type=int, default=4, help="Attach an updated PRD every N turns (0 disables)")
+    parser.add_argument("--standards", type=int, default=200)
+    parser.add_argument("--terms", type=int, default=20, help="Terms per standard")
+    parser.add_argument("--prds", type=int, default=2000, help="PRD documents to import")
+    parser.add_argument("--batch-size", type=int, default=200, help="PRD documents per bulk import call")
+    parser.add_argument("--concurrency", type=int, default=8)
+    asyncio.run(main(parser.parse_args()))
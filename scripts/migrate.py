@@ -0,0 +1,58 @@
+"""
+数据库迁移脚本
+
+按文件名顺序执行 scripts/migrations/<database>/ 下尚未执行过的 SQL 文件，
+已执行的文件记录在目标数据库的 schema_migrations 表中。
+
+用法（在项目根目录执行）:
+    python -m scripts.migrate main       # 主数据库
+    python -m scripts.migrate business   # 业务数据库
+"""
+import argparse
+from pathlib import Path
+
+import psycopg
+
+from api.config import DB_CONNECTION_STRING, B_DB_CONNECTION_STRING
+from api.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+
+DATABASES = {
+    "main": DB_CONNECTION_STRING,
+    "business": B_DB_CONNECTION_STRING,
+}
+
+
+def run_migrations(database: str):
+    migrations = sorted((MIGRATIONS_DIR / database).glob("*.sql"))
+
+    with psycopg.connect(DATABASES[database]) as conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                filename TEXT PRIMARY KEY,
+                applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+        """)
+        applied = {row[0] for row in conn.execute("SELECT filename FROM schema_migrations")}
+        conn.commit()
+
+        for migration in migrations:
+            if migration.name in applied:
+                continue
+            logger.info(f"Applying migration {database}/{migration.name}")
+            # 每个迁移文件在独立事务中执行，失败时整体回滚
+            with conn.transaction():
+                conn.execute(migration.read_text(encoding="utf-8"))
+                conn.execute("INSERT INTO schema_migrations (filename) VALUES (%s)", (migration.name,))
+
+    logger.info(f"Database '{database}' is up to date")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply pending SQL migrations")
+    parser.add_argument("database", choices=sorted(DATABASES))
+    args = parser.parse_args()
+    run_migrations(args.database)
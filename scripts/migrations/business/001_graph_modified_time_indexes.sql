@@ -0,0 +1,6 @@
+-- UUR 图快照按 modified_time 水位线增量刷新，只读取水位线之后修改过的行
+
+CREATE INDEX IF NOT EXISTS idx_usecase_modified_time ON usecase (modified_time);
+CREATE INDEX IF NOT EXISTS idx_userstory_modified_time ON userstory (modified_time);
+CREATE INDEX IF NOT EXISTS idx_requirement_modified_time ON requirement (modified_time);
+CREATE INDEX IF NOT EXISTS idx_req_uc_relations_requirement_id ON req_uc_relations (requirement_id);
@@ -0,0 +1,53 @@
+-- 维度表唯一键，供批量导入使用 INSERT ... ON CONFLICT
+-- 旧的“先查询再插入”在并发导入时可能产生重复行，建立唯一索引前先合并：
+-- 引用统一指向 id 最小的一行，再删除其余重复行
+
+-- userjourney
+UPDATE userstory us SET user_journey_id = d.keep_id
+FROM (
+    SELECT user_journey_id, MIN(user_journey_id) OVER (PARTITION BY name) AS keep_id FROM userjourney
+) d
+WHERE us.user_journey_id = d.user_journey_id AND d.user_journey_id <> d.keep_id;
+DELETE FROM userjourney a USING userjourney b WHERE a.name = b.name AND a.user_journey_id > b.user_journey_id;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_userjourney_name ON userjourney (name);
+
+-- status
+UPDATE userstory us SET status_id = d.keep_id
+FROM (
+    SELECT status_id, MIN(status_id) OVER (PARTITION BY status_name) AS keep_id FROM status
+) d
+WHERE us.status_id = d.status_id AND d.status_id <> d.keep_id;
+DELETE FROM status a USING status b WHERE a.status_name = b.status_name AND a.status_id > b.status_id;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_status_status_name ON status (status_name);
+
+-- stakeholder
+UPDATE sta_int_us_relations r SET stakeholder_id = d.keep_id
+FROM (
+    SELECT stakeholder_id, MIN(stakeholder_id) OVER (PARTITION BY name) AS keep_id FROM stakeholder
+) d
+WHERE r.stakeholder_id = d.stakeholder_id AND d.stakeholder_id <> d.keep_id;
+DELETE FROM stakeholder a USING stakeholder b WHERE a.name = b.name AND a.stakeholder_id > b.stakeholder_id;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_stakeholder_name ON stakeholder (name);
+
+-- interest
+UPDATE sta_int_us_relations r SET interest_id = d.keep_id
+FROM (
+    SELECT interest_id, MIN(interest_id) OVER (PARTITION BY description) AS keep_id FROM interest
+) d
+WHERE r.interest_id = d.interest_id AND d.interest_id <> d.keep_id;
+DELETE FROM interest a USING interest b WHERE a.description = b.description AND a.interest_id > b.interest_id;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_interest_description ON interest (description);
+
+-- standards（terms 和 std_uc_relations 引用 standards.id）
+UPDATE std_uc_relations r SET standards_id = d.keep_id
+FROM (
+    SELECT id, MIN(id) OVER (PARTITION BY standard_id) AS keep_id FROM standards
+) d
+WHERE r.standards_id = d.id AND d.id <> d.keep_id;
+UPDATE terms t SET standard_id = d.keep_id
+FROM (
+    SELECT id, MIN(id) OVER (PARTITION BY standard_id) AS keep_id FROM standards
+) d
+WHERE t.standard_id = d.id AND d.id <> d.keep_id;
+DELETE FROM standards a USING standards b WHERE a.standard_id = b.standard_id AND a.id > b.id;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_standards_standard_id ON standards (standard_id);
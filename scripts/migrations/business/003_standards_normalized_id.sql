@@ -0,0 +1,26 @@
+-- standards.standard_id_normalized：去除空格后的 standard_id（生成列，写入时自动维护）
+-- 以唯一索引代替 REPLACE(standard_id, ' ', '') 全表扫描判重，
+-- 并作为 INSERT ... ON CONFLICT 的冲突目标，使并发上传同一标准时只有一个请求插入成功
+
+ALTER TABLE standards
+    ADD COLUMN IF NOT EXISTS standard_id_normalized TEXT
+    GENERATED ALWAYS AS (REPLACE(standard_id, ' ', '')) STORED;
+
+-- 合并去除空格后重复的标准：引用统一指向 id 最小的一行，再删除其余重复行
+UPDATE std_uc_relations r SET standards_id = d.keep_id
+FROM (
+    SELECT id, MIN(id) OVER (PARTITION BY standard_id_normalized) AS keep_id FROM standards
+) d
+WHERE r.standards_id = d.id AND d.id <> d.keep_id;
+UPDATE terms t SET standard_id = d.keep_id
+FROM (
+    SELECT id, MIN(id) OVER (PARTITION BY standard_id_normalized) AS keep_id FROM standards
+) d
+WHERE t.standard_id = d.id AND d.id <> d.keep_id;
+DELETE FROM standards a USING standards b
+WHERE a.standard_id_normalized = b.standard_id_normalized AND a.id > b.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_standards_standard_id_normalized ON standards (standard_id_normalized);
+
+-- 原始 standard_id 的唯一性已由规范化后的唯一索引保证
+DROP INDEX IF EXISTS uq_standards_standard_id;
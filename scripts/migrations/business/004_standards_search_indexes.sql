@@ -0,0 +1,18 @@
+-- 标准 / 术语搜索索引
+-- pg_trgm 三元组 GIN 索引加速 ILIKE '%关键词%' 子串匹配（中英文均适用）以及 fuzzy 模式下的相似度匹配；
+-- 术语英文名称和定义的全文检索使用表达式索引，表达式需与 standard_service.TERMS_TSVECTOR 保持一致
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_terms_term_trgm ON terms USING gin (term gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_terms_term_english_trgm ON terms USING gin (term_english gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_terms_definition_trgm ON terms USING gin (definition gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_terms_fts ON terms
+    USING gin (to_tsvector('english', coalesce(term_english, '') || ' ' || coalesce(definition, '')));
+
+CREATE INDEX IF NOT EXISTS idx_standards_standard_id_normalized_trgm ON standards USING gin (standard_id_normalized gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_standards_document_name_trgm ON standards USING gin (document_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_standards_document_name_english_trgm ON standards USING gin (document_name_english gin_trgm_ops);
+
+-- 术语按所属标准查询
+CREATE INDEX IF NOT EXISTS idx_terms_standard_id ON terms (standard_id);
@@ -0,0 +1,7 @@
+-- 用户故事列表的过滤与 keyset 分页索引
+-- 按状态 / 用户旅程 / 适用车型过滤时，在过滤条件内按 us_id 顺序取一页；描述子串匹配使用 pg_trgm 三元组索引（扩展见 004）
+
+CREATE INDEX IF NOT EXISTS idx_userstory_status_us_id ON userstory (status_id, us_id);
+CREATE INDEX IF NOT EXISTS idx_userstory_user_journey_us_id ON userstory (user_journey_id, us_id);
+CREATE INDEX IF NOT EXISTS idx_userstory_valid_vehicle_us_id ON userstory (valid_vehicle, us_id);
+CREATE INDEX IF NOT EXISTS idx_userstory_description_trgm ON userstory USING gin (description gin_trgm_ops);
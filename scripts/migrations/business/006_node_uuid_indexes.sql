@@ -0,0 +1,5 @@
+-- 节点详情按 uuid 查询（单个及批量 uuid = ANY(...)）
+
+CREATE INDEX IF NOT EXISTS idx_usecase_uuid ON usecase (uuid);
+CREATE INDEX IF NOT EXISTS idx_userstory_uuid ON userstory (uuid);
+CREATE INDEX IF NOT EXISTS idx_requirement_uuid ON requirement (uuid);
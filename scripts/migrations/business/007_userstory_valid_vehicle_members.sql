@@ -0,0 +1,5 @@
+-- 用户故事按适用车型过滤：valid_vehicle 存放以换行分隔的车型列表，按成员匹配
+-- 005 中按整列相等建立的索引对成员匹配无效，改为在拆分后的数组上建立 GIN 表达式索引
+
+DROP INDEX IF EXISTS idx_userstory_valid_vehicle_us_id;
+CREATE INDEX IF NOT EXISTS idx_userstory_valid_vehicles ON userstory USING gin (string_to_array(valid_vehicle, E'\n'));
@@ -0,0 +1,21 @@
+-- UUR 图快照只读取 modified_time 晚于水位线的行，未更新 modified_time 的 UPDATE 不会被发现
+-- 在更新时由触发器统一刷新 modified_time，不依赖各写入方自行设置
+
+CREATE OR REPLACE FUNCTION set_modified_time() RETURNS trigger AS $$
+BEGIN
+    NEW.modified_time = now();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_usecase_modified_time ON usecase;
+CREATE TRIGGER trg_usecase_modified_time BEFORE UPDATE ON usecase
+    FOR EACH ROW EXECUTE FUNCTION set_modified_time();
+
+DROP TRIGGER IF EXISTS trg_userstory_modified_time ON userstory;
+CREATE TRIGGER trg_userstory_modified_time BEFORE UPDATE ON userstory
+    FOR EACH ROW EXECUTE FUNCTION set_modified_time();
+
+DROP TRIGGER IF EXISTS trg_requirement_modified_time ON requirement;
+CREATE TRIGGER trg_requirement_modified_time BEFORE UPDATE ON requirement
+    FOR EACH ROW EXECUTE FUNCTION set_modified_time();
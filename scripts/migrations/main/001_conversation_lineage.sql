@@ -0,0 +1,37 @@
+-- 对话链路物化路径
+-- lineage:          从根对话到当前对话的 conversation_id 列表（包含自身）
+-- lineage_versions: 与 lineage 一一对应的 version 列表
+--
+-- 某个对话所在分支的“最新叶子节点”即其所有后代中 lineage_versions 最大的一行
+-- （数组按元素逐个比较，等价于在每个分叉处选择 version 最大的子对话并一直向下），
+-- 某个对话的全部祖先即其 lineage 中的所有 id，两者都只需一次索引读取。
+
+ALTER TABLE conversations ADD COLUMN IF NOT EXISTS lineage UUID[];
+ALTER TABLE conversations ADD COLUMN IF NOT EXISTS lineage_versions INTEGER[];
+
+-- 回填已有数据：从根对话（无父级或父级已不存在）开始递归向下构建路径
+WITH RECURSIVE tree AS (
+    SELECT c.conversation_id,
+           ARRAY[c.conversation_id] AS lineage,
+           ARRAY[COALESCE(c.version, 1)] AS lineage_versions
+    FROM conversations c
+    WHERE c.conversation_parent_id IS NULL
+       OR NOT EXISTS (SELECT 1 FROM conversations p WHERE p.conversation_id = c.conversation_parent_id)
+    UNION ALL
+    SELECT c.conversation_id,
+           t.lineage || c.conversation_id,
+           t.lineage_versions || COALESCE(c.version, 1)
+    FROM conversations c
+    JOIN tree t ON c.conversation_parent_id = t.conversation_id
+)
+UPDATE conversations c
+SET lineage = tree.lineage,
+    lineage_versions = tree.lineage_versions
+FROM tree
+WHERE c.conversation_id = tree.conversation_id;
+
+-- 查找后代（lineage @> ARRAY[id]）
+CREATE INDEX IF NOT EXISTS idx_conversations_lineage ON conversations USING GIN (lineage);
+-- 查找子对话和 session 下的最新对话
+CREATE INDEX IF NOT EXISTS idx_conversations_parent_version ON conversations (conversation_parent_id, version DESC);
+CREATE INDEX IF NOT EXISTS idx_conversations_session_created ON conversations (session_id, created_at DESC);
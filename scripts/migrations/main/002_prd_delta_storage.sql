@@ -0,0 +1,17 @@
+-- PRD 增量存储
+-- prd_encoding: plain（全文在 prd_content）、zlib（压缩快照）、delta（相对快照的差异）
+-- prd_blob:     zlib / delta 编码的内容
+-- base_prd_id:  delta 记录所依赖的快照记录
+--
+-- 已有数据保持 plain 编码，不需要回填；PRD_STORAGE_MODE=delta 时新版本才会以快照 + 差异的形式写入。
+
+ALTER TABLE prd ADD COLUMN IF NOT EXISTS prd_encoding VARCHAR(16) NOT NULL DEFAULT 'plain';
+ALTER TABLE prd ADD COLUMN IF NOT EXISTS prd_blob BYTEA;
+ALTER TABLE prd ADD COLUMN IF NOT EXISTS base_prd_id INTEGER;
+ALTER TABLE prd ALTER COLUMN prd_content DROP NOT NULL;
+
+-- 查找某个快照的所有依赖记录（更新快照时需要重新计算差异）
+CREATE INDEX IF NOT EXISTS idx_prd_base_prd_id ON prd (base_prd_id) WHERE base_prd_id IS NOT NULL;
+
+-- 按 session 查找最新版本 / 最近的快照
+CREATE INDEX IF NOT EXISTS idx_prd_session_version ON prd (session_id, prd_version DESC);
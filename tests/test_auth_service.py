@@ -0,0 +1,66 @@
+from contextlib import asynccontextmanager
+
+import pytest
+from fastapi import HTTPException
+
+from api.services import auth_service
+from api.schemas.user import UserInDB
+from api.services.auth_service import create_access_token, get_current_user, invalidate_cached_user
+from api.utils.db import DatabaseBusyError
+
+
+@pytest.fixture(autouse=True)
+def jwt_settings(monkeypatch):
+    monkeypatch.setattr(auth_service, "JWT_SECRET_KEY", "test-secret")
+    monkeypatch.setattr(auth_service, "JWT_ALGORITHM", "HS256")
+    auth_service.user_cache.clear()
+
+
+async def test_busy_pool_during_authentication_is_503_not_401(monkeypatch):
+    @asynccontextmanager
+    async def busy_connection():
+        raise DatabaseBusyError("database")
+        yield
+
+    monkeypatch.setattr(auth_service, "get_db_connection", busy_connection)
+    token = create_access_token({"sub": "busy@example.com"})
+    with pytest.raises(HTTPException) as exc_info:
+        await get_current_user(token)
+    assert exc_info.value.status_code == 503
+    assert "Retry-After" in exc_info.value.headers
+
+
+async def test_unknown_user_is_401(monkeypatch):
+    class Cursor:
+        async def execute(self, query, params):
+            pass
+
+        async def fetchone(self):
+            return None
+
+    class Connection:
+        @asynccontextmanager
+        async def cursor(self):
+            yield Cursor()
+
+    @asynccontextmanager
+    async def connection():
+        yield Connection()
+
+    monkeypatch.setattr(auth_service, "get_db_connection", connection)
+    with pytest.raises(HTTPException) as exc_info:
+        await get_current_user(create_access_token({"sub": "missing@example.com"}))
+    assert exc_info.value.status_code == 401
+
+
+async def test_invalidation_during_lookup_does_not_cache_the_stale_user(monkeypatch):
+    stale = UserInDB(user_id=1, username="old", email="user@example.com", hashed_password="x", phone_number="1")
+
+    async def lookup(identifier, is_email=True):
+        # 查询进行中，另一个请求修改了用户并使缓存失效
+        invalidate_cached_user(user_id=1)
+        return stale
+
+    monkeypatch.setattr(auth_service, "get_user_from_db", lookup)
+    assert await get_current_user(create_access_token({"sub": "user@example.com"})) is stale
+    assert auth_service.user_cache.get("user@example.com") is None
@@ -0,0 +1,70 @@
+from api.utils import cache
+from api.utils.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_get_returns_cached_value_and_counts_hits():
+    c = TTLCache(maxsize=2, ttl=60)
+    assert c.get("a") is None
+    c.set("a", 1)
+    assert c.get("a") == 1
+    assert c.stats() == {"size": 1, "maxsize": 2, "hits": 1, "misses": 1}
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache.time, "monotonic", clock)
+    c = TTLCache(maxsize=2, ttl=60)
+    c.set("a", 1)
+    clock.now += 59
+    assert c.get("a") == 1
+    clock.now += 2
+    assert c.get("a") is None
+    assert len(c) == 0
+
+
+def test_evicts_least_recently_used():
+    c = TTLCache(maxsize=2, ttl=60)
+    c.set("a", 1)
+    c.set("b", 2)
+    c.get("a")
+    c.set("c", 3)
+    assert c.get("b") is None
+    assert c.get("a") == 1
+    assert c.get("c") == 3
+
+
+def test_zero_maxsize_disables_cache():
+    c = TTLCache(maxsize=0, ttl=60)
+    c.set("a", 1)
+    assert c.get("a") is None
+
+
+def test_pop_where_and_clear():
+    c = TTLCache(maxsize=10, ttl=60)
+    for i in range(4):
+        c.set(("user", i), i)
+    c.pop_where(lambda key, value: value % 2 == 0)
+    assert c.get(("user", 0)) is None
+    assert c.get(("user", 1)) == 1
+    c.pop(("user", 1))
+    assert c.get(("user", 1)) is None
+    c.clear()
+    assert len(c) == 0
+
+
+def test_set_is_skipped_after_an_invalidation():
+    c = TTLCache(maxsize=10, ttl=60)
+    generation = c.generation
+    c.pop("a")
+    c.set("a", "stale", generation)
+    assert c.get("a") is None
+    c.set("a", "fresh", c.generation)
+    assert c.get("a") == "fresh"
@@ -0,0 +1,49 @@
+import pytest
+
+from api.utils.metrics import Counter, Gauge, Histogram, Metric, Registry
+
+
+def test_metric_base_is_abstract():
+    with pytest.raises(TypeError):
+        Metric("m", "help")
+
+
+def test_counter_and_gauge_render():
+    registry = Registry()
+    requests = registry.register(Counter("requests_total", "Requests", ["route"]))
+    in_progress = registry.register(Gauge("in_progress", "In progress"))
+    requests.inc(("/a",))
+    requests.inc(("/a",), 2)
+    requests.inc(('say "hi"\n',))
+    in_progress.inc()
+    in_progress.dec()
+    in_progress.inc()
+    text = registry.render()
+    assert "# TYPE requests_total counter" in text
+    assert 'requests_total{route="/a"} 3' in text
+    assert 'requests_total{route="say \\"hi\\"\\n"} 1' in text
+    assert "in_progress 1" in text
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency_seconds", "Latency", ["route"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(("/a",), value)
+    lines = histogram.collect()
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{route="/a",le="1"} 3' in lines
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 4' in lines
+    assert 'latency_seconds_sum{route="/a"} 6.05' in lines
+    assert 'latency_seconds_count{route="/a"} 4' in lines
+
+
+def test_registered_caches_and_collectors_are_rendered():
+    registry = Registry()
+    registry.register_cache("user", lambda: {"size": 2, "hits": 5, "misses": 1})
+    pool_size = Gauge("pool_size", "Pool size")
+    pool_size.set((), 4)
+    registry.register_collector(lambda: [pool_size])
+    text = registry.render()
+    assert 'cache_entries{cache="user"} 2' in text
+    assert 'cache_hits_total{cache="user"} 5' in text
+    assert "pool_size 4" in text
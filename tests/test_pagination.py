@@ -0,0 +1,30 @@
+import base64
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from api.utils.pagination import decode_cursor, encode_cursor
+
+
+def test_round_trip():
+    cursor = encode_cursor("title", "asc", "Brake", 42)
+    assert "=" not in cursor
+    assert decode_cursor(cursor, 4) == ["title", "asc", "Brake", 42]
+
+
+def test_non_json_values_are_encoded_as_strings():
+    assert decode_cursor(encode_cursor(datetime(2024, 1, 2, 3, 4, 5)), 1) == ["2024-01-02 03:04:05"]
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    base64.urlsafe_b64encode(b"not json").decode(),
+    base64.urlsafe_b64encode(b'{"a": 1}').decode(),
+    base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+    encode_cursor(1, 2),
+])
+def test_tampered_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor(cursor, 1)
+    assert exc_info.value.status_code == 400
@@ -0,0 +1,59 @@
+import json
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from api.routers import usecase as usecase_router
+from api.schemas.usecase import PRDRecords
+from api.services import usecase_service
+from api.services.usecase_service import PRDParseError, _parse_bulk_documents
+from tests.test_prd_extract import make_document
+
+
+def test_parses_valid_documents_and_reports_invalid_ones():
+    documents = [make_document().model_dump(), "just a string", 42, {"chapters": []}]
+    parsed = _parse_bulk_documents(json.dumps(documents).encode(), ndjson=False)
+    assert isinstance(parsed[0], PRDRecords)
+    assert parsed[1] == PRDParseError("PRD document must be a JSON object")
+    assert parsed[2] == PRDParseError("PRD document must be a JSON object")
+    assert isinstance(parsed[3], PRDParseError)
+
+
+def test_ndjson_reports_invalid_lines():
+    body = b"\n".join([json.dumps(make_document().model_dump()).encode(), b"{not json", b"", b'"Invalid JSON: x"'])
+    parsed = _parse_bulk_documents(body, ndjson=True)
+    assert len(parsed) == 3
+    assert isinstance(parsed[0], PRDRecords)
+    assert parsed[1].error.startswith("Invalid JSON")
+    assert parsed[2] == PRDParseError("PRD document must be a JSON object")
+
+
+def test_non_array_body_is_rejected():
+    with pytest.raises(HTTPException) as exc_info:
+        _parse_bulk_documents(b'{"chapters": []}', ndjson=False)
+    assert exc_info.value.status_code == 400
+
+
+@pytest.mark.parametrize("ndjson", [False, True])
+def test_too_many_documents_are_rejected(monkeypatch, ndjson):
+    monkeypatch.setattr(usecase_service, "PRD_IMPORT_MAX_DOCUMENTS", 2)
+    documents = [{"chapters": []}] * 3
+    body = b"\n".join(json.dumps(d).encode() for d in documents) if ndjson else json.dumps(documents).encode()
+    with pytest.raises(HTTPException) as exc_info:
+        _parse_bulk_documents(body, ndjson=ndjson)
+    assert exc_info.value.status_code == 413
+    assert len(_parse_bulk_documents(body.rsplit(b"\n", 1)[0] if ndjson else json.dumps(documents[:2]).encode(), ndjson=ndjson)) == 2
+
+
+@pytest.mark.parametrize("content_length", [True, False])
+def test_oversized_bulk_body_is_rejected(monkeypatch, content_length):
+    monkeypatch.setattr(usecase_router, "PRD_IMPORT_MAX_BODY_BYTES", 10)
+    app = FastAPI()
+    app.include_router(usecase_router.router)
+    body = b"[" + b" " * 20 + b"]"
+    with TestClient(app) as client:
+        # 不带 Content-Length 时按分块传输发送，只能在读取过程中检查
+        content = body if content_length else iter([body[:8], body[8:]])
+        response = client.post("/achieve_data/bulk", content=content)
+    assert response.status_code == 413
@@ -0,0 +1,42 @@
+import pytest
+
+from api.utils.prd_codec import (
+    ENCODING_DELTA, ENCODING_PLAIN, ENCODING_ZLIB,
+    apply_delta, compress_snapshot, decode_prd, decode_snapshot, encode_delta,
+)
+
+BASE = "".join(f"line {i}\n" for i in range(50))
+
+
+@pytest.mark.parametrize("text", [
+    BASE,
+    BASE.replace("line 10\n", "changed 10\n"),
+    "header\n" + BASE + "footer",
+    BASE[: len(BASE) // 2],
+    "",
+    "完全不同的内容\n第二行\n",
+])
+def test_delta_round_trip(text):
+    assert apply_delta(BASE, encode_delta(BASE, text)) == text
+
+
+def test_delta_against_empty_base():
+    assert apply_delta("", encode_delta("", BASE)) == BASE
+
+
+def test_delta_is_smaller_than_snapshot_for_small_edits():
+    text = BASE.replace("line 20\n", "line 20 edited\n")
+    assert len(encode_delta(BASE, text)) < len(compress_snapshot(text))
+
+
+def test_decode_snapshot():
+    assert decode_snapshot(ENCODING_PLAIN, "plain text", None) == "plain text"
+    assert decode_snapshot(None, "legacy text", None) == "legacy text"
+    assert decode_snapshot(ENCODING_ZLIB, None, compress_snapshot("中文 PRD")) == "中文 PRD"
+
+
+def test_decode_prd_resolves_delta_against_its_snapshot():
+    text = BASE + "appended\n"
+    blob = encode_delta(BASE, text)
+    assert decode_prd(ENCODING_DELTA, None, blob, ENCODING_ZLIB, None, compress_snapshot(BASE)) == text
+    assert decode_prd(ENCODING_DELTA, None, blob, ENCODING_PLAIN, BASE, None) == text
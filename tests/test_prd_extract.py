@@ -0,0 +1,63 @@
+import pytest
+from fastapi import HTTPException
+
+from api.schemas.usecase import PRDData
+from api.services.usecase_service import extract_prd_records
+
+
+def make_document(header=None):
+    header = header if header is not None else [
+        {"userJourney": "Parking"},
+        {"stakeholders&Interests": ["Driver : Safe parking", "OEM : Fewer recalls"]},
+        {"status": "draft"},
+        {"validVehicles": ["A", "B"]},
+        {"acceptanceCriteria": ["Car stops", {"description": "Warning shown"}]},
+    ]
+    return PRDData(chapters=[
+        {"sections": [{"subsections": [{"description": "As a driver I want to park", "verticalHeaderTable": header}]}]},
+        {"sections": [{}, {"subsections": [{"description": "Automatic parking", "verticalHeaderTable": [
+            {"overview": "Parks the car"}, {}, {"regulations": ["GB/T 1 - Parking systems", "ISO 2 - A - B"]},
+            {"primaryActor": "driver"}, {"secondaryActors": ["camera", "radar"]}, {"preconditions": ["Engine on"]},
+            {"successEndConditions": ["Parked"]}, {"failProtectionConditions": ["Brake"]}]}]},
+            {"subsections": [{"horizontalHeaderTable": [{"step": 1, "action": "Scan"}]}]},
+            {"subsections": [{"extension": "none"}]}, {"subsections": [{"io": "sensors"}]}]},
+        {"sections": [{"subsections": [{"horizontalHeaderTable": [
+            {"requirementName": "REQ speed", "description": "Limit speed", "requirementType": "Safety",
+             "ASIL": "B", "source": "GB/T 1 - Parking systems"},
+        ]}]}]},
+        {"sections": [{"subsections": [{"horizontalHeaderTable": [{"signal": "speed", "value": 5}]}]}]},
+    ])
+
+
+def test_extracts_all_records():
+    records = extract_prd_records(make_document())
+    assert records.user_journey == "Parking"
+    assert records.status == "draft"
+    assert records.usecase["name"] == "Automatic parking"
+    assert records.usecase["secondary_actor"] == "camera\nradar"
+    assert records.regulations == [("GB/T 1", "Parking systems"), ("ISO 2", "A - B")]
+    assert records.userstory == {
+        "description": "As a driver I want to park",
+        "valid_vehicle": "A\nB",
+        "acceptance_criteria": "Car stops\nWarning shown",
+    }
+    assert records.stakeholder_interests == [("Driver", "Safe parking"), ("OEM", "Fewer recalls")]
+    assert records.requirements == [{
+        "name": "REQ speed", "description": "Limit speed", "requirement_type": "Safety",
+        "asil": "B", "source": "GB/T 1 - Parking systems",
+    }]
+    assert records.appendix == str([{"signal": "speed", "value": 5}])
+
+
+def test_missing_status_is_rejected():
+    header = [{"userJourney": "Parking"}, {"stakeholders&Interests": []}, {"validVehicles": ["A"]}]
+    with pytest.raises(HTTPException) as exc_info:
+        extract_prd_records(make_document(header))
+    assert exc_info.value.status_code == 400
+
+
+def test_missing_valid_vehicles_is_rejected():
+    header = [{"userJourney": "Parking"}, {"stakeholders&Interests": []}, {"status": "draft"}, {"validVehicles": []}]
+    with pytest.raises(HTTPException) as exc_info:
+        extract_prd_records(make_document(header))
+    assert exc_info.value.status_code == 400
@@ -0,0 +1,34 @@
+from api.utils import query_trace
+from api.utils.query_trace import RequestTrace, fingerprint, record_query
+
+
+def test_fingerprint_strips_literals_comments_and_whitespace():
+    assert fingerprint("SELECT *\n  FROM t -- note\n WHERE id = 42 AND name = 'it''s' AND x = 1.5") == (
+        "SELECT * FROM t WHERE id = ? AND name = ? AND x = ?"
+    )
+
+
+def test_fingerprint_keeps_identifiers_with_digits_and_placeholders():
+    assert fingerprint("SELECT col1 FROM t2 WHERE a = %s AND b = %(b)s") == "SELECT col1 FROM t2 WHERE a = %s AND b = %(b)s"
+
+
+def test_fingerprint_is_truncated():
+    assert len(fingerprint("SELECT " + "x, " * 500 + "y")) == 200
+
+
+def test_record_query_accumulates_on_the_current_trace():
+    trace = RequestTrace()
+    token = query_trace._current_trace.set(trace)
+    try:
+        record_query("main", "SELECT 1 FROM t WHERE id = 1", 0.002, 1)
+        record_query("main", b"SELECT 1 FROM t WHERE id = 2", 0.003, 1)
+    finally:
+        query_trace._current_trace.reset(token)
+    assert trace.queries == 2
+    assert trace.fingerprints == {"SELECT ? FROM t WHERE id = ?": 2}
+    assert trace.server_timing() == 'db;dur=5.0;desc="2 queries", dbwait;dur=0.0'
+
+
+def test_record_query_outside_a_request_is_not_traced():
+    record_query("main", "SELECT 1", 0.001, 1)
+    assert query_trace._current_trace.get() is None
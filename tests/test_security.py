@@ -0,0 +1,47 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from api.utils import security
+
+
+async def _wait_for(predicate, timeout=2.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not predicate():
+        assert loop.time() < deadline
+        await asyncio.sleep(0.01)
+
+
+async def test_cancelled_waiter_keeps_job_counted_until_it_finishes():
+    started, release = threading.Event(), threading.Event()
+
+    def job():
+        started.set()
+        release.wait(5)
+
+    before = security._pending_password_jobs
+    task = asyncio.create_task(security._run_password_job(job))
+    await asyncio.to_thread(started.wait, 5)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert security._pending_password_jobs == before + 1
+
+    release.set()
+    await _wait_for(lambda: security._pending_password_jobs == before)
+
+
+async def test_rejects_when_too_many_jobs_pending(monkeypatch):
+    monkeypatch.setattr(security, "PASSWORD_HASH_MAX_PENDING", 0)
+    monkeypatch.setattr(security, "PASSWORD_HASH_RETRY_AFTER_SECONDS", 7)
+    with pytest.raises(HTTPException) as exc_info:
+        await security._run_password_job(lambda: None)
+    assert exc_info.value.status_code == 503
+    assert exc_info.value.headers["Retry-After"] == "7"
+
+
+async def test_returns_job_result():
+    assert await security._run_password_job(lambda a, b: a + b, 1, 2) == 3
@@ -0,0 +1,39 @@
+from api.services.standard_service import _highlight
+
+
+def test_marks_all_matches_case_insensitively():
+    assert _highlight("Brake and BRAKE", ["brake"]) == "<mark>Brake</mark> and <mark>BRAKE</mark>"
+
+
+def test_escapes_html_outside_and_inside_marks():
+    assert _highlight("<b>brake</b> & <brake>", ["brake"]) == (
+        "&lt;b&gt;<mark>brake</mark>&lt;/b&gt; &amp; &lt;<mark>brake</mark>&gt;"
+    )
+
+
+def test_keywords_are_not_treated_as_regex():
+    assert _highlight("a.b axb", ["a.b"]) == "<mark>a.b</mark> axb"
+
+
+def test_english_words_match_the_same_stem():
+    assert _highlight("the vehicle is braking", ["brakes"]) == "the vehicle is <mark>braking</mark>"
+
+
+def test_longer_keywords_win():
+    assert _highlight("emergency braking system", ["emergency", "emergency braking"]) == (
+        "<mark>emergency braking</mark> system"
+    )
+
+
+def test_snippet_around_first_match():
+    text = "x" * 100 + " brake " + "y" * 100
+    snippet = _highlight(text, ["brake"], snippet_chars=30)
+    assert snippet.startswith("…") and snippet.endswith("…")
+    assert "<mark>brake</mark>" in snippet
+    assert len(snippet.replace("<mark>", "").replace("</mark>", "")) == 32
+
+
+def test_no_match_returns_none():
+    assert _highlight("nothing here", ["brake"]) is None
+    assert _highlight(None, ["brake"]) is None
+    assert _highlight("brake", []) is None
@@ -0,0 +1,86 @@
+from contextlib import asynccontextmanager
+
+import pytest
+
+from api.services import standard_service
+from api.utils.pagination import decode_cursor
+
+
+class FakeStandardsDB:
+    """按 id 保存标准和术语，模拟 keyset 分页语句的 after_id / LIMIT。"""
+
+    def __init__(self, standard_ids, term_ids):
+        self.standard_ids = standard_ids
+        self.term_ids = term_ids
+
+    def respond(self, query, params):
+        if "FROM standards WHERE id" in query:
+            return [{"?column?": 1}]
+        if "FROM terms t" in query:
+            ids = self.term_ids
+            make = lambda i: {"id": i, "term_id": i, "term": f"term {i}", "term_english": None, "definition": None, "notes": None}
+        else:
+            ids = self.standard_ids
+            make = lambda i: {"_id": i, "standardID": f"STD-{i}"}
+        after_id = params["after_id"]
+        rows = [make(i) for i in ids if after_id is None or i > after_id]
+        return rows if params["limit"] is None else rows[:params["limit"]]
+
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+        self.rows = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, query, params=None):
+        self.rows = self.db.respond(query, params)
+
+    async def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    async def fetchall(self):
+        return self.rows
+
+
+@pytest.fixture
+def use_db(monkeypatch):
+    def use(db):
+        class FakeConnection:
+            def cursor(self, **kwargs):
+                return FakeCursor(db)
+
+        @asynccontextmanager
+        async def connect():
+            yield FakeConnection()
+
+        monkeypatch.setattr(standard_service, "get_b_db_connection", connect)
+
+    return use
+
+
+async def test_standards_exactly_full_last_page_has_no_cursor(use_db):
+    use_db(FakeStandardsDB(standard_ids=[1, 2, 3, 4], term_ids=[]))
+    standards, cursor = await standard_service.get_standards_from_db(0, ["standardID"], limit=2)
+    assert [s["standardID"] for s in standards] == ["STD-1", "STD-2"]
+    assert decode_cursor(cursor, 1) == [2]
+
+    standards, cursor = await standard_service.get_standards_from_db(0, ["standardID"], limit=2, cursor=cursor)
+    assert [s["standardID"] for s in standards] == ["STD-3", "STD-4"]
+    assert cursor is None
+
+
+async def test_terms_exactly_full_last_page_has_no_cursor(use_db):
+    use_db(FakeStandardsDB(standard_ids=[1], term_ids=[10, 11, 12]))
+    terms, cursor = await standard_service.get_standard_terms_from_db(1, limit=2)
+    assert [t["termID"] for t in terms] == [10, 11]
+    assert decode_cursor(cursor, 1) == [11]
+
+    terms, cursor = await standard_service.get_standard_terms_from_db(1, limit=1, cursor=cursor)
+    assert [t["termID"] for t in terms] == [12]
+    assert cursor is None
@@ -0,0 +1,199 @@
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from api.services import uur_graph
+from api.services.uur_graph import GraphSnapshot
+
+T0 = datetime(2024, 1, 1)
+
+
+# 内存中的业务表，按快照发出的语句返回对应的行（dict_row 形式）
+class FakeGraphDB:
+    def __init__(self):
+        self.usecase = {}
+        self.userstory = {}
+        self.requirement = {}
+        self.relations = []  # (requirement_id, uc_id)，允许重复
+        self.full_relation_loads = 0
+
+    def add_usecase(self, uc_id, modified_time=T0):
+        self.usecase[uc_id] = {"id": uc_id, "uuid": uuid.uuid4(), "name": f"UC {uc_id}",
+                               "description": "", "modified_time": modified_time}
+        return self.usecase[uc_id]
+
+    def add_userstory(self, us_id, uuid_uc, modified_time=T0):
+        self.userstory[us_id] = {"id": us_id, "uuid": uuid.uuid4(), "uuid_uc": uuid_uc,
+                                 "description": "", "modified_time": modified_time}
+        return self.userstory[us_id]
+
+    def add_requirement(self, requirement_id, modified_time=T0):
+        self.requirement[requirement_id] = {"id": requirement_id, "uuid": uuid.uuid4(), "name": f"REQ {requirement_id}",
+                                            "description": "", "modified_time": modified_time}
+        return self.requirement[requirement_id]
+
+    def respond(self, query, params):
+        if query is uur_graph.SUMMARY_QUERY:
+            pairs = {(r, u) for r, u in self.relations if r is not None and u is not None}
+            return [
+                {"source": name, "count": len(rows), "checksum": sum(rows)}
+                for name, rows in (("usecase", self.usecase), ("userstory", self.userstory), ("requirement", self.requirement))
+            ] + [{"source": "req_uc", "count": len(pairs), "checksum": sum(r * 1000003 + u for r, u in pairs)}]
+        if "FROM req_uc_relations" in query:
+            # 与语句中的 IS NOT NULL 条件一致
+            assert "uc_id IS NOT NULL" in query
+            relations = [(r, u) for r, u in self.relations if r is not None and u is not None]
+            if params is None:
+                self.full_relation_loads += 1
+                return [{"requirement_id": r, "uc_id": u} for r, u in relations]
+            return [{"requirement_id": r, "uc_id": u} for r, u in relations if r in params[0]]
+        for table in ("usecase", "userstory", "requirement"):
+            if f"FROM {table} " in query + " ":
+                rows = getattr(self, table).values()
+                if params:
+                    rows = [row for row in rows if row["modified_time"] >= params[0]]
+                return [dict(row) for row in rows]
+        raise AssertionError(f"unexpected query: {query}")
+
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+        self.rows = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, query, params=None):
+        self.rows = self.db.respond(query, params)
+
+    async def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    async def fetchall(self):
+        return self.rows
+
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+
+    def cursor(self, **kwargs):
+        return FakeCursor(self.db)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = FakeGraphDB()
+
+    @asynccontextmanager
+    async def connect():
+        yield FakeConnection(db)
+
+    monkeypatch.setattr(uur_graph, "get_b_db_connection", connect)
+    return db
+
+
+async def refresh(snapshot):
+    snapshot.mark_dirty()
+    await snapshot.refresh()
+
+
+async def test_graph_contains_nodes_and_edges(db):
+    uc = db.add_usecase(1)
+    us = db.add_userstory(1, uc["uuid"])
+    req = db.add_requirement(1)
+    db.relations.append((1, 1))
+    _, _, graph = await GraphSnapshot().view(None)
+    assert [node["id"] for node in graph["nodes"]] == ["UC-000001", "US-000001", "REQ-000001"]
+    assert {(edge["source"], edge["target"]) for edge in graph["edges"]} == {
+        (str(uc["uuid"]), str(us["uuid"])),
+        (str(req["uuid"]), str(uc["uuid"])),
+    }
+
+
+async def test_balanced_delete_and_insert_is_detected(db):
+    db.add_usecase(1)
+    db.add_usecase(2)
+    snapshot = GraphSnapshot()
+    await refresh(snapshot)
+
+    # 删除一行，同时写入一行 modified_time 早于水位线的新行：行数不变，增量读取也读不到
+    del db.usecase[2]
+    db.add_usecase(3, modified_time=T0 - timedelta(days=1))
+    await refresh(snapshot)
+    assert sorted(snapshot.usecases) == [1, 3]
+
+
+async def test_duplicate_relations_do_not_force_reloads(db):
+    db.add_usecase(1)
+    db.add_requirement(1)
+    db.relations += [(1, 1), (1, 1)]
+    snapshot = GraphSnapshot()
+    await refresh(snapshot)
+    loads = db.full_relation_loads
+    views = await snapshot.view(None)
+
+    await refresh(snapshot)
+    assert db.full_relation_loads == loads
+    assert await snapshot.view(None) is views
+    assert snapshot.req_uc == {1: {1}}
+
+
+async def test_relations_with_null_ends_are_ignored(db):
+    uc = db.add_usecase(1)
+    req = db.add_requirement(1)
+    db.relations += [(1, 1), (1, None), (None, 1)]
+    snapshot = GraphSnapshot()
+    _, _, graph = await snapshot.view(None)
+    assert [(edge["source"], edge["target"]) for edge in graph["edges"]] == [(str(req["uuid"]), str(uc["uuid"]))]
+
+    loads = db.full_relation_loads
+    await refresh(snapshot)
+    assert db.full_relation_loads == loads
+
+
+async def test_subgraph_queries_skip_dangling_userstory_edges(db):
+    uc = db.add_usecase(1)
+    linked = db.add_userstory(1, uc["uuid"])
+    dangling = db.add_userstory(2, uuid.uuid4())  # 指向不存在的用例
+    snapshot = GraphSnapshot()
+
+    _, _, graph = await snapshot.view(None)
+    assert len(graph["edges"]) == 1
+
+    neighborhood = await snapshot.subgraph([str(uc["uuid"])], 1, None)
+    assert {node["id"] for node in neighborhood["nodes"]} == {"UC-000001", "US-000001"}
+    assert [(edge["source"], edge["target"]) for edge in neighborhood["edges"]] == [(str(uc["uuid"]), str(linked["uuid"]))]
+
+    isolated = await snapshot.subgraph([str(dangling["uuid"])], None, None)
+    assert [node["id"] for node in isolated["nodes"]] == ["US-000002"]
+    assert isolated["edges"] == []
+
+
+async def test_subgraph_respects_depth_and_types(db):
+    uc = db.add_usecase(1)
+    us = db.add_userstory(1, uc["uuid"])
+    db.add_requirement(1)
+    db.relations.append((1, 1))
+    snapshot = GraphSnapshot()
+
+    one_hop = await snapshot.subgraph([str(us["uuid"])], 1, None)
+    assert {node["id"] for node in one_hop["nodes"]} == {"US-000001", "UC-000001"}
+    reachable = await snapshot.subgraph([str(us["uuid"])], None, None)
+    assert {node["id"] for node in reachable["nodes"]} == {"US-000001", "UC-000001", "REQ-000001"}
+    stories_only = await snapshot.subgraph([str(us["uuid"])], None, ["userstory"])
+    assert [node["id"] for node in stories_only["nodes"]] == ["US-000001"]
+
+
+async def test_subgraph_unknown_root_is_404(db):
+    db.add_usecase(1)
+    with pytest.raises(HTTPException) as exc_info:
+        await GraphSnapshot().subgraph([str(uuid.uuid4())], 1, None)
+    assert exc_info.value.status_code == 404